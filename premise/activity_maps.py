@@ -5,12 +5,13 @@ mapping between ``premise`` and ``ecoinvent`` terminology.
 
 from collections import defaultdict
 from pathlib import Path
-from typing import List, Union
+from typing import Dict, List, Tuple, Union
 
 import yaml
 from wurst import searching as ws
 
 from .filesystem_constants import DATA_DIR, VARIABLES_DIR
+from .utils import DATABASE_GENERATIONS
 
 POWERPLANT_TECHS = VARIABLES_DIR / "electricity_variables.yaml"
 FUELS_TECHS = VARIABLES_DIR / "fuels_variables.yaml"
@@ -48,6 +49,37 @@ def get_mapping(filepath: Path, var: str, model: str = None) -> dict:
     return mapping
 
 
+def normalize_filter(
+    fltr: Union[str, List[str], dict] = None,
+    mask: Union[str, List[str], dict] = None,
+) -> Tuple[Dict[str, List[str]], Dict[str, List[str]]]:
+    """
+    Convert `fltr` and `mask` (see :func:`act_fltr`) to dictionaries
+    with field names as keys and lists of strings as values.
+
+    :param fltr: value(s) to filter with.
+    :param mask: value(s) to filter with.
+    :return: normalized `fltr` and `mask`
+    """
+    if fltr is None:
+        fltr = {}
+    if mask is None:
+        mask = {}
+
+    # default field is name
+    if isinstance(fltr, (list, str)):
+        fltr = {"name": fltr}
+    if isinstance(mask, (list, str)):
+        mask = {"name": mask}
+
+    assert len(fltr) > 0, "Filter dict must not be empty."
+
+    return (
+        {k: v if isinstance(v, list) else [v] for k, v in fltr.items()},
+        {k: v if isinstance(v, list) else [v] for k, v in mask.items()},
+    )
+
+
 def act_fltr(
     database: List[dict],
     fltr: Union[str, List[str]] = None,
@@ -71,37 +103,124 @@ def act_fltr(
     :rtype: list
 
     """
-    if fltr is None:
-        fltr = {}
-    if mask is None:
-        mask = {}
-
-    # default field is name
-    if isinstance(fltr, (list, str)):
-        fltr = {"name": fltr}
-    if isinstance(mask, (list, str)):
-        mask = {"name": mask}
-
-    assert len(fltr) > 0, "Filter dict must not be empty."
+    fltr, mask = normalize_filter(fltr, mask)
 
     # find `act` in `database` that match `fltr`
     # and do not match `mask`
     filters = []
     for field, value in fltr.items():
-        if isinstance(value, list):
-            filters.extend([ws.either(*[ws.contains(field, v) for v in value])])
-        else:
-            filters.append(ws.contains(field, value))
+        filters.extend([ws.either(*[ws.contains(field, v) for v in value])])
 
     for field, value in mask.items():
-        if isinstance(value, list):
-            filters.extend([ws.exclude(ws.contains(field, v)) for v in value])
-        else:
-            filters.append(ws.exclude(ws.contains(field, value)))
+        filters.extend([ws.exclude(ws.contains(field, v)) for v in value])
 
     return list(ws.get_many(database, *filters))
 
 
+class FilterIndex:
+    """
+    Evaluates filter specifications (see :func:`act_fltr`) on a database
+    in a single pass.
+
+    All the strings used in the filters are matched once against
+    the field values of a dataset (its name, reference product, etc.),
+    and the result is memoized. Datasets are then grouped by the strings
+    they contain, and each filter is evaluated once per group
+    rather than once per dataset.
+
+    :ivar needles: strings used in filters, per field name
+    :ivar hits: memoized strings found in a field value, per field name
+    :ivar generation: incremented every time new strings are added
+    :ivar max_hits: number of field values to memoize, per field name
+
+    """
+
+    def __init__(self, max_hits: int = 100000) -> None:
+        self.needles: Dict[str, set] = defaultdict(set)
+        self.hits: Dict[str, dict] = defaultdict(dict)
+        self.generation: int = 0
+        self.max_hits = max_hits
+
+    def reset(self) -> None:
+        """
+        Forget memoized matches, e.g., those of the datasets
+        of a database that is no longer used.
+        """
+        self.hits.clear()
+
+    def add_filters(self, filtr: dict) -> None:
+        """
+        Register the strings used in filter specifications.
+        :param filtr: filter specifications, with `fltr` and `mask` keys
+        """
+        for spec in filtr.values():
+            for field_values in normalize_filter(spec.get("fltr"), spec.get("mask")):
+                for field, values in field_values.items():
+                    if not set(values).issubset(self.needles[field]):
+                        self.needles[field].update(values)
+                        # memoized matches are no longer complete
+                        self.hits[field].clear()
+                        self.generation += 1
+
+    def match(self, field: str, value: str) -> frozenset:
+        """
+        Return the strings used in filters for `field`
+        that are contained in `value`.
+        """
+        hits = self.hits[field]
+        if value not in hits:
+            if len(hits) >= self.max_hits:
+                hits.clear()
+            hits[value] = frozenset(n for n in self.needles[field] if n in value)
+        return hits[value]
+
+    def signature(self, dataset: dict) -> tuple:
+        """
+        Return the strings used in filters that are contained
+        in the fields of a dataset, for all fields.
+        """
+        return tuple(
+            (field, self.match(field, dataset.get(field) or ""))
+            for field in sorted(self.needles)
+        )
+
+    def classify(self, database: List[dict], groups: dict = None) -> dict:
+        """
+        Group dataset names by signature.
+        :param database: list of datasets
+        :param groups: existing groups to add to, if any
+        :return: dictionary with signatures as keys
+            and sets of dataset names as values
+        """
+        groups = groups if groups is not None else defaultdict(set)
+        for dataset in database:
+            groups[self.signature(dataset)].add(dataset["name"])
+        return groups
+
+    @staticmethod
+    def select(groups: dict, fltr: dict, mask: dict) -> set:
+        """
+        Return the names of datasets matching `fltr` and not matching `mask`.
+        :param groups: datasets grouped by signature (see :meth:`classify`)
+        :param fltr: normalized filter (see :func:`normalize_filter`)
+        :param mask: normalized mask (see :func:`normalize_filter`)
+        :return: set of dataset names
+        """
+        names = set()
+        for signature, group in groups.items():
+            hits = dict(signature)
+            if all(hits[f].intersection(v) for f, v in fltr.items()) and not any(
+                hits[f].intersection(v) for f, v in mask.items()
+            ):
+                names.update(group)
+        return names
+
+
+# shared by all instances of InventorySet,
+# so that memoized matches are reused
+FILTER_INDEX = FilterIndex()
+
+
 class InventorySet:
     """
     Hosts different filter sets to find equivalencies
@@ -163,6 +282,43 @@ class InventorySet:
         )
         self.heat_filters = get_mapping(filepath=HEAT_TECHS, var="ecoinvent_aliases")
 
+        for filtr in [
+            self.powerplant_filters,
+            self.powerplant_fuels_filters,
+            self.fuels_filters,
+            self.materials_filters,
+            self.daccs_filters,
+            self.carbon_storage_filters,
+            self.cement_fuel_filters,
+            self.gains_filters_EU,
+            self.heat_filters,
+        ]:
+            FILTER_INDEX.add_filters(filtr)
+
+        # datasets grouped by the filter strings they contain,
+        # computed on first use
+        self.groups = None
+        self.groups_key = None
+
+    def classify(self) -> dict:
+        """
+        Group the datasets of :attr:`database` by the filter strings
+        they contain. Groups are reused across mappings, unless
+        new filter strings are added or the database is changed
+        (see :class:`premise.utils.DatabaseGenerations`).
+        :return: dictionary with signatures as keys and sets of names as values
+        """
+        key = (
+            FILTER_INDEX.generation,
+            *DATABASE_GENERATIONS.get(self.database),
+            len(self.database),
+        )
+        if self.groups is None or self.groups_key != key:
+            self.groups = FILTER_INDEX.classify(self.database)
+            self.groups_key = key
+
+        return self.groups
+
     def generate_heat_map(self) -> dict:
         """
         Filter ecoinvent processes related to heat production.
@@ -275,15 +431,18 @@ class InventorySet:
         :rtype: dict
         """
 
-        database = database or self.database
+        FILTER_INDEX.add_filters(filtr)
 
-        techs = {
-            tech: act_fltr(database, fltr.get("fltr"), fltr.get("mask"))
-            for tech, fltr in filtr.items()
-        }
+        if database:
+            groups = FILTER_INDEX.classify(database)
+        else:
+            groups = self.classify()
 
         mapping = {
-            tech: {act["name"] for act in actlst} for tech, actlst in techs.items()
+            tech: FILTER_INDEX.select(
+                groups, *normalize_filter(fltr.get("fltr"), fltr.get("mask"))
+            )
+            for tech, fltr in filtr.items()
         }
 
         # check if all keys have values
@@ -0,0 +1,412 @@
+"""
+batch.py contains a headless runner for premise, which executes
+the jobs described in a YAML or JSON job specification file,
+and writes a machine-readable summary of the run.
+
+A job specification looks like::
+
+    brightway_project: ei39
+    workers: 4
+    source_db: ecoinvent 3.9.1 cutoff
+    source_version: "3.9.1"
+    sectors: all
+    exports:
+      - format: brightway
+    jobs:
+      - scenarios:
+          - {model: remind, pathway: SSP2-Base, year: 2030}
+          - {model: remind, pathway: SSP2-Base, year: 2050}
+      - scenarios:
+          - {model: image, pathway: SSP2-Base, year: 2050}
+        sectors: [electricity, cement]
+
+Top-level entries are defaults, overridden by the entries of each job.
+If `jobs` is not given, the specification describes a single job.
+
+From the command line::
+
+    python -m premise.batch job.yaml --workers 4
+
+"""
+
+import argparse
+import copy
+import inspect
+import json
+import os
+import sys
+import traceback
+from datetime import date, datetime
+from pathlib import Path
+from time import perf_counter
+from typing import List, Union
+
+import yaml
+
+from . import __version__
+from .ecoinvent_modification import NewDatabase
+
+# sector names, and the `NewDatabase` methods that update them
+UPDATE_METHODS = {
+    "all": "update_all",
+    "biomass": "update_biomass",
+    "electricity": "update_electricity",
+    "dac": "update_dac",
+    "fuels": "update_fuels",
+    "heat": "update_heat",
+    "cement": "update_cement",
+    "steel": "update_steel",
+    "cars": "update_cars",
+    "two_wheelers": "update_two_wheelers",
+    "trucks": "update_trucks",
+    "buses": "update_buses",
+    "external": "update_external_scenario",
+    "emissions": "update_emissions",
+}
+
+# export formats, and the `NewDatabase` methods that write them
+EXPORT_METHODS = {
+    "brightway": "write_db_to_brightway",
+    "superstructure": "write_superstructure_db_to_brightway",
+    "matrices": "write_db_to_matrices",
+    "simapro": "write_db_to_simapro",
+    "olca": "write_db_to_olca",
+    "datapackage": "write_datapackage",
+    "scenario_report": "generate_scenario_report",
+    "change_report": "generate_change_report",
+}
+
+# entries of a job that are passed to `NewDatabase`
+DATABASE_OPTIONS = [
+    "source_db",
+    "source_version",
+    "source_type",
+    "source_file_path",
+    "key",
+    "additional_inventories",
+    "system_model",
+    "system_args",
+    "use_cached_inventories",
+    "use_cached_database",
+    "external_scenarios",
+    "keep_uncertainty_data",
+    "gains_scenario",
+    "use_absolute_efficiency",
+]
+
+# entries of a job that are handled by the runner
+JOB_OPTIONS = ["scenarios", "sectors", "exports", "brightway_project"]
+
+# entries that are only valid at the top level of the specification
+SPEC_OPTIONS = ["jobs", "workers", "summary"]
+
+
+def load_job_spec(filepath: [str, Path]) -> dict:
+    """
+    Read a job specification file.
+    :param filepath: path to a YAML or JSON file
+    :return: job specification
+    """
+
+    filepath = Path(filepath)
+
+    if not filepath.is_file():
+        raise FileNotFoundError(f"The job specification {filepath} does not exist.")
+
+    with open(filepath, "r", encoding="utf-8") as stream:
+        if filepath.suffix == ".json":
+            spec = json.load(stream)
+        else:
+            spec = yaml.safe_load(stream)
+
+    if not isinstance(spec, dict):
+        raise ValueError(f"The job specification {filepath} must be a mapping.")
+
+    return spec
+
+
+def check_job(job: dict) -> dict:
+    """
+    Check that a job is properly formatted,
+    so that errors are raised before any database is loaded.
+    :param job: job, with the defaults of the specification
+    :return: job, with `sectors` and `exports` as lists
+    """
+
+    unknown = set(job) - set(DATABASE_OPTIONS) - set(JOB_OPTIONS)
+    if unknown:
+        raise ValueError(f"Unknown job option(s): {', '.join(sorted(unknown))}.")
+
+    if not job.get("scenarios"):
+        raise ValueError("Each job needs a list of `scenarios`.")
+
+    for scenario in job["scenarios"]:
+        if not all(name in scenario for name in ["model", "pathway", "year"]):
+            raise ValueError(
+                f"Missing parameters in {scenario}. Needs to include at least `model`,"
+                f"`pathway` and `year`."
+            )
+
+    sectors = job.get("sectors", [])
+    if isinstance(sectors, str):
+        sectors = [sectors]
+    for sector in sectors:
+        if sector not in UPDATE_METHODS:
+            raise ValueError(
+                f"Unknown sector {sector}. Must be one of {', '.join(UPDATE_METHODS)}."
+            )
+    job["sectors"] = sectors
+
+    exports = job.get("exports", [])
+    if isinstance(exports, (str, dict)):
+        exports = [exports]
+    exports = [
+        {"format": export} if isinstance(export, str) else dict(export)
+        for export in exports
+    ]
+    for export in exports:
+        if export.get("format") not in EXPORT_METHODS:
+            raise ValueError(
+                f"Unknown export format {export.get('format')}. "
+                f"Must be one of {', '.join(EXPORT_METHODS)}."
+            )
+        arguments = {k: v for k, v in export.items() if k != "format"}
+        method = getattr(NewDatabase, EXPORT_METHODS[export["format"]])
+        try:
+            inspect.signature(method).bind(None, **arguments)
+        except TypeError as err:
+            raise ValueError(
+                f"Invalid arguments for the export {export['format']}: {err}"
+            ) from err
+    job["exports"] = exports
+
+    return job
+
+
+def plan_jobs(spec: dict) -> List[dict]:
+    """
+    Expand the job specification into the list of jobs to run.
+    Duplicate scenarios of a job are dropped.
+    Jobs that only differ by their scenarios are merged,
+    so that the source database and inventories are loaded once
+    for all their scenarios, unless their exports are named
+    or include a superstructure database, which would then differ.
+    Jobs are ordered by source database, so that the cache of a source
+    database written by a job is read by the following ones.
+    :param spec: job specification
+    :return: list of jobs
+    """
+
+    defaults = {k: v for k, v in spec.items() if k not in SPEC_OPTIONS}
+    jobs = [
+        check_job({**copy.deepcopy(defaults), **copy.deepcopy(job)})
+        for job in spec.get("jobs", [{}])
+    ]
+
+    planned = {}
+    for job in jobs:
+        scenarios = []
+        for scenario in job["scenarios"]:
+            if scenario not in scenarios:
+                scenarios.append(scenario)
+        job["scenarios"] = scenarios
+
+        settings = {k: v for k, v in job.items() if k != "scenarios"}
+        mergeable = not any(
+            "name" in export or export["format"] == "superstructure"
+            for export in job["exports"]
+        )
+        if mergeable:
+            plan_key = json.dumps(settings, sort_keys=True, default=str)
+        else:
+            plan_key = len(planned)
+
+        if plan_key in planned:
+            planned[plan_key]["scenarios"].extend(
+                s for s in scenarios if s not in planned[plan_key]["scenarios"]
+            )
+        else:
+            planned[plan_key] = job
+
+    return sorted(
+        planned.values(),
+        key=lambda job: (
+            str(job.get("source_type", "brightway")),
+            str(job.get("source_db")),
+            str(job.get("source_version", "3.9")),
+            str(job.get("system_model", "cutoff")),
+        ),
+    )
+
+
+def run_job(job: dict, workers: int = None) -> dict:
+    """
+    Run a job: create the scenario databases, update the sectors
+    and write the exports.
+    :param job: job, as returned by `plan_jobs()`
+    :param workers: number of worker processes. Defaults to the number of CPUs.
+    :return: summary of the job
+    """
+
+    summary = {
+        "scenarios": job["scenarios"],
+        "source_db": job.get("source_db"),
+        "sectors": job["sectors"],
+        "exports": job["exports"],
+        "status": "success",
+        "steps": [],
+    }
+
+    def run_step(step, function, *args, **kwargs):
+        start = perf_counter()
+        result = function(*args, **kwargs)
+        summary["steps"].append(
+            {"step": step, "duration": round(perf_counter() - start, 3)}
+        )
+        return result
+
+    start = perf_counter()
+
+    try:
+        if job.get("brightway_project"):
+            import bw2data
+
+            bw2data.projects.set_current(job["brightway_project"])
+
+        options = {k: v for k, v in job.items() if k in DATABASE_OPTIONS}
+        if "key" not in options and os.environ.get("PREMISE_KEY"):
+            options["key"] = os.environ["PREMISE_KEY"]
+
+        ndb = run_step(
+            "load",
+            NewDatabase,
+            scenarios=copy.deepcopy(job["scenarios"]),
+            quiet=True,
+            use_multiprocessing=workers != 1,
+            processes=workers,
+            **options,
+        )
+
+        for sector in job["sectors"]:
+            run_step(sector, getattr(ndb, UPDATE_METHODS[sector]))
+
+        summary["datasets"] = [len(s["database"]) for s in ndb.scenarios]
+
+        for export in job["exports"]:
+            arguments = {k: v for k, v in export.items() if k != "format"}
+            run_step(
+                export["format"],
+                getattr(ndb, EXPORT_METHODS[export["format"]]),
+                **arguments,
+            )
+
+    except Exception as err:
+        summary["status"] = "failed"
+        summary["error"] = repr(err)
+        summary["traceback"] = traceback.format_exc()
+
+    summary["duration"] = round(perf_counter() - start, 3)
+
+    return summary
+
+
+def run_batch(
+    spec: Union[dict, str, Path],
+    workers: int = None,
+    summary_filepath: [str, Path] = None,
+) -> dict:
+    """
+    Run all the jobs of a job specification, one after the other,
+    and write a summary of the run as a JSON file.
+    Each job uses up to `workers` worker processes, across its scenarios.
+    A failed job is recorded in the summary, and the next jobs are run.
+    :param spec: job specification, or path to a job specification file
+    :param workers: number of worker processes. Overrides `workers`
+        of the specification. Defaults to the number of CPUs.
+    :param summary_filepath: path of the summary file. Overrides `summary`
+        of the specification.
+        Defaults to `export/batch_summary_{date}.json`.
+    :return: summary of the run
+    """
+
+    if not isinstance(spec, dict):
+        spec = load_job_spec(spec)
+
+    workers = workers or spec.get("workers")
+    summary_filepath = Path(
+        summary_filepath
+        or spec.get("summary")
+        or Path.cwd() / "export" / f"batch_summary_{date.today()}.json"
+    )
+
+    jobs = plan_jobs(spec)
+
+    summary = {
+        "premise_version": ".".join(str(v) for v in __version__),
+        "start": datetime.now().isoformat(timespec="seconds"),
+        "workers": workers,
+        "jobs": [],
+    }
+
+    for j, job in enumerate(jobs):
+        print(
+            f"\n/////////////////////////// JOB {j + 1} OF {len(jobs)} "
+            f"////////////////////////////"
+        )
+        summary["jobs"].append(run_job(job, workers=workers))
+
+    summary["end"] = datetime.now().isoformat(timespec="seconds")
+    summary["status"] = (
+        "success"
+        if all(job["status"] == "success" for job in summary["jobs"])
+        else "failed"
+    )
+
+    summary_filepath.parent.mkdir(parents=True, exist_ok=True)
+    with open(summary_filepath, "w", encoding="utf-8") as stream:
+        json.dump(summary, stream, indent=2, default=str)
+
+    print(f"Run summary saved under {summary_filepath}.")
+
+    return summary
+
+
+def main(argv: List[str] = None) -> int:
+    """
+    Command line entry point.
+    :param argv: command line arguments
+    :return: exit code, 0 if all jobs succeeded, 1 otherwise
+    """
+
+    parser = argparse.ArgumentParser(
+        prog="premise-batch",
+        description="Run the premise jobs described in a YAML or JSON file.",
+    )
+    parser.add_argument("spec", help="path to the job specification file")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="number of worker processes"
+    )
+    parser.add_argument("--summary", default=None, help="path of the run summary")
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="print the planned jobs, without running them",
+    )
+    args = parser.parse_args(argv)
+
+    spec = load_job_spec(args.spec)
+
+    if args.dry_run:
+        jobs = plan_jobs(spec)
+        for job in jobs:
+            job.pop("key", None)
+        print(json.dumps(jobs, indent=2, default=str))
+        return 0
+
+    summary = run_batch(spec, workers=args.workers, summary_filepath=args.summary)
+
+    return 0 if summary["status"] == "success" else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,7 +11,7 @@ import yaml
 
 from .export import biosphere_flows_dictionary
 from .filesystem_constants import VARIABLES_DIR
-from .logger import create_logger
+from .logger import add_to_change_log
 from .transformation import (
     BaseTransformation,
     IAMDataCollection,
@@ -27,8 +27,6 @@ from .validation import BiomassValidation
 
 IAM_BIOMASS_VARS = VARIABLES_DIR / "biomass_variables.yaml"
 
-logger = create_logger("biomass")
-
 
 def _update_biomass(
     scenario,
@@ -64,6 +62,7 @@ def _update_biomass(
     )
 
     validate.run_biomass_checks()
+    add_to_change_log(scenario, biomass.change_log, validate.change_log)
 
     scenario["database"] = biomass.database
     cache = biomass.cache
@@ -304,11 +303,12 @@ class Biomass(BaseTransformation):
 
     def write_log(self, dataset, status="created"):
         """
-        Write log file.
+        Record a change made to a dataset in the change log.
         """
 
-        logger.info(
-            f"{status}|{self.model}|{self.scenario}|{self.year}|"
-            f"{dataset['name']}|{dataset['location']}|"
-            f"{dataset.get('log parameters', {}).get('biomass share', '')}"
+        self.log_change(
+            "premise_biomass",
+            dataset,
+            status,
+            ("biomass share",),
         )
@@ -9,12 +9,10 @@ of the wurst database to the newly created cement markets.
 
 from collections import defaultdict
 
-from .logger import create_logger
+from .logger import add_to_change_log
 from .transformation import BaseTransformation, Dict, IAMDataCollection, List, np, ws
 from .validation import CementValidation
 
-logger = create_logger("cement")
-
 
 def _update_cement(scenario, version, system_model, cache=None):
     cement = Cement(
@@ -47,6 +45,7 @@ def _update_cement(scenario, version, system_model, cache=None):
     )
 
     validate.run_cement_checks()
+    add_to_change_log(scenario, cement.change_log, validate.change_log)
 
     return scenario, cache
 
@@ -535,19 +534,22 @@ class Cement(BaseTransformation):
 
     def write_log(self, dataset, status="created"):
         """
-        Write log file.
+        Record a change made to a dataset in the change log.
         """
 
-        logger.info(
-            f"{status}|{self.model}|{self.scenario}|{self.year}|"
-            f"{dataset['name']}|{dataset['location']}|"
-            f"{dataset.get('log parameters', {}).get('initial energy input per ton clinker', '')}|"
-            f"{dataset.get('log parameters', {}).get('new energy input per ton clinker', '')}|"
-            f"{dataset.get('log parameters', {}).get('carbon capture rate', '')}|"
-            f"{dataset.get('log parameters', {}).get('initial fossil CO2', '')}|"
-            f"{dataset.get('log parameters', {}).get('initial biogenic CO2', '')}|"
-            f"{dataset.get('log parameters', {}).get('new fossil CO2', '')}|"
-            f"{dataset.get('log parameters', {}).get('new biogenic CO2', '')}|"
-            f"{dataset.get('log parameters', {}).get('electricity generated', '')}|"
-            f"{dataset.get('log parameters', {}).get('electricity consumed', '')}"
+        self.log_change(
+            "premise_cement",
+            dataset,
+            status,
+            (
+                "initial energy input per ton clinker",
+                "new energy input per ton clinker",
+                "carbon capture rate",
+                "initial fossil CO2",
+                "initial biogenic CO2",
+                "new fossil CO2",
+                "new biogenic CO2",
+                "electricity generated",
+                "electricity consumed",
+            ),
         )
@@ -6,6 +6,7 @@ filling missing exchange information, etc.
 
 import csv
 import pprint
+from collections import defaultdict
 from pathlib import Path
 from typing import Dict, List, Tuple, Union
 
@@ -137,11 +138,18 @@ class DatabaseCleaner:
     :vartype source_db: str
     :ivar source_file_path: filepath of the database if `source_type` == 'ecospold'.
     :vartype source_file_path: str
+    :ivar use_multiprocessing: whether ecospold files are parsed in parallel.
+    :vartype use_multiprocessing: bool
 
     """
 
     def __init__(
-        self, source_db: str, source_type: str, source_file_path: Path, version: str
+        self,
+        source_db: str,
+        source_type: str,
+        source_file_path: Path,
+        version: str,
+        use_multiprocessing: bool = True,
     ) -> None:
         if source_type == "brightway":
             # Check that database exists
@@ -154,7 +162,9 @@ class DatabaseCleaner:
 
         if source_type == "ecospold":
             # The ecospold data needs to be formatted
-            ecoinvent = bw2io.SingleOutputEcospold2Importer(source_file_path, source_db)
+            ecoinvent = bw2io.SingleOutputEcospold2Importer(
+                source_file_path, source_db, use_mp=use_multiprocessing
+            )
             ecoinvent.apply_strategies()
             self.database = ecoinvent.data
             # Location field is added to exchanges
@@ -291,6 +301,14 @@ class DatabaseCleaner:
         :type matching_fields: tuple
 
         """
+        # index dataset locations by matching fields once,
+        # instead of searching the database for each exchange
+        locations = defaultdict(list)
+        for dataset in self.database:
+            locations[tuple(dataset.get(k) for k in matching_fields)].append(
+                dataset["location"]
+            )
+
         for dataset in self.database:
             # collect production exchanges that simply do not have a location key and set it to
             # the location of the dataset
@@ -300,9 +318,7 @@ class DatabaseCleaner:
 
             for exc in wurst.technosphere(dataset):
                 if "location" not in exc:
-                    locs = self.find_location_given_lookup_dict(
-                        {k: exc.get(k) for k in matching_fields}
-                    )
+                    locs = locations.get(tuple(exc.get(k) for k in matching_fields), [])
                     if len(locs) == 1:
                         exc["location"] = locs[0]
                     else:
@@ -6,12 +6,16 @@ and emission values for different sectors, carbon capture rates, etc.
 
 import copy
 import csv
+import hashlib
 import os
+import threading
+import weakref
+from collections import OrderedDict
 from functools import lru_cache
 from io import BytesIO, StringIO
-from itertools import chain
+from itertools import chain, product
 from pathlib import Path
-from typing import Dict, List, Union
+from typing import Callable, Dict, List, Tuple, Union
 
 import numpy as np
 import pandas as pd
@@ -41,6 +45,13 @@ CROPS_PROPERTIES = VARIABLES_DIR / "crops_variables.yaml"
 GAINS_GEO_MAP = VARIABLES_DIR / "gains_regions_mapping.yaml"
 COAL_POWER_PLANTS_DATA = DATA_DIR / "electricity" / "coal_power_emissions_2012_v1.csv"
 
+# parsed external scenario datapackages, keyed on their content hash.
+# Only the most recently used ones are kept.
+DATAPACKAGE_CACHE = OrderedDict()
+DATAPACKAGE_CACHE_SIZE = 8
+DATAPACKAGE_CACHE_LOCK = threading.Lock()
+DATAPACKAGE_HASHES = weakref.WeakKeyDictionary()
+
 
 def print_missing_variables(missing_vars):
     if missing_vars:
@@ -63,6 +74,118 @@ def get_delimiter(data=None, filepath=None):
     return delimiter
 
 
+def get_datapackage_hash(datapackage) -> str:
+    """
+    Return a hash of the `config` and `scenario_data` resources
+    of a datapackage. Used as key to cache their parsed content.
+    :param datapackage: datapackage.DataPackage
+    :return: hex digest
+    """
+
+    if datapackage in DATAPACKAGE_HASHES:
+        return DATAPACKAGE_HASHES[datapackage]
+
+    digest = hashlib.sha256()
+    for name in ["config", "scenario_data"]:
+        resource = datapackage.get_resource(name)
+        if resource is not None:
+            digest.update(resource.raw_read())
+
+    DATAPACKAGE_HASHES[datapackage] = digest.hexdigest()
+
+    return DATAPACKAGE_HASHES[datapackage]
+
+
+def pivot_external_scenario_data(dataframe: pd.DataFrame) -> dict:
+    """
+    Convert the scenario data of an external scenario into a dictionary
+    with (model, pathway, scenario) as keys and `xarray` with dimensions
+    "region", "variables" and "year" as values.
+    :param dataframe: scenario data, as read from the datapackage
+    :return: dictionary of multidimensional arrays
+    """
+
+    id_vars = list(dataframe.columns[: dataframe.columns.get_loc("region")]) + [
+        "region",
+        "variables",
+        "unit",
+    ]
+    dataframe = dataframe.melt(id_vars=id_vars, var_name="year", value_name="value")
+    # convert year to int64 and values to float64
+    dataframe["year"] = dataframe["year"].astype(np.int64)
+    dataframe["value"] = dataframe["value"].astype(np.float64)
+
+    series = dataframe.groupby(
+        ["model", "pathway", "scenario", "region", "variables", "year"]
+    )["value"].mean()
+
+    return {
+        key: group.droplevel(["model", "pathway", "scenario"]).to_xarray()
+        for key, group in series.groupby(level=["model", "pathway", "scenario"])
+    }
+
+
+def load_datapackage(datapackage) -> dict:
+    """
+    Parse the `config` and `scenario_data` resources of a datapackage.
+    The result is cached based on the content of the datapackage,
+    so that it is only parsed once, regardless of the number of scenarios.
+    Only the `DATAPACKAGE_CACHE_SIZE` most recently used datapackages are cached.
+    :param datapackage: datapackage.DataPackage
+    :return: dictionary with the parsed config file and the scenario data
+    """
+
+    key = get_datapackage_hash(datapackage)
+
+    with DATAPACKAGE_CACHE_LOCK:
+        if key not in DATAPACKAGE_CACHE:
+            resource = datapackage.get_resource("scenario_data")
+            # getting scenario data in binary format
+            df = pd.read_csv(BytesIO(resource.raw_read()))
+            # set headers from first row
+            df.columns = resource.headers
+
+            resource = datapackage.get_resource("config")
+
+            DATAPACKAGE_CACHE[key] = {
+                "config": yaml.safe_load(resource.raw_read()),
+                "scenario data": pivot_external_scenario_data(df),
+            }
+
+            while len(DATAPACKAGE_CACHE) > DATAPACKAGE_CACHE_SIZE:
+                DATAPACKAGE_CACHE.popitem(last=False)
+
+        DATAPACKAGE_CACHE.move_to_end(key)
+
+        return DATAPACKAGE_CACHE[key]
+
+
+def get_datapackage_config(datapackage) -> dict:
+    """
+    Return a copy of the parsed config file of a datapackage.
+    :param datapackage: datapackage.DataPackage
+    :return: config file
+    """
+
+    return copy.deepcopy(load_datapackage(datapackage)["config"])
+
+
+def select_external_variables(array: xr.DataArray, variables: list) -> xr.DataArray:
+    """
+    Select variables from the scenario data of an external scenario,
+    and drop the regions for which none of them is reported.
+    :param array: scenario data for a given model, pathway and scenario
+    :param variables: list of variables to select
+    :return: a copy of the selected data
+    """
+
+    array = array.sel(
+        variables=[v for v in array.coords["variables"].values if v in variables]
+    )
+
+    return array.dropna(dim="region", how="all").copy()
+
+
 def get_crops_properties() -> dict:
     """
     Return a dictionary with crop names as keys and IAM labels as values
@@ -289,6 +412,176 @@ def flatten(list_to_flatten):
     return rt
 
 
+@lru_cache
+def get_coal_power_plants_data() -> xr.DataArray:
+    """
+    Read data on coal power plants from external sources
+    and return an `xarray` with dimensions country, CHP, fuel and variable.
+    Source:
+    Oberschelp, C., Pfister, S., Raptis, C.E. et al.
+    Global emission hotspots of coal power generation.
+    Nat Sustain 2, 113–121 (2019).
+    https://doi.org/10.1038/s41893-019-0221-6
+
+    :return: a multidimensional array with coal power plants data
+    """
+
+    df = pd.read_csv(COAL_POWER_PLANTS_DATA, sep=",", index_col=False)
+    # rename columns
+    new_cols = {
+        "ISO2": "country",
+        "NET_ELECTRICITY_GENERATION_MWH": "generation",
+        "FUEL_INPUT_LHV_MJ": "fuel input",
+        "NET_ELECTRICAL_EFFICIENCY": "efficiency",
+        "CHP_PLANT": "CHP",
+        "PLANT_FUEL": "fuel",
+        "PLANT_EMISSION_CO2_KG": "CO2",
+        "PLANT_EMISSION_CH4_KG": "CH4",
+        "PLANT_EMISSION_SO2_KG": "SO2",
+        "PLANT_EMISSION_NOX_KG": "NOx",
+        "PLANT_EMISSION_PM_2.5_KG": "PM <2.5",
+        "PLANT_EMISSION_PM_10_TO_2.5_KG": "PM 10 - 2.5",
+        "PLANT_EMISSION_PM_GR_10_KG": "PM > 10",
+        "PLANT_EMISSION_HG_0_KG": "HG0",
+        "PLANT_EMISSION_HG_2P_KG": "HG2",
+        "PLANT_EMISSION_HG_P_KG": "HGp",
+    }
+    df = df.rename(columns=new_cols)
+
+    # drop columns
+    df = df.drop(columns=[c for c in df.columns if c not in new_cols.values()])
+
+    # rename Bituminous fuel type as Anthracite
+    df.loc[:, "fuel"] = df.loc[:, "fuel"].replace("Bituminous coal", "Anthracite coal")
+
+    # rename Subbituminous  and Coal blend fuel type as Lignite
+    df["fuel"] = df["fuel"].replace("Subbituminous coal", "Lignite coal")
+    df["fuel"] = df["fuel"].replace("Coal blend", "Lignite coal")
+
+    # convert to xarray
+    # with dimensions: country and CHP
+    # with variables as avergage: generation, efficiency, CO2, CH4, SO2,
+    # NOx, PM <2.5, PM 10 - 2.5, PM > 10, HG0, HG2, HGp
+    # and ignore the following variables: fuel input
+
+    df = df.drop(columns=["fuel input"])
+    array = (
+        df.melt(
+            id_vars=[
+                "country",
+                "CHP",
+                "fuel",
+            ],
+            var_name="variable",
+            value_name="value",
+        )
+        .groupby(["country", "CHP", "fuel", "variable"])["value"]
+        .mean()
+        .to_xarray()
+    )
+
+    return array
+
+
+@lru_cache
+def get_coal_power_plant_factors() -> Dict[Tuple[str, str, bool], Dict[str, float]]:
+    """
+    Pivot the coal power plants data (see :func:`get_coal_power_plants_data`)
+    into a lookup table, to avoid label-based selections in `xarray`
+    for each power plant dataset.
+
+    :return: dictionary with (country, fuel, CHP) as keys and, as values,
+        dictionaries with the efficiency and the emission factors
+        (in kg per kWh) of each substance
+    """
+
+    array = get_coal_power_plants_data().transpose("country", "CHP", "fuel", "variable")
+    variables = array.coords["variable"].values.tolist()
+    substances = [v for v in variables if v not in ("generation", "efficiency")]
+
+    efficiency = array.sel(variable="efficiency").values
+    generation = array.sel(variable="generation").values * 1e3
+    emission_factors = array.sel(variable=substances).values / generation[..., None]
+
+    factors = {}
+    for (i, country), (j, chp), (k, fuel) in product(
+        enumerate(array.coords["country"].values),
+        enumerate(array.coords["CHP"].values),
+        enumerate(array.coords["fuel"].values),
+    ):
+        factors[(str(country), str(fuel), bool(chp))] = {
+            "efficiency": float(efficiency[i, j, k]),
+            **dict(zip(substances, emission_factors[i, j, k].tolist())),
+        }
+
+    return factors
+
+
+class TimeAverage:
+    """
+    Cumulative sums of an array along the `year` dimension, so that
+    its average over any period of years is obtained without
+    interpolating the array again.
+
+    The array is linearly interpolated (and extrapolated) for every year
+    between `first_year` and `last_year`, as done for period markets
+    with ``array.interp(year=np.arange(start, start + period + 1)).mean(dim="year")``.
+    NaN values are ignored, as in :meth:`xarray.DataArray.mean`.
+
+    :ivar array: array with a `year` dimension
+    :ivar first_year: first year covered by the cumulative sums
+    :ivar last_year: last year covered by the cumulative sums
+    """
+
+    def __init__(self, array: xr.DataArray, first_year: int, last_year: int) -> None:
+        self.array = array
+        self.build(first_year, last_year)
+
+    def build(self, first_year: int, last_year: int) -> None:
+        """
+        Compute the cumulative sums between `first_year` and `last_year`.
+        :param first_year: first year covered
+        :param last_year: last year covered
+        """
+        self.first_year = first_year
+        self.last_year = last_year
+
+        annual = self.array.interp(
+            year=np.arange(first_year, last_year + 1),
+            kwargs={"fill_value": "extrapolate"},
+        )
+        self.cumulative_sum = annual.fillna(0).cumsum(dim="year")
+        self.cumulative_count = annual.notnull().cumsum(dim="year")
+
+    def mean(self, start: int, period: int) -> xr.DataArray:
+        """
+        Return the average of the array over the years `start` to `start` + `period`.
+        :param start: first year of the period
+        :param period: length of the period, in years
+        :return: array without the `year` dimension
+        """
+
+        if start < self.first_year or start + period > self.last_year:
+            self.build(
+                min(start, self.first_year),
+                max(start + period, self.last_year),
+            )
+
+        end = start + period - self.first_year
+        total = self.cumulative_sum.isel(year=end, drop=True)
+        count = self.cumulative_count.isel(year=end, drop=True)
+
+        if start > self.first_year:
+            total = total - self.cumulative_sum.isel(
+                year=start - self.first_year - 1, drop=True
+            )
+            count = count - self.cumulative_count.isel(
+                year=start - self.first_year - 1, drop=True
+            )
+
+        return total / count.where(count > 0)
+
+
 class IAMDataCollection:
     """
     :var model: name of the IAM model (e.g., "remind")
@@ -318,6 +611,7 @@ class IAMDataCollection:
         self.use_absolute_efficiency = use_absolute_efficiency
         self.min_year = 2005
         self.max_year = 2100
+        self.time_averages = {}
         key = key or None
 
         electricity_prod_vars = self.__get_iam_variable_labels(
@@ -703,6 +997,7 @@ class IAMDataCollection:
         )
 
         self.coal_power_plants = self.fetch_external_data_coal_power_plants()
+        self.coal_power_plant_factors = get_coal_power_plant_factors()
 
     def __get_iam_variable_labels(
         self, filepath: Path, variable: str
@@ -1306,17 +1601,20 @@ class IAMDataCollection:
         for i, dp in enumerate(datapackages):
             data[i] = {}
 
-            resource = dp.get_resource("scenario_data")
-            # getting scenario data in binary format
-            scenario_data = resource.raw_read()
-            df = pd.read_csv(
-                BytesIO(scenario_data),
+            parsed = load_datapackage(dp)
+            config_file = parsed["config"]
+            scenario_data = parsed["scenario data"].get(
+                (self.model, self.pathway, self.external_scenarios[i])
             )
-            # set headers from first row
-            df.columns = resource.headers
 
-            resource = dp.get_resource("config")
-            config_file = yaml.safe_load(resource.raw_read())
+            if scenario_data is None:
+                raise ValueError(
+                    f"The datapackage {dp.descriptor.get('name')} has no scenario data "
+                    f"for the model {self.model}, the pathway {self.pathway} "
+                    f"and the scenario {self.external_scenarios[i]}. "
+                    f"Available (model, pathway, scenario): "
+                    f"{sorted(parsed['scenario data'])}."
+                )
 
             if "production pathways" in config_file:
                 variables = {}
@@ -1326,33 +1624,12 @@ class IAMDataCollection:
                     except KeyError:
                         continue
 
-                subset = df.loc[
-                    (df["model"] == self.model)
-                    & (df["pathway"] == self.pathway)
-                    & (df["scenario"] == self.external_scenarios[i])
-                    & (df["variables"].isin(variables.values())),
-                    "region":,
-                ]
-
-                array = (
-                    subset.melt(
-                        id_vars=["region", "variables", "unit"],
-                        var_name="year",
-                        value_name="value",
-                    )[["region", "variables", "year", "value"]]
-                    .groupby(["region", "variables", "year"])["value"]
-                    .mean()
-                    .to_xarray()
+                array = select_external_variables(
+                    scenario_data, list(variables.values())
                 )
 
-                # convert to float64
-                array = array.astype(np.float64)
-                # convert year dim to int64
-                array.coords["year"] = array.coords["year"].astype(np.int64)
-
                 data[i]["production volume"] = array
-                regions = subset["region"].unique().tolist()
-                data[i]["regions"] = regions
+                data[i]["regions"] = array.region.values.tolist()
 
                 variables = {}
                 if "production pathways" in config_file:
@@ -1372,28 +1649,9 @@ class IAMDataCollection:
                             continue
 
                 if len(variables) > 0:
-                    subset = df.loc[
-                        (df["model"] == self.model)
-                        & (df["pathway"] == self.pathway)
-                        & (df["scenario"] == self.external_scenarios[i])
-                        & (df["variables"].isin(list(chain(*variables.values())))),
-                        "region":,
-                    ]
-
-                    array = (
-                        subset.melt(
-                            id_vars=["region", "variables", "unit"],
-                            var_name="year",
-                            value_name="value",
-                        )[["region", "variables", "year", "value"]]
-                        .groupby(["region", "variables", "year"])["value"]
-                        .mean()
-                        .to_xarray()
+                    array = select_external_variables(
+                        scenario_data, list(chain(*variables.values()))
                     )
-                    # convert to float64
-                    array = array.astype(np.float64)
-                    # convert year dim to int64
-                    array.coords["year"] = array.coords["year"].astype(np.int64)
 
                     ref_years = {}
 
@@ -1432,6 +1690,37 @@ class IAMDataCollection:
 
         return data
 
+    def get_period_average(
+        self,
+        name: Union[str, tuple],
+        start: int,
+        period: int,
+        array: Callable[[], xr.DataArray] = None,
+    ) -> xr.DataArray:
+        """
+        Return the average of an array over the years `start` to `start` + `period`
+        (see :class:`TimeAverage`). Cumulative sums are computed once per array
+        and reused for any other period.
+        :param name: name of the attribute holding the array (e.g., "electricity_markets"),
+            or any other hashable name if `array` is given
+        :param start: first year of the period
+        :param period: length of the period, in years
+        :param array: function returning the array to average, if not an attribute
+            of this object. It is only called the first time `name` is requested.
+        :return: array without the `year` dimension
+        """
+
+        if name not in self.time_averages:
+            array = getattr(self, name) if array is None else array()
+
+            self.time_averages[name] = TimeAverage(
+                array,
+                first_year=min(start, int(array.year.min())),
+                last_year=max(start + period, int(array.year.max())),
+            )
+
+        return self.time_averages[name].mean(start, period)
+
     def fetch_external_data_coal_power_plants(self):
         """
         Fetch data on coal power plants from external sources.
@@ -1441,62 +1730,7 @@ class IAMDataCollection:
         Nat Sustain 2, 113–121 (2019).
         https://doi.org/10.1038/s41893-019-0221-6
 
+        The data is read once and shared across scenarios.
         """
 
-        df = pd.read_csv(COAL_POWER_PLANTS_DATA, sep=",", index_col=False)
-        # rename columns
-        new_cols = {
-            "ISO2": "country",
-            "NET_ELECTRICITY_GENERATION_MWH": "generation",
-            "FUEL_INPUT_LHV_MJ": "fuel input",
-            "NET_ELECTRICAL_EFFICIENCY": "efficiency",
-            "CHP_PLANT": "CHP",
-            "PLANT_FUEL": "fuel",
-            "PLANT_EMISSION_CO2_KG": "CO2",
-            "PLANT_EMISSION_CH4_KG": "CH4",
-            "PLANT_EMISSION_SO2_KG": "SO2",
-            "PLANT_EMISSION_NOX_KG": "NOx",
-            "PLANT_EMISSION_PM_2.5_KG": "PM <2.5",
-            "PLANT_EMISSION_PM_10_TO_2.5_KG": "PM 10 - 2.5",
-            "PLANT_EMISSION_PM_GR_10_KG": "PM > 10",
-            "PLANT_EMISSION_HG_0_KG": "HG0",
-            "PLANT_EMISSION_HG_2P_KG": "HG2",
-            "PLANT_EMISSION_HG_P_KG": "HGp",
-        }
-        df = df.rename(columns=new_cols)
-
-        # drop columns
-        df = df.drop(columns=[c for c in df.columns if c not in new_cols.values()])
-
-        # rename Bituminous fuel type as Anthracite
-        df.loc[:, "fuel"] = df.loc[:, "fuel"].replace(
-            "Bituminous coal", "Anthracite coal"
-        )
-
-        # rename Subbituminous  and Coal blend fuel type as Lignite
-        df["fuel"] = df["fuel"].replace("Subbituminous coal", "Lignite coal")
-        df["fuel"] = df["fuel"].replace("Coal blend", "Lignite coal")
-
-        # convert to xarray
-        # with dimensions: country and CHP
-        # with variables as avergage: generation, efficiency, CO2, CH4, SO2,
-        # NOx, PM <2.5, PM 10 - 2.5, PM > 10, HG0, HG2, HGp
-        # and ignore the following variables: fuel input
-
-        df = df.drop(columns=["fuel input"])
-        array = (
-            df.melt(
-                id_vars=[
-                    "country",
-                    "CHP",
-                    "fuel",
-                ],
-                var_name="variable",
-                value_name="value",
-            )
-            .groupby(["country", "CHP", "fuel", "variable"])["value"]
-            .mean()
-            .to_xarray()
-        )
-
-        return array
+        return get_coal_power_plants_data()
@@ -0,0 +1,209 @@
+"""
+delta.py contains the representation of a scenario database
+as a set of changes relative to the source database.
+"""
+
+import copy
+from collections import defaultdict
+from typing import Dict, List
+
+
+def get_dataset_key(dataset: dict) -> tuple:
+    """
+    Return the key identifying a dataset.
+    :param dataset: dataset
+    :return: (name, reference product, location, unit)
+    """
+
+    return (
+        dataset["name"],
+        dataset.get("reference product"),
+        dataset.get("location"),
+        dataset["unit"],
+    )
+
+
+def get_exchange_key(exchange: dict) -> tuple:
+    """
+    Return the key identifying an exchange,
+    as in the scenario difference file.
+    :param exchange: exchange
+    :return: (name, product, categories, location, unit, type)
+    """
+
+    return (
+        exchange["name"],
+        exchange.get("product"),
+        exchange.get("categories"),
+        exchange.get("location"),
+        exchange["unit"],
+        exchange["type"],
+    )
+
+
+def group_exchanges(exchanges: List[dict]) -> Dict[tuple, List[dict]]:
+    """
+    Group the exchanges of a dataset by key.
+    :param exchanges: list of exchanges
+    :return: dictionary with exchange keys as keys and lists of exchanges as values
+    """
+
+    groups = defaultdict(list)
+    for exchange in exchanges:
+        groups[get_exchange_key(exchange)].append(exchange)
+
+    return groups
+
+
+class ScenarioDelta:
+    """
+    Changes made to the source database by the transformations of a scenario.
+    Datasets are identified by their name, reference product, location and unit,
+    and exchanges by their name, product, categories, location, unit and type.
+    Exchanges sharing a key are replaced together.
+
+    :ivar added: datasets that are not in the source database
+    :vartype added: list
+    :ivar removed: keys of datasets of the source database that are removed
+    :vartype removed: set
+    :ivar modified: changes to datasets of the source database, per dataset key,
+        as a dictionary with the keys `fields` (new or changed fields),
+        `removed fields` and `exchanges` (new exchanges, per exchange key)
+    :vartype modified: dict
+
+    """
+
+    def __init__(
+        self,
+        added: List[dict] = None,
+        removed: set = None,
+        modified: Dict[tuple, dict] = None,
+    ) -> None:
+        self.added = added or []
+        self.removed = removed or set()
+        self.modified = modified or {}
+
+    def __len__(self) -> int:
+        return len(self.added) + len(self.removed) + len(self.modified)
+
+    @classmethod
+    def from_databases(cls, base: List[dict], database: List[dict]) -> "ScenarioDelta":
+        """
+        Compare a scenario database to the source database it derives from.
+        :param base: source database
+        :param database: scenario database
+        :return: changes of `database` relative to `base`
+        """
+
+        base_datasets = defaultdict(list)
+        for dataset in base:
+            base_datasets[get_dataset_key(dataset)].append(dataset)
+
+        datasets = defaultdict(list)
+        for dataset in database:
+            datasets[get_dataset_key(dataset)].append(dataset)
+
+        delta = cls()
+
+        for key, group in datasets.items():
+            if key not in base_datasets:
+                delta.added.extend(group)
+                continue
+
+            base_group = base_datasets[key]
+            if group == base_group:
+                continue
+
+            # datasets that are not unique are replaced altogether
+            if len(group) > 1 or len(base_group) > 1:
+                delta.removed.add(key)
+                delta.added.extend(group)
+                continue
+
+            delta.modified[key] = get_dataset_changes(base_group[0], group[0])
+
+        delta.removed.update(key for key in base_datasets if key not in datasets)
+
+        return delta
+
+    def materialize(self, base: List[dict]) -> List[dict]:
+        """
+        Build the scenario database from the source database.
+        :param base: source database the changes are relative to
+        :return: scenario database
+        """
+
+        database = []
+
+        for dataset in base:
+            key = get_dataset_key(dataset)
+
+            if key in self.removed:
+                continue
+
+            dataset = copy.deepcopy(dataset)
+
+            if key in self.modified:
+                apply_dataset_changes(dataset, self.modified[key])
+
+            database.append(dataset)
+
+        database.extend(copy.deepcopy(self.added))
+
+        return database
+
+
+def get_dataset_changes(base_dataset: dict, dataset: dict) -> dict:
+    """
+    Return the changes made to a dataset.
+    :param base_dataset: dataset of the source database
+    :param dataset: dataset of the scenario database
+    :return: dictionary with the keys `fields`, `removed fields` and `exchanges`
+    """
+
+    changes = {
+        "fields": {
+            k: v
+            for k, v in dataset.items()
+            if k != "exchanges" and (k not in base_dataset or base_dataset[k] != v)
+        },
+        "removed fields": [k for k in base_dataset if k not in dataset],
+        "exchanges": {},
+    }
+
+    base_exchanges = group_exchanges(base_dataset["exchanges"])
+    exchanges = group_exchanges(dataset["exchanges"])
+
+    for key, group in exchanges.items():
+        if base_exchanges.get(key) != group:
+            changes["exchanges"][key] = group
+
+    # exchanges that are removed are replaced by an empty group
+    for key in base_exchanges:
+        if key not in exchanges:
+            changes["exchanges"][key] = []
+
+    return changes
+
+
+def apply_dataset_changes(dataset: dict, changes: dict) -> None:
+    """
+    Apply the changes returned by `get_dataset_changes()` to a dataset.
+    :param dataset: copy of a dataset of the source database
+    :param changes: changes to apply
+    """
+
+    for field in changes["removed fields"]:
+        del dataset[field]
+
+    dataset.update(copy.deepcopy(changes["fields"]))
+
+    dataset["exchanges"] = [
+        exchange
+        for exchange in dataset["exchanges"]
+        if get_exchange_key(exchange) not in changes["exchanges"]
+    ] + [
+        copy.deepcopy(exchange)
+        for group in changes["exchanges"].values()
+        for exchange in group
+    ]
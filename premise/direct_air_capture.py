@@ -9,7 +9,7 @@ import wurst
 import yaml
 
 from .filesystem_constants import DATA_DIR
-from .logger import create_logger
+from .logger import add_to_change_log
 from .transformation import (
     BaseTransformation,
     IAMDataCollection,
@@ -20,8 +20,6 @@ from .transformation import (
     ws,
 )
 
-logger = create_logger("dac")
-
 HEAT_SOURCES = DATA_DIR / "fuels" / "heat_sources_map.yml"
 
 
@@ -53,6 +51,7 @@ def _update_dac(scenario, version, system_model, cache=None):
         print("No DAC markets found in IAM data. Skipping.")
 
     dac.relink_datasets()
+    add_to_change_log(scenario, dac.change_log)
 
     return scenario, cache
 
@@ -272,11 +271,14 @@ class DirectAirCapture(BaseTransformation):
 
     def write_log(self, dataset, status="created"):
         """
-        Write log file.
+        Record a change made to a dataset in the change log.
         """
-        logger.info(
-            f"{status}|{self.model}|{self.scenario}|{self.year}|"
-            f"{dataset['name']}|{dataset['location']}|"
-            f"{dataset.get('log parameters', {}).get('electricity scaling factor', '')}|"
-            f"{dataset.get('log parameters', {}).get('heat scaling factor', '')}"
+        self.log_change(
+            "premise_dac",
+            dataset,
+            status,
+            (
+                "electricity scaling factor",
+                "heat scaling factor",
+            ),
         )
@@ -5,41 +5,61 @@ as well as export it back.
 """
 
 import copy
-import logging
+import gc
 import multiprocessing
 import os
 import pickle
 import sys
+import tempfile
 from datetime import date
 from multiprocessing import Pool as ProcessPool
 from multiprocessing.pool import ThreadPool as Pool
 from pathlib import Path
-from typing import List, Union
+from typing import Dict, List, Union
 
 import datapackage
-import yaml
+import pandas as pd
 
 from . import __version__
+from .activity_maps import FILTER_INDEX
 from .biomass import _update_biomass
 from .cement import _update_cement
 from .clean_datasets import DatabaseCleaner
-from .data_collection import IAMDataCollection
+from .data_collection import IAMDataCollection, get_datapackage_config
+from .delta import ScenarioDelta
 from .direct_air_capture import _update_dac
 from .electricity import _update_electricity
 from .emissions import _update_emissions
 from .export import (
     Export,
+    ScenarioExchanges,
     _prepare_database,
     build_datapackage,
     generate_scenario_factor_file,
     generate_superstructure_db,
+    prepare_original_db_for_export,
 )
 from .external import ExternalScenario
 from .external_data_validation import check_external_scenarios, check_inventories
 from .filesystem_constants import DATA_DIR, DIR_CACHED_DB, IAM_OUTPUT_DIR, INVENTORY_DIR
 from .fuels import _update_fuels
 from .heat import _update_heat
-from .inventory_imports import AdditionalInventory, DefaultInventory
+from .inventory_imports import (
+    AdditionalInventory,
+    DatabaseIndex,
+    DefaultInventory,
+    load_default_inventory,
+    register_migration_maps,
+)
+from .lcia import quick_lcia
+from .logger import (
+    ChangeLog,
+    add_to_change_log,
+    configure_logging,
+    configure_worker_logging,
+    create_logger,
+    get_log_queue,
+)
 from .report import generate_change_report, generate_summary_report
 from .steel import _update_steel
 from .transport import _update_vehicles
@@ -54,7 +74,7 @@ from .utils import (
     warning_about_biogenic_co2,
 )
 
-logger = logging.getLogger("module")
+logger = create_logger("module")
 
 import bw2data
 
@@ -437,6 +457,22 @@ def check_time_horizon(time_horizon: int) -> int:
     return int(time_horizon)
 
 
+def check_chunk_size(chunk_size: int) -> Union[int, None]:
+    """
+    Check that the number of scenarios to process at a time is valid.
+    :param chunk_size: number of scenarios held in memory at once
+    :return: number of scenarios held in memory at once
+    """
+
+    if chunk_size is None:
+        return None
+
+    if not isinstance(chunk_size, int) or chunk_size < 1:
+        raise ValueError("`chunk_size` must be a positive integer.")
+
+    return chunk_size
+
+
 def _update_all(
     scenario,
     version,
@@ -508,6 +544,20 @@ def _update_all(
     return scenario
 
 
+def _create_process_pool(processes: int = None) -> ProcessPool:
+    """
+    Create a pool of worker processes, which pass their log records
+    to the log listener of the main process.
+    :param processes: number of worker processes. Defaults to the number of CPUs.
+    """
+
+    return ProcessPool(
+        processes=processes or multiprocessing.cpu_count(),
+        initializer=configure_worker_logging,
+        initargs=(get_log_queue(),),
+    )
+
+
 def _export_to_matrices(obj):
     obj.export_db_to_matrices()
 
@@ -532,6 +582,12 @@ class NewDatabase:
     :vartype source_version: str
     :ivar system_model: Can be `cutoff` (default) or `consequential`.
     :vartype system_model: str
+    :ivar processes: number of worker processes, if `use_multiprocessing` is True,
+        and of threads building the superstructure datasets. Defaults to the number of CPUs.
+    :vartype processes: int
+    :ivar chunk_size: if given, the scenarios are not loaded at once,
+        but `chunk_size` at a time by `sweep()`, to bound memory use.
+    :vartype chunk_size: int
 
     """
 
@@ -554,6 +610,8 @@ class NewDatabase:
         gains_scenario="CLE",
         use_absolute_efficiency=False,
         use_multiprocessing=True,
+        processes: int = None,
+        chunk_size: int = None,
     ) -> None:
         self.source = source_db
         self.version = check_db_version(source_version)
@@ -562,8 +620,15 @@ class NewDatabase:
         self.system_model_args = system_args
         self.use_absolute_efficiency = use_absolute_efficiency
         self.multiprocessing = use_multiprocessing
+        self.processes = processes or multiprocessing.cpu_count()
+        self.key = key
+        self.chunk_size = check_chunk_size(chunk_size)
         self.keep_uncertainty_data = keep_uncertainty_data
 
+        # log records of this process are written directly,
+        # those of worker processes through a log listener
+        configure_logging()
+
         # if version is anything other than 3.8 or 3.9
         # and system_model is "consequential"
         # raise an error
@@ -607,6 +672,9 @@ class NewDatabase:
         else:
             self.datapackages = None
 
+        # matches memoized for the datasets of a previous database
+        FILTER_INDEX.reset()
+
         print("\n//////////////////// EXTRACTING SOURCE DATABASE ////////////////////")
         if use_cached_database:
             self.database = self.__find_cached_db(source_db)
@@ -629,7 +697,19 @@ class NewDatabase:
 
         print("Done!")
 
-        print("\n/////////////////////// EXTRACTING IAM DATA ////////////////////////")
+        if self.chunk_size is None:
+            print(
+                "\n/////////////////////// EXTRACTING IAM DATA ////////////////////////"
+            )
+            self.__load_scenarios(self.scenarios)
+            print("Done!")
+
+    def __load_scenarios(self, scenarios: List[dict]) -> None:
+        """
+        Extract the IAM data of the scenarios,
+        and give each of them a copy of the source database.
+        :param scenarios: list of scenarios
+        """
 
         def _fetch_iam_data(scenario):
             data = IAMDataCollection(
@@ -638,7 +718,7 @@ class NewDatabase:
                 year=scenario["year"],
                 external_scenarios=scenario.get("external scenarios"),
                 filepath_iam_files=scenario["filepath"],
-                key=key,
+                key=self.key,
                 system_model=self.system_model,
                 system_model_args=self.system_model_args,
                 gains_scenario=self.gains_scenario,
@@ -653,13 +733,29 @@ class NewDatabase:
 
         # use multiprocessing to speed up the process
         if self.multiprocessing:
-            with Pool(processes=multiprocessing.cpu_count()) as pool:
-                pool.map(_fetch_iam_data, self.scenarios)
+            with Pool(processes=self.processes) as pool:
+                pool.map(_fetch_iam_data, scenarios)
         else:
-            for scenario in self.scenarios:
+            for scenario in scenarios:
                 _fetch_iam_data(scenario)
 
-        print("Done!")
+    def __check_databases_are_loaded(self) -> None:
+        """
+        Check that the scenarios have a database to transform or export.
+        With `chunk_size`, the databases are only loaded by `sweep()`.
+        """
+
+        if any("database" not in scenario for scenario in self.scenarios):
+            if self.chunk_size is not None:
+                raise ValueError(
+                    "The scenario databases are not loaded, as `chunk_size` is set: "
+                    "use `sweep()` to transform and export them, "
+                    "`chunk_size` scenarios at a time."
+                )
+            raise ValueError(
+                "The scenario databases are no longer in memory: "
+                "they have been freed after being exported by `sweep()`."
+            )
 
     def __find_cached_db(self, db_name: str) -> List[dict]:
         """
@@ -736,7 +832,11 @@ class NewDatabase:
         :return:
         """
         return DatabaseCleaner(
-            self.source, self.source_type, self.source_file_path, self.version
+            self.source,
+            self.source_type,
+            self.source_file_path,
+            self.version,
+            use_multiprocessing=self.multiprocessing,
         ).prepare_datasets(self.keep_uncertainty_data)
 
     def __import_inventories(self) -> List[dict]:
@@ -814,12 +914,32 @@ class NewDatabase:
             (FILEPATH_RHENIUM, "3.9"),
             (FILEPATH_PGM, "3.8"),
         ]
-        for filepath in filepaths:
-            # make an exception for FILEPATH_OIL_GAS_INVENTORIES
-            # ecoinvent version is 3.9
-            if filepath[0] == FILEPATH_OIL_GAS_INVENTORIES and self.version == "3.9":
-                continue
+        # make an exception for FILEPATH_OIL_GAS_INVENTORIES
+        # ecoinvent version is 3.9
+        if self.version == "3.9":
+            filepaths = [f for f in filepaths if f[0] != FILEPATH_OIL_GAS_INVENTORIES]
+
+        # parse and migrate the inventory files in parallel
+        # results are cached on disk and picked up below
+        register_migration_maps(bw2data.projects.current)
+        if self.multiprocessing:
+            with _create_process_pool(self.processes) as pool:
+                args = [
+                    (
+                        filepath[0],
+                        filepath[1],
+                        self.version,
+                        self.system_model,
+                        bw2data.projects.current,
+                    )
+                    for filepath in filepaths
+                ]
+                pool.starmap(load_default_inventory, args)
+
+        # lookup tables over the database, shared by all imports
+        database_index = DatabaseIndex(self.database)
 
+        for filepath in filepaths:
             inventory = DefaultInventory(
                 database=self.database,
                 version_in=filepath[1],
@@ -827,10 +947,12 @@ class NewDatabase:
                 path=filepath[0],
                 system_model=self.system_model,
                 keep_uncertainty_data=self.keep_uncertainty_data,
+                database_index=database_index,
             )
             datasets = inventory.merge_inventory()
             data.extend(datasets)
             self.database.extend(datasets)
+            database_index.add(datasets)
 
         # print("Done!\n")
         return data
@@ -851,6 +973,9 @@ class NewDatabase:
         data = []
 
         if isinstance(data_package, list):
+            # lookup tables over the database, shared by all imports
+            database_index = DatabaseIndex(self.database)
+
             # this is a list of file paths
             for file_path in data_package:
                 additional = AdditionalInventory(
@@ -859,6 +984,7 @@ class NewDatabase:
                     version_out=self.version,
                     path=file_path["filepath"],
                     system_model=self.system_model,
+                    database_index=database_index,
                 )
                 additional.prepare_inventory()
                 data.extend(additional.merge_inventory())
@@ -885,11 +1011,13 @@ class NewDatabase:
 
         """
 
+        self.__check_databases_are_loaded()
+
         print("\n///////////////////////////// BIOMASS //////////////////////////////")
 
         # use multiprocessing to speed up the process
         if self.multiprocessing:
-            with ProcessPool(processes=multiprocessing.cpu_count()) as pool:
+            with _create_process_pool(self.processes) as pool:
                 args = [
                     (
                         scenario,
@@ -921,11 +1049,13 @@ class NewDatabase:
 
         """
 
+        self.__check_databases_are_loaded()
+
         print("\n/////////////////////////// ELECTRICITY ////////////////////////////")
 
         # use multiprocessing to speed up the process
         if self.multiprocessing:
-            with ProcessPool(processes=multiprocessing.cpu_count()) as pool:
+            with _create_process_pool(self.processes) as pool:
                 args = [
                     (
                         scenario,
@@ -957,11 +1087,13 @@ class NewDatabase:
 
         """
 
+        self.__check_databases_are_loaded()
+
         print("\n//////////////////////// DIRECT AIR CAPTURE ////////////////////////")
 
         # use multiprocessing to speed up the process
         if self.multiprocessing:
-            with ProcessPool(processes=multiprocessing.cpu_count()) as pool:
+            with _create_process_pool(self.processes) as pool:
                 args = [
                     (
                         scenario,
@@ -990,11 +1122,14 @@ class NewDatabase:
         This method will update the fuels inventories
         with the data from the IAM scenarios.
         """
+
+        self.__check_databases_are_loaded()
+
         print("\n////////////////////////////// FUELS ///////////////////////////////")
 
         # use multiprocessing to speed up the process
         if self.multiprocessing:
-            with ProcessPool(processes=multiprocessing.cpu_count()) as pool:
+            with _create_process_pool(self.processes) as pool:
                 args = [
                     (
                         scenario,
@@ -1023,11 +1158,14 @@ class NewDatabase:
         This method will update the heat inventories
         with the data from the IAM scenarios.
         """
+
+        self.__check_databases_are_loaded()
+
         print("\n////////////////////////////// HEAT ///////////////////////////////")
 
         # use multiprocessing to speed up the process
         if self.multiprocessing:
-            with ProcessPool(processes=multiprocessing.cpu_count()) as pool:
+            with _create_process_pool(self.processes) as pool:
                 args = [
                     (
                         scenario,
@@ -1056,11 +1194,14 @@ class NewDatabase:
         This method will update the cement inventories
         with the data from the IAM scenarios.
         """
+
+        self.__check_databases_are_loaded()
+
         print("\n///////////////////////////// CEMENT //////////////////////////////")
 
         # use multiprocessing to speed up the process
         if self.multiprocessing:
-            with ProcessPool(processes=multiprocessing.cpu_count()) as pool:
+            with _create_process_pool(self.processes) as pool:
                 args = [
                     (
                         scenario,
@@ -1089,11 +1230,14 @@ class NewDatabase:
         This method will update the steel inventories
         with the data from the IAM scenarios.
         """
+
+        self.__check_databases_are_loaded()
+
         print("\n////////////////////////////// STEEL //////////////////////////////")
 
         # use multiprocessing to speed up the process
         if self.multiprocessing:
-            with ProcessPool(processes=multiprocessing.cpu_count()) as pool:
+            with _create_process_pool(self.processes) as pool:
                 args = [
                     (
                         scenario,
@@ -1122,11 +1266,14 @@ class NewDatabase:
         This method will update the cars inventories
         with the data from the IAM scenarios.
         """
+
+        self.__check_databases_are_loaded()
+
         print("\n///////////////////////// PASSENGER CARS ///////////////////////////")
 
         # use multiprocessing to speed up the process
         if self.multiprocessing:
-            with ProcessPool(processes=multiprocessing.cpu_count()) as pool:
+            with _create_process_pool(self.processes) as pool:
                 args = [
                     (
                         scenario,
@@ -1157,11 +1304,14 @@ class NewDatabase:
         This method will update the two-wheelers inventories
         with the data from the IAM scenarios.
         """
+
+        self.__check_databases_are_loaded()
+
         print("\n////////////////////////// TWO-WHEELERS ////////////////////////////")
 
         # use multiprocessing to speed up the process
         if self.multiprocessing:
-            with ProcessPool(processes=multiprocessing.cpu_count()) as pool:
+            with _create_process_pool(self.processes) as pool:
                 args = [
                     (
                         scenario,
@@ -1193,6 +1343,8 @@ class NewDatabase:
         with the data from the IAM scenarios.
         """
 
+        self.__check_databases_are_loaded()
+
         print("\n////////////////// MEDIUM AND HEAVY DUTY TRUCKS ////////////////////")
 
         args = [
@@ -1207,7 +1359,7 @@ class NewDatabase:
 
         # use multiprocessing to speed up the process
         if self.multiprocessing:
-            with ProcessPool(processes=multiprocessing.cpu_count()) as pool:
+            with _create_process_pool(self.processes) as pool:
                 results = pool.starmap(_update_vehicles, args)
 
             for s, scenario in enumerate(self.scenarios):
@@ -1230,11 +1382,13 @@ class NewDatabase:
         with the data from the IAM scenarios.
         """
 
+        self.__check_databases_are_loaded()
+
         print("\n////////////////////////////// BUSES ///////////////////////////////")
 
         # use multiprocessing to speed up the process
         if self.multiprocessing:
-            with ProcessPool(processes=multiprocessing.cpu_count()) as pool:
+            with _create_process_pool(self.processes) as pool:
                 args = [
                     (
                         scenario,
@@ -1261,6 +1415,8 @@ class NewDatabase:
         print("Done!\n")
 
     def update_external_scenario(self):
+        self.__check_databases_are_loaded()
+
         if self.datapackages:
             for i, scenario in enumerate(self.scenarios):
                 for d, datapackage in enumerate(self.datapackages):
@@ -1269,8 +1425,7 @@ class NewDatabase:
                     else:
                         inventories = []
 
-                    resource = datapackage.get_resource("config")
-                    config_file = yaml.safe_load(resource.raw_read())
+                    config_file = get_datapackage_config(datapackage)
 
                     checked_inventories, checked_database = check_inventories(
                         config_file,
@@ -1296,6 +1451,7 @@ class NewDatabase:
                 external_scenario.create_custom_markets()
                 external_scenario.relink_datasets()
                 scenario["database"] = external_scenario.database
+                add_to_change_log(scenario, external_scenario.change_log)
             print(f"Log file of exchanges saved under {DATA_DIR / 'logs'}.")
 
         print("Done!\n")
@@ -1306,11 +1462,13 @@ class NewDatabase:
         with the data from the GAINS model.
         """
 
+        self.__check_databases_are_loaded()
+
         print("\n/////////////////////////// EMISSIONS //////////////////////////////")
 
         # use multiprocessing to speed up the process
         if self.multiprocessing:
-            with ProcessPool(processes=multiprocessing.cpu_count()) as pool:
+            with _create_process_pool(self.processes) as pool:
                 args = [
                     (
                         scenario,
@@ -1341,6 +1499,8 @@ class NewDatabase:
         Shortcut method to execute all transformation functions.
         """
 
+        self.__check_databases_are_loaded()
+
         print("`update_all()` will skip the following steps:")
         print("update_two_wheelers(), update_cars(), and update_buses()")
         print(
@@ -1350,7 +1510,7 @@ class NewDatabase:
 
         # use multiprocessing to speed up the process
         if self.multiprocessing:
-            with ProcessPool(processes=multiprocessing.cpu_count()) as pool:
+            with _create_process_pool(self.processes) as pool:
                 args = [
                     (
                         scenario,
@@ -1395,6 +1555,8 @@ class NewDatabase:
         :return: filepath of the "scenarios difference file"
         """
 
+        self.__check_databases_are_loaded()
+
         if len(self.scenarios) < 2:
             raise ValueError(
                 "At least two scenarios are needed to"
@@ -1422,6 +1584,7 @@ class NewDatabase:
             version=self.version,
             format=format,
             scenario_list=list_scenarios,
+            processes=self.processes,
         )
 
         write_brightway_database(
@@ -1443,6 +1606,8 @@ class NewDatabase:
         :type name: str
         """
 
+        self.__check_databases_are_loaded()
+
         if name:
             if isinstance(name, str):
                 name = [name]
@@ -1506,6 +1671,8 @@ class NewDatabase:
 
         """
 
+        self.__check_databases_are_loaded()
+
         if filepath is not None:
             if isinstance(filepath, str):
                 filepath = [
@@ -1532,7 +1699,7 @@ class NewDatabase:
         # use multiprocessing to speed up the process
 
         if self.multiprocessing:
-            with ProcessPool(processes=multiprocessing.cpu_count()) as pool:
+            with _create_process_pool(self.processes) as pool:
                 args = [
                     (scenario, "database", self.database, self.keep_uncertainty_data)
                     for scenario in self.scenarios
@@ -1542,7 +1709,7 @@ class NewDatabase:
             for s, scenario in enumerate(self.scenarios):
                 self.scenarios[s] = results[s]
 
-            with ProcessPool(processes=multiprocessing.cpu_count()) as pool:
+            with _create_process_pool(self.processes) as pool:
                 args = [
                     Export(scenario, filepath[scen], self.version)
                     for scen, scenario in enumerate(self.scenarios)
@@ -1574,6 +1741,8 @@ class NewDatabase:
 
         """
 
+        self.__check_databases_are_loaded()
+
         filepath = filepath or Path(Path.cwd() / "export" / "simapro")
 
         if not os.path.exists(filepath):
@@ -1608,6 +1777,8 @@ class NewDatabase:
 
         """
 
+        self.__check_databases_are_loaded()
+
         filepath = filepath or Path(Path.cwd() / "export" / "olca")
 
         if not os.path.exists(filepath):
@@ -1634,6 +1805,8 @@ class NewDatabase:
         self.generate_change_report()
 
     def write_datapackage(self, name: str = f"datapackage_{date.today()}"):
+        self.__check_databases_are_loaded()
+
         if not isinstance(name, str):
             raise TypeError("`name` should be a string.")
 
@@ -1664,6 +1837,7 @@ class NewDatabase:
             db_name=name,
             version=self.version,
             scenario_list=list_scenarios,
+            processes=self.processes,
         )
 
         cached_inventories.extend(extra_inventories)
@@ -1683,13 +1857,177 @@ class NewDatabase:
         # generate change report from logs
         self.generate_change_report()
 
+    def sweep(
+        self,
+        transformations: List[str] = None,
+        exports: List[str] = None,
+        filepath: str = None,
+        superstructure_name: str = f"super_db_{date.today()}",
+        format: str = "excel",
+    ) -> None:
+        """
+        Transform, validate and export the scenarios `chunk_size` at a time,
+        so that no more than `chunk_size` scenario databases are held in memory.
+        The databases of a chunk are exported and freed before the next
+        chunk is loaded. For a superstructure database, the changes made
+        by each scenario to the source database are written to a temporary
+        directory, and merged once all the chunks are processed.
+        :param transformations: names of the `update_*` methods to run on each chunk.
+            Defaults to `["update_all"]`.
+        :param exports: list of exports, among "brightway", "matrices" and "superstructure".
+            Defaults to `["superstructure"]`.
+        :param filepath: directory under which the matrices
+            and the scenario difference file are saved
+        :param superstructure_name: name of the superstructure database
+        :param format: format of the scenario difference file. Can be "excel", "csv" or "feather".
+        """
+
+        transformations = transformations or ["update_all"]
+        exports = exports or ["superstructure"]
+
+        for transformation in transformations:
+            if not transformation.startswith("update_") or not hasattr(
+                self, transformation
+            ):
+                raise ValueError(f"Unknown transformation {transformation}.")
+
+        for export in exports:
+            if export not in ("brightway", "matrices", "superstructure"):
+                raise ValueError(
+                    f"Unknown export {export}. "
+                    "Must be one of 'brightway', 'matrices' or 'superstructure'."
+                )
+
+        if "superstructure" in exports and len(self.scenarios) < 2:
+            raise ValueError(
+                "At least two scenarios are needed to"
+                "create a super-structure database."
+            )
+
+        scenarios = self.scenarios
+        chunk_size = self.chunk_size or len(scenarios)
+
+        with tempfile.TemporaryDirectory() as directory:
+            if "superstructure" in exports:
+                # scenario databases are compared to the source database
+                # once both are validated, so that the datasets the validation
+                # fixes or removes are not mistaken for scenario changes
+                reference = prepare_original_db_for_export(
+                    self.database,
+                    name=superstructure_name,
+                    model=scenarios[0]["model"],
+                    keep_uncertainty_data=self.keep_uncertainty_data,
+                )
+                scenario_exchanges = ScenarioExchanges(
+                    reference, directory=Path(directory)
+                )
+
+            try:
+                for start in range(0, len(scenarios), chunk_size):
+                    print(
+                        f"\n//////////////////// SCENARIOS {start + 1} TO "
+                        f"{min(start + chunk_size, len(scenarios))} OF {len(scenarios)} "
+                        f"////////////////////"
+                    )
+
+                    self.scenarios = scenarios[start : start + chunk_size]
+
+                    if self.chunk_size is not None:
+                        self.__load_scenarios(self.scenarios)
+
+                    for transformation in transformations:
+                        getattr(self, transformation)()
+
+                    for scenario in self.scenarios:
+                        name = eidb_label(
+                            scenario["model"],
+                            scenario["pathway"],
+                            scenario["year"],
+                            version=self.version,
+                            system_model=self.system_model,
+                        )
+
+                        if "brightway" in exports:
+                            db_name = name
+                        elif "superstructure" in exports:
+                            db_name = superstructure_name
+                        else:
+                            db_name = "database"
+
+                        _prepare_database(
+                            scenario=scenario,
+                            db_name=db_name,
+                            original_database=self.database,
+                            keep_uncertainty_data=self.keep_uncertainty_data,
+                        )
+
+                        if "superstructure" in exports:
+                            # only the changes to the source database are collected
+                            scenario_exchanges.add_delta(
+                                ScenarioDelta.from_databases(
+                                    reference, scenario["database"]
+                                )
+                            )
+
+                        if "brightway" in exports:
+                            write_brightway_database(scenario["database"], name)
+
+                        if "matrices" in exports:
+                            Export(
+                                scenario,
+                                Path(filepath or Path.cwd() / "export")
+                                / scenario["model"]
+                                / scenario["pathway"]
+                                / str(scenario["year"]),
+                                self.version,
+                            ).export_db_to_matrices()
+
+                        # the IAM data and the change log are kept for the reports
+                        del scenario["database"]
+
+                    scenarios[start : start + chunk_size] = self.scenarios
+                    gc.collect()
+            finally:
+                # the scenarios are restored even if a chunk fails
+                self.scenarios = scenarios
+
+            if "superstructure" in exports:
+                self.database = generate_superstructure_db(
+                    origin_db=self.database,
+                    scenarios=None,
+                    db_name=superstructure_name,
+                    filepath=filepath,
+                    version=self.version,
+                    format=format,
+                    scenario_list=create_scenario_list(
+                        self.scenarios, self.datapackages
+                    ),
+                    scenario_exchanges=scenario_exchanges,
+                    processes=self.processes,
+                )
+
+                write_brightway_database(
+                    data=self.database,
+                    name=superstructure_name,
+                )
+
+        # generate scenario report
+        self.generate_scenario_report()
+        # generate change report from logs
+        self.generate_change_report()
+
     def generate_scenario_report(
         self,
         filepath: [str, Path] = None,
         name: str = f"scenario_report_{date.today()}.xlsx",
+        fmt: str = None,
     ):
         """
         Generate a report of the scenarios.
+        :param filepath: directory to save the report in
+        :param name: name of the Excel report
+        :param fmt: if "parquet" or "csv", the report data is also saved
+            as a table in this format
         """
 
         print("Generate scenario report.")
@@ -1707,7 +2045,7 @@ class NewDatabase:
         if name.suffix != ".xlsx":
             name = name.with_suffix(".xlsx")
 
-        generate_summary_report(self.scenarios, filepath / name)
+        generate_summary_report(self.scenarios, filepath / name, fmt=fmt)
 
         print(f"Report saved under {filepath}.")
 
@@ -1717,8 +2055,54 @@ class NewDatabase:
         """
 
         print("Generate change report.")
+        change_log = ChangeLog()
+        change_log.extend(
+            *[
+                scenario["change log"]
+                for scenario in self.scenarios
+                if "change log" in scenario
+            ]
+        )
         generate_change_report(
-            self.source, self.version, self.source_type, self.system_model
+            self.source, self.version, self.source_type, self.system_model, change_log
         )
         # saved under working directory
         print(f"Report saved under {os.getcwd()}.")
+
+    def quick_lcia(
+        self,
+        activities: List[tuple],
+        methods: Union[List[tuple], Dict[str, dict]],
+    ) -> pd.DataFrame:
+        """
+        Calculate impact scores of activities, directly from the scenario
+        databases in memory, to quickly check the transformations
+        without writing the databases to Brightway.
+        :param activities: list of (name, reference product) or
+            (name, reference product, location). Without location,
+            the activity is assessed in all its locations.
+        :param methods: list of Brightway methods, or dictionary with method names
+            as keys and characterization factors as values, with
+            (name, compartment, subcompartment, unit) of biosphere flows as keys
+        :return: dataframe with one row per scenario and activity,
+            and one column per method
+        """
+
+        scenarios = [scenario for scenario in self.scenarios if "database" in scenario]
+
+        if not scenarios:
+            raise ValueError(
+                "None of the scenarios has a database in memory: "
+                "their databases are freed once exported by `sweep()`, "
+                "and only loaded by `sweep()` if `chunk_size` is set."
+            )
+
+        print("Calculate impact scores.")
+
+        return pd.concat(
+            [
+                quick_lcia(scenario, activities, methods, self.version)
+                for scenario in scenarios
+            ],
+            ignore_index=True,
+        )
@@ -19,7 +19,7 @@ import yaml
 from .data_collection import get_delimiter
 from .export import biosphere_flows_dictionary
 from .filesystem_constants import DATA_DIR, VARIABLES_DIR
-from .logger import create_logger
+from .logger import add_to_change_log
 from .transformation import (
     BaseTransformation,
     Dict,
@@ -27,11 +27,11 @@ from .transformation import (
     InventorySet,
     List,
     Tuple,
-    get_suppliers_of_a_region,
     np,
     rescale_exchanges,
     uuid,
     ws,
+    xr,
 )
 from .utils import get_efficiency_solar_photovoltaics
 from .validation import ElectricityValidation
@@ -39,8 +39,6 @@ from .validation import ElectricityValidation
 LOSS_PER_COUNTRY = DATA_DIR / "electricity" / "losses_per_country.csv"
 POWERPLANT_TECHS = VARIABLES_DIR / "electricity_variables.yaml"
 
-logger = create_logger("electricity")
-
 
 def load_electricity_variables() -> dict:
     """
@@ -214,6 +212,7 @@ def _update_electricity(
     )
 
     validate.run_electricity_checks()
+    add_to_change_log(scenario, electricity.change_log, validate.change_log)
 
     scenario["database"] = electricity.database
     cache = electricity.cache
@@ -354,6 +353,137 @@ class Electricity(BaseTransformation):
             # If not, we allocate an equal share of supply
             return 1 / len(suppliers)
 
+    def get_power_plant_index(self) -> Dict[str, Dict[str, List[Tuple[int, dict]]]]:
+        """
+        Index the electricity-producing datasets listed in `self.powerplant_map`
+        by name and location, in a single pass over the database.
+        :return: dictionary with dataset names as keys and, as values,
+            dictionaries of locations to lists of (position in database, dataset)
+        :rtype: dict
+        """
+
+        names = set().union(*self.powerplant_map.values())
+        index = defaultdict(lambda: defaultdict(list))
+
+        for position, dataset in enumerate(self.database):
+            if (
+                dataset["name"] in names
+                and "electricity" in dataset["reference product"]
+                and dataset["unit"] == "kilowatt hour"
+            ):
+                index[dataset["name"]][dataset["location"]].append((position, dataset))
+
+        return {name: dict(locations) for name, locations in index.items()}
+
+    def find_power_plant_suppliers(
+        self,
+        technology: str,
+        possible_locations: List[List[str]],
+        power_plant_index: Dict[str, Dict[str, List[Tuple[int, dict]]]],
+    ) -> List[Tuple[dict, float]]:
+        """
+        Find the datasets supplying `technology` in the first group of
+        `possible_locations` where any is found, and their production-weighted
+        shares of supply. Suppliers with a share inferior to 0.1% are removed.
+        :param technology: IAM electricity technology
+        :param possible_locations: groups of locations, in order of preference
+        :param power_plant_index: index returned by :meth:`get_power_plant_index`
+        :return: list of (supplier, share) tuples
+        :raises IndexError: if no supplier is found in any group of locations
+        """
+
+        suppliers = []
+        for locations in possible_locations:
+            suppliers = [
+                dataset
+                for _, dataset in sorted(
+                    (
+                        entry
+                        for name in self.powerplant_map[technology]
+                        for location in set(locations)
+                        for entry in power_plant_index.get(name, {}).get(location, [])
+                    ),
+                    key=lambda entry: entry[0],
+                )
+            ]
+            if suppliers:
+                break
+        else:
+            raise IndexError(f"No supplier found for {technology}.")
+
+        suppliers = self.check_for_production_volume(suppliers)
+        tech_suppliers = [
+            (supplier, self.get_production_weighted_share(supplier, suppliers))
+            for supplier in suppliers
+        ]
+
+        # remove suppliers that have a supply share inferior to 0.1%
+        tech_suppliers = [
+            supplier for supplier in tech_suppliers if supplier[1] > 0.001
+        ]
+        # rescale the shares so that they sum to 1
+        total_share = sum(supplier[1] for supplier in tech_suppliers)
+
+        return [(supplier, share / total_share) for supplier, share in tech_suppliers]
+
+    def get_market_periods(self) -> List[int]:
+        """
+        Return the periods, in years, for which electricity markets are created.
+        Consequential databases only receive a market mix for the year `self.year`.
+        :return: list of periods
+        """
+
+        if self.system_model == "consequential":
+            return [
+                0,
+            ]
+
+        return [0, 20, 40, 60]
+
+    def get_regions_with_electricity_supply(self) -> Dict[str, List[str]]:
+        """
+        Return, for each technology of the electricity markets, the IAM regions
+        in which it has a non-zero share in the market mix of at least one period.
+        :return: dictionary with technologies as keys and lists of regions as values
+        """
+
+        in_use = None
+        for mix in self.get_electricity_mixes(self.get_market_periods()).values():
+            in_use = mix > 0 if in_use is None else in_use | (mix > 0)
+
+        in_use = in_use.transpose("variables", "region")
+
+        return {
+            tech: in_use.region.values[in_use.sel(variables=tech).values].tolist()
+            for tech in in_use.variables.values
+        }
+
+    def get_electricity_mixes(self, periods: List[int]) -> dict:
+        """
+        Return the electricity mixes of all IAM regions for each period.
+        `period` is a period of time considered to create time-weighted average mix:
+        when `period` == 0, this is a market mix for the year `self.year`,
+        when `period` == 20, this is the average mix over `self.year` + 20.
+        Averages are computed for all regions at once.
+        :param periods: list of periods, in years
+        :return: dictionary with periods as keys and
+            arrays (region x variables) as values
+        :rtype: dict
+        """
+
+        if self.system_model == "consequential":
+            return {
+                period: self.iam_data.electricity_markets.sel(year=self.year)
+                for period in periods
+            }
+
+        return {
+            period: self.iam_data.get_period_average(
+                "electricity_markets", self.year, period
+            )
+            for period in periods
+        }
+
     def create_new_markets_low_voltage(self) -> None:
         """
         Create low voltage market groups for electricity, by receiving medium voltage market groups as input
@@ -370,10 +500,17 @@ class Electricity(BaseTransformation):
             if "solar pv residential" in tech.lower()
         ]
 
-        # Get the possible names of ecoinvent datasets
-        ecoinvent_technologies = {
-            technology: self.powerplant_map[technology] for technology in technologies
-        }
+        # `period` is a period of time considered to create time-weighted average mix
+        # when `period` == 0, this is a market mix for the year `self.year`
+        # when `period` == 10, this is a market mix for the period `self.year` + 10
+        # this is useful for systems that consume electricity
+        # over a long period of time (e.g., buildings, BEVs, etc.)
+
+        periods = self.get_market_periods()
+
+        electricity_mixes = self.get_electricity_mixes(periods)
+        power_plant_index = self.get_power_plant_index()
+        new_datasets = []
 
         # Loop through IAM regions
         for region in self.regions:
@@ -394,84 +531,39 @@ class Electricity(BaseTransformation):
                 ["CH"],
             ]
 
-            tech_suppliers = defaultdict(list)
-
-            for technology in ecoinvent_technologies:
-                suppliers, counter = [], 0
-
-                while len(suppliers) == 0:
-                    suppliers = list(
-                        get_suppliers_of_a_region(
-                            database=self.database,
-                            locations=possible_locations[counter],
-                            names=ecoinvent_technologies[technology],
-                            reference_prod="electricity",
-                            unit="kilowatt hour",
-                            exact_match=True,
-                        )
-                    )
-                    counter += 1
-
-                suppliers = self.check_for_production_volume(suppliers)
-                for supplier in suppliers:
-                    share = self.get_production_weighted_share(supplier, suppliers)
-                    tech_suppliers[technology].append((supplier, share))
-
-                # remove suppliers that have a supply share inferior to 0.1%
-                tech_suppliers[technology] = [
-                    supplier
-                    for supplier in tech_suppliers[technology]
-                    if supplier[1] > 0.001
-                ]
-                # rescale the shares so that they sum to 1
-                total_share = sum(
-                    [supplier[1] for supplier in tech_suppliers[technology]]
+            tech_suppliers = {
+                technology: self.find_power_plant_suppliers(
+                    technology, possible_locations, power_plant_index
                 )
-                tech_suppliers[technology] = [
-                    (supplier[0], supplier[1] / total_share)
-                    for supplier in tech_suppliers[technology]
-                ]
-
-            # `period` is a period of time considered to create time-weighted average mix
-            # when `period` == 0, this is a market mix for the year `self.year`
-            # when `period` == 10, this is a market mix for the period `self.year` + 10
-            # this is useful for systems that consume electricity
-            # over a long period of time (e.g., buildings, BEVs, etc.)
-
-            if self.system_model == "consequential":
-                periods = [
-                    0,
-                ]
-            else:
-                periods = [0, 20, 40, 60]
+                for technology in technologies
+            }
+
+            # fetch production volume
+            production_volume = self.iam_data.production_volumes.sel(
+                region=region,
+                year=self.year,
+                variables=self.iam_data.electricity_markets.variables.values,
+            ).values.item(0)
+
+            # sulfur hexafluoride and distribution network suppliers
+            sf6_suppliers = self.select_multiple_suppliers(
+                possible_names=("market for sulfur hexafluoride, liquid",),
+                dataset_location=region,
+            )
+            network_suppliers = self.select_multiple_suppliers(
+                possible_names=(
+                    "distribution network construction, electricity, low voltage",
+                ),
+                dataset_location=region,
+            )
 
             for period in periods:
-                if self.system_model == "consequential":
-                    electricity_mix = dict(
-                        zip(
-                            self.iam_data.electricity_markets.variables.values,
-                            self.iam_data.electricity_markets.sel(
-                                region=region, year=self.year
-                            ).values,
-                        )
-                    )
-
-                else:
-                    # Create a time-weighted average mix
-                    electricity_mix = dict(
-                        zip(
-                            self.iam_data.electricity_markets.variables.values,
-                            self.iam_data.electricity_markets.sel(
-                                region=region,
-                            )
-                            .interp(
-                                year=np.arange(self.year, self.year + period + 1),
-                                kwargs={"fill_value": "extrapolate"},
-                            )
-                            .mean(dim="year")
-                            .values,
-                        )
+                electricity_mix = dict(
+                    zip(
+                        self.iam_data.electricity_markets.variables.values,
+                        electricity_mixes[period].sel(region=region).values,
                     )
+                )
 
                 # Create an empty dataset
                 new_dataset = {
@@ -485,13 +577,6 @@ class Electricity(BaseTransformation):
                     f" using the pathway {self.scenario} for the year {self.year}.",
                 }
 
-                # fetch production volume
-                production_volume = self.iam_data.production_volumes.sel(
-                    region=region,
-                    year=self.year,
-                    variables=self.iam_data.electricity_markets.variables.values,
-                ).values.item(0)
-
                 # First, add the reference product exchange
                 new_exchanges = [
                     {
@@ -519,10 +604,6 @@ class Electricity(BaseTransformation):
                 # Second, add an input of sulfur hexafluoride (SF6) emission to compensate the transformer's leakage
                 # And an emission of a corresponding amount
                 # Third, transmission line and SF6 supply and emission
-                possible_suppliers = self.select_multiple_suppliers(
-                    possible_names=("market for sulfur hexafluoride, liquid",),
-                    dataset_location=region,
-                )
                 new_exchanges.extend(
                     [
                         {
@@ -535,7 +616,7 @@ class Electricity(BaseTransformation):
                             "unit": supplier[-1],
                             "location": supplier[1],
                         }
-                        for supplier, share in possible_suppliers.items()
+                        for supplier, share in sf6_suppliers.items()
                     ]
                 )
                 new_exchanges.append(
@@ -561,12 +642,6 @@ class Electricity(BaseTransformation):
                     },
                 )
 
-                possible_suppliers = self.select_multiple_suppliers(
-                    possible_names=(
-                        "distribution network construction, electricity, low voltage",
-                    ),
-                    dataset_location=region,
-                )
                 new_exchanges.extend(
                     [
                         {
@@ -579,7 +654,7 @@ class Electricity(BaseTransformation):
                             "unit": supplier[-1],
                             "location": supplier[1],
                         }
-                        for supplier, share in possible_suppliers.items()
+                        for supplier, share in network_suppliers.items()
                     ]
                 )
 
@@ -653,9 +728,12 @@ class Electricity(BaseTransformation):
                         "renewable share": solar_amount / (1 + distr_loss),
                     }
                 )
-                self.database.append(new_dataset)
-                self.write_log(new_dataset)
-                self.add_to_index(new_dataset)
+                new_datasets.append(new_dataset)
+
+        self.database.extend(new_datasets)
+        for new_dataset in new_datasets:
+            self.write_log(new_dataset)
+            self.add_to_index(new_dataset)
 
         for period in periods:
             new_world_dataset = self.generate_world_market(
@@ -672,7 +750,15 @@ class Electricity(BaseTransformation):
         Does not return anything. Modifies the database in place.
         """
 
-        log_created_markets = []
+        # `period` is a period of time considered to create time-weighted average mix
+        # when `period` == 0, this is a market mix for the year `self.year`
+        # when `period` == 10, this is a market mix for the period `self.year` + 10
+        # this is useful for systems that consume electricity
+        # over a long period of time (e.g., buildings, BEVs, etc.)
+
+        periods = self.get_market_periods()
+
+        new_datasets = []
 
         for region in self.regions:
             if region == "World":
@@ -681,18 +767,24 @@ class Electricity(BaseTransformation):
             transf_loss = self.network_loss[region]["medium"]["transf_loss"]
             distr_loss = self.network_loss[region]["medium"]["distr_loss"]
 
-            # `period` is a period of time considered to create time-weighted average mix
-            # when `period` == 0, this is a market mix for the year `self.year`
-            # when `period` == 10, this is a market mix for the period `self.year` + 10
-            # this is useful for systems that consume electricity
-            # over a long period of time (e.g., buildings, BEVs, etc.)
-
-            if self.system_model == "consequential":
-                periods = [
-                    0,
-                ]
-            else:
-                periods = [0, 20, 40, 60]
+            # fetch production volume
+            production_volume = self.iam_data.production_volumes.sel(
+                region=region,
+                year=self.year,
+                variables=self.iam_data.electricity_markets.variables.values,
+            ).values.item(0)
+
+            # sulfur hexafluoride and transmission network suppliers
+            sf6_suppliers = self.select_multiple_suppliers(
+                possible_names=("market for sulfur hexafluoride, liquid",),
+                dataset_location=region,
+            )
+            network_suppliers = self.select_multiple_suppliers(
+                possible_names=(
+                    "transmission network construction, electricity, medium voltage",
+                ),
+                dataset_location=region,
+            )
 
             for period in periods:
                 # Create an empty dataset
@@ -707,13 +799,6 @@ class Electricity(BaseTransformation):
                     f" using the pathway {self.scenario} for the year {self.year}.",
                 }
 
-                # fetch production volume
-                production_volume = self.iam_data.production_volumes.sel(
-                    region=region,
-                    year=self.year,
-                    variables=self.iam_data.electricity_markets.variables.values,
-                ).values.item(0)
-
                 # First, add the reference product exchange
                 new_exchanges = [
                     {
@@ -775,10 +860,6 @@ class Electricity(BaseTransformation):
                 # Third, add an input to of sulfur hexafluoride emission to compensate the transformer's leakage
                 # And an emission of a corresponding amount
 
-                possible_suppliers = self.select_multiple_suppliers(
-                    possible_names=("market for sulfur hexafluoride, liquid",),
-                    dataset_location=region,
-                )
                 new_exchanges.extend(
                     [
                         {
@@ -791,7 +872,7 @@ class Electricity(BaseTransformation):
                             "unit": supplier[-1],
                             "location": supplier[1],
                         }
-                        for supplier, share in possible_suppliers.items()
+                        for supplier, share in sf6_suppliers.items()
                     ]
                 )
                 new_exchanges.append(
@@ -818,12 +899,6 @@ class Electricity(BaseTransformation):
                 )
 
                 # Fourth, transmission line
-                possible_suppliers = self.select_multiple_suppliers(
-                    possible_names=(
-                        "transmission network construction, electricity, medium voltage",
-                    ),
-                    dataset_location=region,
-                )
                 new_exchanges.extend(
                     [
                         {
@@ -836,7 +911,7 @@ class Electricity(BaseTransformation):
                             "unit": supplier[-1],
                             "location": supplier[1],
                         }
-                        for supplier, share in possible_suppliers.items()
+                        for supplier, share in network_suppliers.items()
                     ]
                 )
 
@@ -853,11 +928,12 @@ class Electricity(BaseTransformation):
                     }
                 )
 
-                self.database.append(new_dataset)
-
-                self.write_log(new_dataset)
+                new_datasets.append(new_dataset)
 
-                self.add_to_index(new_dataset)
+        self.database.extend(new_datasets)
+        for new_dataset in new_datasets:
+            self.write_log(new_dataset)
+            self.add_to_index(new_dataset)
 
         for period in periods:
             new_world_dataset = self.generate_world_market(
@@ -880,10 +956,11 @@ class Electricity(BaseTransformation):
             if "solar pv residential" not in tech.lower()
         ]
 
-        # Get the possible names of ecoinvent datasets
-        ecoinvent_technologies = {
-            technology: self.powerplant_map[technology] for technology in technologies
-        }
+        periods = self.get_market_periods()
+
+        electricity_mixes = self.get_electricity_mixes(periods)
+        power_plant_index = self.get_power_plant_index()
+        new_datasets = []
 
         for region in self.regions:
             if region == "World":
@@ -909,86 +986,36 @@ class Electricity(BaseTransformation):
 
             tech_suppliers = defaultdict(list)
 
-            for technology in ecoinvent_technologies:
-                suppliers, counter = [], 0
-
+            for technology in technologies:
                 try:
-                    while len(suppliers) == 0:
-                        suppliers = list(
-                            get_suppliers_of_a_region(
-                                database=self.database,
-                                locations=possible_locations[counter],
-                                names=ecoinvent_technologies[technology],
-                                reference_prod="electricity",
-                                unit="kilowatt hour",
-                                exact_match=True,
-                            )
-                        )
-                        counter += 1
-
-                    suppliers = self.check_for_production_volume(suppliers)
-
-                    for supplier in suppliers:
-                        share = self.get_production_weighted_share(supplier, suppliers)
-                        tech_suppliers[technology].append((supplier, share))
-
-                    # remove suppliers that have a supply share inferior to 0.1%
-                    tech_suppliers[technology] = [
-                        supplier
-                        for supplier in tech_suppliers[technology]
-                        if supplier[1] > 0.001
-                    ]
-                    # rescale the shares so that they sum to 1
-                    total_share = sum(
-                        [supplier[1] for supplier in tech_suppliers[technology]]
+                    tech_suppliers[technology] = self.find_power_plant_suppliers(
+                        technology, possible_locations, power_plant_index
                     )
-                    tech_suppliers[technology] = [
-                        (supplier[0], supplier[1] / total_share)
-                        for supplier in tech_suppliers[technology]
-                    ]
 
                 except IndexError:
                     if self.system_model == "consequential":
                         continue
                     else:
                         raise IndexError(
-                            f"Couldn't find suppliers for {technology} when looking for {ecoinvent_technologies[technology]}."
+                            f"Couldn't find suppliers for {technology} when looking for {self.powerplant_map[technology]}."
                         )
 
-            if self.system_model == "consequential":
-                periods = [
-                    0,
-                ]
-            else:
-                periods = [0, 20, 40, 60]
+            # fetch production volume
+            production_volume = self.iam_data.production_volumes.sel(
+                region=region,
+                year=self.year,
+                variables=self.iam_data.electricity_markets.variables.values,
+            ).values.item(0)
 
             for period in periods:
-                if self.system_model == "consequential":
-                    electricity_mix = dict(
-                        zip(
-                            self.iam_data.electricity_markets.variables.values,
-                            self.iam_data.electricity_markets.sel(
-                                region=region, year=self.year
-                            ).values,
-                        )
-                    )
-
-                else:
-                    electricity_mix = dict(
-                        zip(
-                            self.iam_data.electricity_markets.variables.values,
-                            self.iam_data.electricity_markets.sel(
-                                region=region,
-                            )
-                            .interp(
-                                year=np.arange(self.year, self.year + period + 1),
-                                kwargs={"fill_value": "extrapolate"},
-                            )
-                            .mean(dim="year")
-                            .values,
-                        )
+                electricity_mix = dict(
+                    zip(
+                        self.iam_data.electricity_markets.variables.values,
+                        electricity_mixes[period].sel(region=region).values,
                     )
+                )
 
+                if self.system_model != "consequential":
                     # remove `solar pv residential` from the mix
                     if "Solar PV Residential" in electricity_mix:
                         del electricity_mix["Solar PV Residential"]
@@ -1009,13 +1036,6 @@ class Electricity(BaseTransformation):
                     f" using the pathway {self.scenario} for the year {self.year}.",
                 }
 
-                # fetch production volume
-                production_volume = self.iam_data.production_volumes.sel(
-                    region=region,
-                    year=self.year,
-                    variables=self.iam_data.electricity_markets.variables.values,
-                ).values.item(0)
-
                 # First, add the reference product exchange
                 new_exchanges = [
                     {
@@ -1103,11 +1123,12 @@ class Electricity(BaseTransformation):
                     }
                 )
 
-                self.database.append(new_dataset)
-
-                self.write_log(new_dataset)
+                new_datasets.append(new_dataset)
 
-                self.add_to_index(new_dataset)
+        self.database.extend(new_datasets)
+        for new_dataset in new_datasets:
+            self.write_log(new_dataset)
+            self.add_to_index(new_dataset)
 
         for period in periods:
             new_world_dataset = self.generate_world_market(
@@ -1169,32 +1190,26 @@ class Electricity(BaseTransformation):
         ]
 
         # Calculate share of production volume for each region
+        def get_production_shares() -> xr.DataArray:
+            production_volumes = self.iam_data.production_volumes.sel(
+                variables=self.iam_data.electricity_markets.variables.values
+            ).sum(dim="variables")
+            return production_volumes / production_volumes.sel(
+                region=[x for x in production_volumes.region.values if x != "World"]
+            ).sum(dim="region")
+
+        shares = self.iam_data.get_period_average(
+            "electricity production shares",
+            self.year,
+            period,
+            array=get_production_shares,
+        )
+
         for r in regions:
             if r == "World":
                 continue
 
-            share = (
-                (
-                    self.iam_data.production_volumes.sel(
-                        region=r,
-                        variables=self.iam_data.electricity_markets.variables.values,
-                    ).sum(dim="variables")
-                    / self.iam_data.production_volumes.sel(
-                        region=[
-                            x
-                            for x in self.iam_data.production_volumes.region.values
-                            if x != "World"
-                        ],
-                        variables=self.iam_data.electricity_markets.variables.values,
-                    ).sum(dim=["variables", "region"])
-                )
-                .interp(
-                    year=np.arange(self.year, self.year + period + 1),
-                    kwargs={"fill_value": "extrapolate"},
-                )
-                .mean(dim="year")
-                .values
-            )
+            share = shares.sel(region=r).values
 
             if np.isnan(share):
                 print("Incorrect market share for", dataset["name"], "in", r)
@@ -1402,6 +1417,10 @@ class Electricity(BaseTransformation):
         (mostly European), but are used in many electricity markets
         (non-European). Hence, we create region-specific versions of these datasets,
         to align inputs providers with the geographical scope of the region.
+        Copies of power plants are only created for the regions in which
+        the technology supplies electricity markets over the periods considered.
+        Hydrogen storage and CO2 capture and storage datasets, which are also
+        used by other sectors, are created for all regions.
 
         """
 
@@ -1463,16 +1482,39 @@ class Electricity(BaseTransformation):
             ]
         )
 
+        # regions in which each power plant is needed by an electricity market.
+        # CO2 capture and storage, as well as hydrogen storage datasets,
+        # are also used by other sectors, and are created for all regions
+        regions_per_dataset = {}
+        if self.iam_data.electricity_markets is not None:
+            regions_per_tech = self.get_regions_with_electricity_supply()
+            for tech in techs:
+                for name in self.powerplant_map.get(tech, []):
+                    regions_per_dataset.setdefault(name, set()).update(
+                        regions_per_tech.get(tech, [])
+                    )
+
         for dataset in ws.get_many(
             self.database,
             ws.either(
                 *[ws.contains("name", name) for name in list_datasets_to_duplicate]
             ),
         ):
+            regions = None
+            if dataset["name"] in regions_per_dataset:
+                regions = [
+                    region
+                    for region in self.regions
+                    if region in regions_per_dataset[dataset["name"]]
+                ]
+                if len(regions) == 0:
+                    continue
+
             new_plants = self.fetch_proxies(
                 name=dataset["name"],
                 ref_prod=dataset["reference product"],
                 production_variable=self.powerplant_map_rev.get(dataset["name"]),
+                regions=regions,
             )
 
             for new_plant in new_plants.values():
@@ -1561,19 +1603,35 @@ class Electricity(BaseTransformation):
             technologies=list(set(eff_labels).intersection(all_techs)),
         )
 
+        # efficiency changes of all technologies in all regions
+        efficiency_changes = self.find_iam_efficiency_changes(
+            data=self.iam_data.electricity_efficiencies,
+            variables=list(technologies_map),
+        )
+        iam_regions = set(
+            self.iam_data.electricity_efficiencies.coords["region"].values
+        )
+
+        # gather power plant datasets in a single pass
+        power_plants = defaultdict(list)
+        names = set().union(
+            *[v["technology filters"] for v in technologies_map.values()]
+        )
+        for position, dataset in enumerate(self.database):
+            if dataset["unit"] == "kilowatt hour" and dataset["name"] in names:
+                power_plants[dataset["name"]].append((position, dataset))
+
         for technology in technologies_map:
             dict_technology = technologies_map[technology]
             # print("Rescale inventories and emissions for", technology)
 
-            for dataset in ws.get_many(
-                self.database,
-                ws.equals("unit", "kilowatt hour"),
-                ws.either(
-                    *[
-                        ws.equals("name", n)
-                        for n in dict_technology["technology filters"]
-                    ]
+            for _, dataset in sorted(
+                (
+                    entry
+                    for name in dict_technology["technology filters"]
+                    for entry in power_plants[name]
                 ),
+                key=lambda entry: entry[0],
             ):
                 if not self.is_in_index(dataset):
                     continue
@@ -1588,17 +1646,10 @@ class Electricity(BaseTransformation):
                     iam_location = self.geo.ecoinvent_to_iam_location(
                         dataset["location"]
                     )
-                    if (
-                        iam_location
-                        in self.iam_data.electricity_efficiencies.coords[
-                            "region"
-                        ].values
-                    ):
+                    if iam_location in iam_regions:
                         # Find relative efficiency change indicated by the IAM
-                        scaling_factor = 1 / self.find_iam_efficiency_change(
-                            data=self.iam_data.electricity_efficiencies,
-                            variable=technology,
-                            location=iam_location,
+                        scaling_factor = (
+                            1 / efficiency_changes[(technology, iam_location)]
                         )
 
                         new_efficiency = float(
@@ -1615,13 +1666,12 @@ class Electricity(BaseTransformation):
                         scaling_factor = 1
 
                 else:
-                    new_efficiency = self.find_iam_efficiency_change(
-                        data=self.iam_data.electricity_efficiencies,
-                        variable=technology,
-                        location=self.geo.ecoinvent_to_iam_location(
-                            dataset["location"]
-                        ),
-                    )
+                    new_efficiency = efficiency_changes[
+                        (
+                            technology,
+                            self.geo.ecoinvent_to_iam_location(dataset["location"]),
+                        )
+                    ]
 
                     # if ei_eff is different from 1 and if the new efficiency
                     # is not NaN or zero, we can rescale the exchanges
@@ -1697,28 +1747,32 @@ class Electricity(BaseTransformation):
                     ws.doesnt_contain_any("name", ["mine", "critical"]),
                 )
 
+                countries = {key[0] for key in self.iam_data.coal_power_plant_factors}
+
                 for dataset in datasets:
                     loc = dataset["location"][:2]
-                    if loc in self.iam_data.coal_power_plants.country.values:
+                    if loc in countries:
                         # Find current efficiency
                         ei_eff = self.find_fuel_efficiency(
                             dataset, self.powerplant_fuels_map[tech], 3.6
                         )
 
-                        new_eff = self.iam_data.coal_power_plants.sel(
-                            country=loc,
-                            fuel="Anthracite coal"
+                        fuel = (
+                            "Anthracite coal"
                             if "hard coal" in dataset["name"]
-                            else "Lignite coal",
-                            CHP=True if "co-generation" in dataset["name"] else False,
-                            variable="efficiency",
+                            else "Lignite coal"
+                        )
+                        factors = self.iam_data.coal_power_plant_factors.get(
+                            (loc, fuel, "co-generation" in dataset["name"]), {}
                         )
 
-                        if not np.isnan(new_eff.values.item(0)):
+                        new_eff = factors.get("efficiency", np.nan)
+
+                        if not np.isnan(new_eff):
                             # Rescale all the exchanges except for a few biosphere exchanges
                             rescale_exchanges(
                                 dataset,
-                                ei_eff / new_eff.values.item(0),
+                                ei_eff / new_eff,
                                 remove_uncertainty=False,
                                 biosphere_filters=[
                                     ws.doesnt_contain_any(
@@ -1733,45 +1787,21 @@ class Electricity(BaseTransformation):
                             dataset["log parameters"].update(
                                 {
                                     f"ecoinvent original efficiency": ei_eff,
-                                    f"Oberschelp et al. efficiency": new_eff.values.item(
-                                        0
-                                    ),
-                                    f"efficiency change": ei_eff
-                                    / new_eff.values.item(0),
+                                    f"Oberschelp et al. efficiency": new_eff,
+                                    f"efficiency change": ei_eff / new_eff,
                                 }
                             )
 
                             self.update_ecoinvent_efficiency_parameter(
-                                dataset, ei_eff, new_eff.values.item(0)
+                                dataset, ei_eff, new_eff
                             )
 
                         for substance in substances:
                             species, flow = substance
 
-                            emission_factor = self.iam_data.coal_power_plants.sel(
-                                country=loc,
-                                fuel="Anthracite coal"
-                                if "hard coal" in dataset["name"]
-                                else "Lignite coal",
-                                CHP=True
-                                if "co-generation" in dataset["name"]
-                                else False,
-                                variable=species,
-                            ) / (
-                                self.iam_data.coal_power_plants.sel(
-                                    country=loc,
-                                    fuel="Anthracite coal"
-                                    if "hard coal" in dataset["name"]
-                                    else "Lignite coal",
-                                    CHP=True
-                                    if "co-generation" in dataset["name"]
-                                    else False,
-                                    variable="generation",
-                                )
-                                * 1e3
-                            )
+                            emission_factor = factors.get(species, np.nan)
 
-                            if not np.isnan(emission_factor.values.item(0)):
+                            if not np.isnan(emission_factor):
                                 for exc in ws.biosphere(dataset):
                                     if (
                                         exc["name"] == flow
@@ -1783,13 +1813,8 @@ class Electricity(BaseTransformation):
                                         )[0]
                                         == "air"
                                     ):
-                                        scaling_factor = (
-                                            emission_factor.values.item(0)
-                                            / exc["amount"]
-                                        )
-                                        exc["amount"] = float(
-                                            emission_factor.values.item(0)
-                                        )
+                                        scaling_factor = emission_factor / exc["amount"]
+                                        exc["amount"] = float(emission_factor)
 
                                         if "log parameters" not in dataset:
                                             dataset["log parameters"] = {}
@@ -1979,25 +2004,28 @@ class Electricity(BaseTransformation):
 
     def write_log(self, dataset, status="created"):
         """
-        Write log file.
+        Record a change made to a dataset in the change log.
         """
 
-        logger.info(
-            f"{status}|{self.model}|{self.scenario}|{self.year}|"
-            f"{dataset['name']}|{dataset['location']}|"
-            f"{dataset.get('log parameters', {}).get('old efficiency', '')}|"
-            f"{dataset.get('log parameters', {}).get('new efficiency', '')}|"
-            f"{dataset.get('log parameters', {}).get('transformation loss', '')}|"
-            f"{dataset.get('log parameters', {}).get('distribution loss', '')}|"
-            f"{dataset.get('log parameters', {}).get('renewable share', '')}|"
-            f"{dataset.get('log parameters', {}).get('ecoinvent original efficiency', '')}|"
-            f"{dataset.get('log parameters', {}).get('Oberschelp et al. efficiency', '')}|"
-            f"{dataset.get('log parameters', {}).get('efficiency change', '')}|"
-            f"{dataset.get('log parameters', {}).get('CO2 scaling factor', '')}|"
-            f"{dataset.get('log parameters', {}).get('SO2 scaling factor', '')}|"
-            f"{dataset.get('log parameters', {}).get('CH4 scaling factor', '')}|"
-            f"{dataset.get('log parameters', {}).get('NOx scaling factor', '')}|"
-            f"{dataset.get('log parameters', {}).get('PM <2.5 scaling factor', '')}|"
-            f"{dataset.get('log parameters', {}).get('PM 10 - 2.5 scaling factor', '')}|"
-            f"{dataset.get('log parameters', {}).get('PM > 10 scaling factor', '')}"
+        self.log_change(
+            "premise_electricity",
+            dataset,
+            status,
+            (
+                "old efficiency",
+                "new efficiency",
+                "transformation loss",
+                "distribution loss",
+                "renewable share",
+                "ecoinvent original efficiency",
+                "Oberschelp et al. efficiency",
+                "efficiency change",
+                "CO2 scaling factor",
+                "SO2 scaling factor",
+                "CH4 scaling factor",
+                "NOx scaling factor",
+                "PM <2.5 scaling factor",
+                "PM 10 - 2.5 scaling factor",
+                "PM > 10 scaling factor",
+            ),
         )
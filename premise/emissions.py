@@ -3,17 +3,15 @@ Integrates projections regarding emissions of hot pollutants
 from GAINS.
 """
 
-from functools import lru_cache
-from typing import Union
+from itertools import product
 
 import numpy as np
 import wurst
 import xarray as xr
 import yaml
-from numpy import ndarray
 
 from .filesystem_constants import DATA_DIR
-from .logger import create_logger
+from .logger import add_to_change_log
 from .transformation import (
     BaseTransformation,
     Dict,
@@ -21,11 +19,9 @@ from .transformation import (
     InventorySet,
     List,
     Set,
-    ws,
+    Tuple,
 )
 
-logger = create_logger("emissions")
-
 EI_POLLUTANTS = DATA_DIR / "GAINS_emission_factors" / "GAINS_ei_pollutants.yaml"
 GAINS_SECTORS = DATA_DIR / "GAINS_emission_factors" / "GAINS_EU_sectors_mapping.yaml"
 
@@ -52,6 +48,7 @@ def _update_emissions(scenario, version, system_model, gains_scenario):
 
     emissions.update_emissions_in_database()
     scenario["database"] = emissions.database
+    add_to_change_log(scenario, emissions.change_log)
 
     return scenario
 
@@ -86,6 +83,8 @@ class Emissions(BaseTransformation):
         self.version = version
         self.gains_EU = self.prepare_data(iam_data.gains_data_EU)
         self.gains_IAM = self.prepare_data(iam_data.gains_data_IAM)
+        self.gains_EU_regions = {region for _, region, _ in self.gains_EU}
+        self.gains_IAM_regions = {region for _, region, _ in self.gains_IAM}
         self.ei_pollutants = fetch_mapping(EI_POLLUTANTS)
         self.gains_pollutant = {v: k for k, v in self.ei_pollutants.items()}
         self.gains_sectors = fetch_mapping(GAINS_SECTORS)
@@ -106,7 +105,14 @@ class Emissions(BaseTransformation):
             for t in self.gains_map_IAM[s]:
                 self.rev_gains_map_IAM[t] = s
 
-    def prepare_data(self, data):
+    def prepare_data(self, data: xr.DataArray) -> Dict[Tuple[str, str, str], float]:
+        """
+        Calculate, for each GAINS sector, region and pollutant,
+        the relative change in emissions compared to 2020.
+
+        :param data: GAINS emissions data
+        :return: a (sector, region, pollutant) to scaling factor dictionary
+        """
         _ = lambda x: xr.where((np.isnan(x)) | (x == 0), 1, x)
 
         data = data.interp(year=[self.year]) / _(
@@ -120,43 +126,57 @@ class Emissions(BaseTransformation):
         # replace 0 values with 1
         data = xr.where((np.isnan(data)) | (data == 0), 1, data)
 
-        return data
+        data = data.sel(year=self.year).clip(
+            1 if self.year < 2020 else 0,
+            1 if self.year > 2020 else 1e6,
+        )
+        data = xr.where((np.isnan(data)) | (data == 0), 1, data)
+        data = data.transpose("sector", "region", "pollutant")
+
+        return {
+            (str(sector), str(region), str(pollutant)): factor
+            for (sector, region, pollutant), factor in zip(
+                product(
+                    data.coords["sector"].values,
+                    data.coords["region"].values,
+                    data.coords["pollutant"].values,
+                ),
+                data.values.ravel().tolist(),
+            )
+        }
 
     def update_emissions_in_database(self):
-        # print("Integrating GAINS EU emission factors.")
+        # print("Integrating GAINS EU and IAM emission factors.")
         for ds in self.database:
             if (
                 ds["name"] in self.rev_gains_map_EU
-                and ds["location"] in self.gains_EU.coords["region"]
+                and ds["location"] in self.gains_EU_regions
             ):
                 gains_sector = self.rev_gains_map_EU[ds["name"]]
                 self.update_pollutant_emissions(
                     ds,
                     gains_sector,
                     model="GAINS-EU",
-                    regions=self.gains_EU.region.values,
+                    regions=self.gains_EU_regions,
                 )
                 self.write_log(ds, status="updated")
 
-        # print("Integrating GAINS IAM emission factors.")
-        for ds in self.database:
             if (
                 ds["name"] in self.rev_gains_map_IAM
-                and self.ecoinvent_to_iam_loc[ds["location"]]
-                in self.gains_IAM.coords["region"]
+                and self.ecoinvent_to_iam_loc[ds["location"]] in self.gains_IAM_regions
             ):
                 gains_sector = self.rev_gains_map_IAM[ds["name"]]
                 self.update_pollutant_emissions(
                     ds,
                     gains_sector,
                     model="GAINS-IAM",
-                    regions=self.gains_IAM.region.values,
+                    regions=self.gains_IAM_regions,
                 )
 
                 self.write_log(ds, status="updated")
 
     def update_pollutant_emissions(
-        self, dataset: dict, sector: str, model: str, regions: list
+        self, dataset: dict, sector: str, model: str, regions: Set[str]
     ) -> dict:
         """
         Update pollutant emissions based on GAINS data.
@@ -165,21 +185,26 @@ class Emissions(BaseTransformation):
 
         :param dataset: dataset to adjust non-CO2 emission for
         :param sector: GAINS industrial sector to look up
+        :param model: GAINS model
+        :param regions: regions covered by the GAINS model
         :return: Does not return anything. Modified in place.
         """
 
+        location = (
+            dataset["location"]
+            if dataset["location"] in regions
+            else self.ecoinvent_to_iam_loc[dataset["location"]]
+        )
+
         # Update biosphere exchanges according to GAINS emission values
-        for exc in ws.biosphere(
-            dataset, ws.either(*[ws.equals("name", x) for x in self.ei_pollutants])
-        ):
+        for exc in dataset["exchanges"]:
+            if exc["type"] != "biosphere" or exc["name"] not in self.ei_pollutants:
+                continue
+
             gains_pollutant = self.ei_pollutants[exc["name"]]
             scaling_factor = self.find_gains_emissions_change(
                 pollutant=gains_pollutant,
-                location=(
-                    dataset["location"]
-                    if dataset["location"] in regions
-                    else self.ecoinvent_to_iam_loc[dataset["location"]]
-                ),
+                location=location,
                 sector=sector,
                 model=model,
             )
@@ -207,10 +232,9 @@ class Emissions(BaseTransformation):
 
         return dataset
 
-    @lru_cache
     def find_gains_emissions_change(
         self, pollutant: str, location: str, sector: str, model: str
-    ) -> Union[ndarray, float]:
+    ) -> float:
         """
         Return the relative change in emissions compared to 2020
         for a given pollutant, location and sector.
@@ -223,56 +247,31 @@ class Emissions(BaseTransformation):
 
         data = self.gains_EU if model == "GAINS-EU" else self.gains_IAM
 
-        key_exists = all(
-            k in data.coords[dim].values
-            for k, dim in zip(
-                [location, pollutant, sector, self.year],
-                ["region", "pollutant", "sector", "year"],
-            )
-        )
-
-        if key_exists:
-            scaling_factor = data.loc[
-                dict(
-                    region=location,
-                    pollutant=pollutant,
-                    sector=sector,
-                )
-            ]
-
-            scaling_factor = np.clip(
-                scaling_factor,
-                1 if self.year < 2020 else 0,
-                1 if self.year > 2020 else 1e6,
-            )
-
-            if np.isnan(scaling_factor) or scaling_factor == 0.0:
-                scaling_factor = 1.0
-
-            return float(scaling_factor)
-        else:
-            return 1.0
+        return data.get((sector, location, pollutant), 1.0)
 
     def write_log(self, dataset, status="created"):
         """
-        Write log file.
+        Record a change made to a dataset in the change log.
         """
 
         if "log parameters" in dataset:
             if "GAINS model" in dataset["log parameters"]:
-                logger.info(
-                    f"{status}|{self.model}|{self.scenario}|{self.year}|"
-                    f"{dataset['name']}|{dataset['location']}|"
-                    f"{dataset.get('log parameters', {}).get('GAINS model', '')}|"
-                    f"{dataset.get('log parameters', {}).get('GAINS sector', '')}|"
-                    f"{dataset.get('log parameters', {}).get('CO scaling factor', '')}|"
-                    f"{dataset.get('log parameters', {}).get('CH4 scaling factor', '')}|"
-                    f"{dataset.get('log parameters', {}).get('N2O scaling factor', '')}|"
-                    f"{dataset.get('log parameters', {}).get('NH3 scaling factor', '')}|"
-                    f"{dataset.get('log parameters', {}).get('NOx scaling factor', '')}|"
-                    f"{dataset.get('log parameters', {}).get('PM1 scaling factor', '')}|"
-                    f"{dataset.get('log parameters', {}).get('PM10 scaling factor', '')}|"
-                    f"{dataset.get('log parameters', {}).get('PM25 scaling factor', '')}|"
-                    f"{dataset.get('log parameters', {}).get('SO2 scaling factor', '')}|"
-                    f"{dataset.get('log parameters', {}).get('VOC scaling factor', '')}"
+                self.log_change(
+                    "premise_emissions",
+                    dataset,
+                    status,
+                    (
+                        "GAINS model",
+                        "GAINS sector",
+                        "CO scaling factor",
+                        "CH4 scaling factor",
+                        "N2O scaling factor",
+                        "NH3 scaling factor",
+                        "NOx scaling factor",
+                        "PM1 scaling factor",
+                        "PM10 scaling factor",
+                        "PM25 scaling factor",
+                        "SO2 scaling factor",
+                        "VOC scaling factor",
+                    ),
                 )
@@ -2,6 +2,7 @@
 export.py contains all the functions to format, prepare and export databases.
 """
 
+import copy
 import csv
 import datetime
 import json
@@ -26,8 +27,10 @@ from scipy import sparse as nsp
 
 from . import __version__
 from .data_collection import get_delimiter
+from .delta import ScenarioDelta, get_dataset_key, get_exchange_key
 from .filesystem_constants import DATA_DIR
 from .inventory_imports import get_correspondence_bio_flows
+from .logger import add_to_change_log, create_logger
 from .transformation import BaseTransformation
 from .utils import reset_all_codes
 from .validation import BaseDatasetValidator
@@ -44,6 +47,8 @@ CORRESPONDENCE_BIO_FLOWS = (
 DIR_DATAPACKAGE = Path.cwd() / "export" / "datapackage"
 DIR_DATAPACKAGE_TEMP = Path.cwd() / "export" / "temp"
 
+logger = create_logger("export")
+
 
 def get_simapro_units() -> Dict[str, str]:
     """
@@ -518,6 +523,7 @@ def generate_scenario_factor_file(
     db_name: str,
     version: str,
     scenario_list: list = None,
+    processes: int = None,
 ):
     """
     Generate a scenario factor file from a list of databases
@@ -526,6 +532,8 @@ def generate_scenario_factor_file(
     :param db_name: the name of the database
     :param version: the version of ecoinvent
     :param scenario_list: a list of external scenarios
+    :param processes: number of threads building the new datasets.
+        Defaults to the number of CPUs.
     """
 
     print("Building scenario factor file...")
@@ -537,6 +545,7 @@ def generate_scenario_factor_file(
         db_name=db_name,
         version=version,
         scenario_list=scenario_list,
+        processes=processes,
     )
 
     original = df["original"]
@@ -586,63 +595,63 @@ def generate_new_activities(args):
     return act
 
 
-def generate_scenario_difference_file(
-    db_name, origin_db, scenarios, version, scenario_list
-) -> tuple[DataFrame, list[dict], set[Any]]:
+class ScenarioExchanges:
     """
-    Generate a scenario difference file for a given list of databases
-    :param db_name: name of the new database
-    :param origin_db: the original database
-    :param scenarios: list of databases
+    Collect the exchanges of the original database and of scenario databases,
+    one database at a time, as coordinates in a matrix of activities.
+    If `directory` is given, the coordinates of each database are written
+    to a file in it, so that scenario databases can be freed once added.
+    This allows building the scenario difference file of more scenarios
+    than can be held in memory at once.
+    Scenarios can also be added as changes to the original database
+    (see `premise.delta.ScenarioDelta`), in which case only the exchanges
+    that changed are collected.
+
+    :ivar acts_ind_rev: index of activities and exchanges
+    :vartype acts_ind_rev: dict
+    :ivar dict_meta: metadata of datasets, other than their exchanges
+    :vartype dict_meta: dict
+
     """
 
-    bio_dict = biosphere_flows_dictionary(version)
+    def __init__(self, origin_db: List[dict], directory: Path = None):
+        self.acts_ind_rev = {}
+        self.dict_meta = defaultdict(dict)
+        self.directory = Path(directory) if directory is not None else None
+        self.exchanges = []
 
-    exc_codes.update(
-        {
-            (a["name"], a["reference product"], a["location"], a["unit"]): a["code"]
-            for a in origin_db
-        }
-    )
-    # Turn list into set for O(1) membership tests
-    list_acts = set(get_list_unique_acts([{"database": origin_db}] + scenarios))
+        # index of the datasets of the original database
+        self.datasets_ind = {}
 
-    acts_ind = dict(enumerate(list_acts))
-    acts_ind_rev = {v: k for k, v in acts_ind.items()}
+        self.add(origin_db)
 
-    list_scenarios = ["original"] + scenario_list
+        for ds in origin_db:
+            self.datasets_ind[get_dataset_key(ds)] = self.get_dataset_index(ds)
 
-    list_dbs = [origin_db] + [a["database"] for a in scenarios]
+    def __len__(self) -> int:
+        return len(self.exchanges)
 
-    matrices = {
-        a: nsp.lil_matrix((len(list_acts), len(list_acts)))
-        for a, _ in enumerate(list_scenarios)
-    }
+    def get_index(self, key: tuple) -> int:
+        """
+        Return the index of an activity or exchange, and add it if new.
+        :param key: (name, product, categories, location, unit, type)
+        :return: index
+        """
 
-    # Use defaultdict to avoid key errors
-    dict_meta = defaultdict(dict)
-
-    for db in list_dbs:
-        for a in db:
-            key = (a["name"], a["reference product"], None, a["location"], a["unit"])
-            dict_meta[key] = {
-                b: c
-                for b, c in a.items()
-                if b
-                not in [
-                    "exchanges",
-                    "code",
-                    "name",
-                    "reference product",
-                    "location",
-                    "unit",
-                    "database",
-                ]
-            }
+        if key not in self.acts_ind_rev:
+            self.acts_ind_rev[key] = len(self.acts_ind_rev)
+
+        return self.acts_ind_rev[key]
+
+    def get_dataset_index(self, ds: dict) -> int:
+        """
+        Return the index of a dataset, and add it if new.
+        :param ds: dataset
+        :return: index
+        """
 
-    for i, db in enumerate(list_dbs):
-        for ds in db:
-            c = (
+        return self.get_index(
+            (
                 ds["name"],
                 ds.get("reference product"),
                 ds.get("categories"),
@@ -650,18 +659,220 @@ def generate_scenario_difference_file(
                 ds["unit"],
                 "production",
             )
+        )
+
+    def add_metadata(self, ds: dict) -> None:
+        """
+        Store the metadata of a dataset.
+        :param ds: dataset
+        """
+
+        key = (
+            ds["name"],
+            ds["reference product"],
+            None,
+            ds["location"],
+            ds["unit"],
+        )
+        self.dict_meta[key] = {
+            b: c
+            for b, c in ds.items()
+            if b
+            not in [
+                "exchanges",
+                "code",
+                "name",
+                "reference product",
+                "location",
+                "unit",
+                "database",
+            ]
+        }
+
+    def store(self, coordinates: Dict[str, np.ndarray]) -> None:
+        """
+        Store the coordinates of a database, in memory or in `directory`.
+        :param coordinates: dictionary of arrays
+        """
+
+        if self.directory is not None:
+            filepath = self.directory / f"exchanges_{len(self.exchanges)}.npz"
+            np.savez(filepath, **coordinates)
+            self.exchanges.append(filepath)
+        else:
+            self.exchanges.append(coordinates)
+
+    def add(self, database: List[dict]) -> None:
+        """
+        Add the exchanges of a database.
+        :param database: database
+        """
+
+        rows, cols, amounts = [], [], []
+
+        for ds in database:
+            self.add_metadata(ds)
+
+            c = self.get_dataset_index(ds)
             for exc in ds["exchanges"]:
-                s = (
-                    exc["name"],
-                    exc.get("product"),
-                    exc.get("categories"),
-                    exc.get("location"),
-                    exc["unit"],
-                    exc["type"],
+                rows.append(self.get_index(get_exchange_key(exc)))
+                cols.append(c)
+                amounts.append(exc["amount"])
+
+        self.store(
+            {
+                "rows": np.array(rows, dtype=np.int64),
+                "cols": np.array(cols, dtype=np.int64),
+                "amounts": np.array(amounts, dtype=np.float64),
+            }
+        )
+
+    def add_delta(self, delta: ScenarioDelta) -> None:
+        """
+        Add a scenario as its changes to the original database.
+        Only the exchanges of the datasets that changed are collected.
+        :param delta: changes to the original database
+        """
+
+        # amounts the exchanges are set to
+        amounts = defaultdict(float)
+
+        for key, changes in delta.modified.items():
+            meta_key = (key[0], key[1], None, key[2], key[3])
+            self.dict_meta[meta_key] = {
+                k: v
+                for k, v in self.dict_meta[meta_key].items()
+                if k not in changes["removed fields"]
+            }
+            self.dict_meta[meta_key].update(
+                {
+                    k: v
+                    for k, v in changes["fields"].items()
+                    if k not in ["code", "database"]
+                }
+            )
+
+            c = self.datasets_ind[key]
+            for exc_key, group in changes["exchanges"].items():
+                amounts[(self.get_index(exc_key), c)] += sum(
+                    exc["amount"] for exc in group
                 )
-                matrices[i][acts_ind_rev[s], acts_ind_rev[c]] += exc["amount"]
 
-    m = sparse.stack([sparse.COO(x) for x in matrices.values()], axis=-1)
+        for ds in delta.added:
+            self.add_metadata(ds)
+
+            c = self.get_dataset_index(ds)
+            for exc in ds["exchanges"]:
+                amounts[(self.get_index(get_exchange_key(exc)), c)] += exc["amount"]
+
+        self.store(
+            {
+                "rows": np.array([r for r, _ in amounts], dtype=np.int64),
+                "cols": np.array([c for _, c in amounts], dtype=np.int64),
+                "amounts": np.array(list(amounts.values()), dtype=np.float64),
+                "removed": np.array(
+                    [self.datasets_ind[key] for key in delta.removed], dtype=np.int64
+                ),
+            }
+        )
+
+    def to_matrices(self) -> sparse.COO:
+        """
+        Stack the exchanges of the databases, in the order they were added.
+        :return: array of shape (activities, activities, databases)
+        """
+
+        size = len(self.acts_ind_rev)
+        matrices = []
+        origin = None
+
+        for coordinates in self.exchanges:
+            if isinstance(coordinates, Path):
+                with np.load(coordinates) as npz:
+                    coordinates = dict(npz)
+
+            if "removed" in coordinates:
+                # columns of removed datasets are emptied,
+                # and changed exchanges are set to their new amount
+                keep = np.ones(size)
+                keep[coordinates["removed"]] = 0
+                matrix = origin @ nsp.diags(keep, format="csr")
+
+                current = np.asarray(
+                    matrix[coordinates["rows"], coordinates["cols"]]
+                ).ravel()
+                matrix = matrix + nsp.csr_matrix(
+                    (
+                        coordinates["amounts"] - current,
+                        (coordinates["rows"], coordinates["cols"]),
+                    ),
+                    shape=(size, size),
+                )
+            else:
+                # duplicate exchanges are summed
+                matrix = nsp.csr_matrix(
+                    (
+                        coordinates["amounts"],
+                        (coordinates["rows"], coordinates["cols"]),
+                    ),
+                    shape=(size, size),
+                )
+
+            matrix.eliminate_zeros()
+
+            if origin is None:
+                origin = matrix
+
+            matrices.append(sparse.COO.from_scipy_sparse(matrix))
+
+        return sparse.stack(matrices, axis=-1)
+
+
+def generate_scenario_difference_file(
+    db_name,
+    origin_db,
+    scenarios,
+    version,
+    scenario_list,
+    scenario_exchanges: ScenarioExchanges = None,
+    processes: int = None,
+) -> tuple[DataFrame, list[dict], set[Any]]:
+    """
+    Generate a scenario difference file for a given list of databases
+    :param db_name: name of the new database
+    :param origin_db: the original database
+    :param scenarios: list of scenarios, with either a `database`
+        or a `delta` (changes to the original database)
+    :param scenario_exchanges: exchanges of the original database and
+        of the scenarios, if already collected. `scenarios` is then ignored.
+    :param processes: number of threads building the new datasets.
+        Defaults to the number of CPUs.
+    """
+
+    bio_dict = biosphere_flows_dictionary(version)
+
+    exc_codes.update(
+        {
+            (a["name"], a["reference product"], a["location"], a["unit"]): a["code"]
+            for a in origin_db
+        }
+    )
+
+    if scenario_exchanges is None:
+        scenario_exchanges = ScenarioExchanges(origin_db)
+        for scenario in scenarios:
+            if "database" in scenario:
+                scenario_exchanges.add(scenario["database"])
+            else:
+                scenario_exchanges.add_delta(scenario["delta"])
+
+    list_acts = set(scenario_exchanges.acts_ind_rev)
+    acts_ind = {v: k for k, v in scenario_exchanges.acts_ind_rev.items()}
+    dict_meta = scenario_exchanges.dict_meta
+
+    list_scenarios = ["original"] + scenario_list
+
+    m = scenario_exchanges.to_matrices()
     inds = sparse.argwhere(m.sum(-1).T != 0)
     inds = list(map(tuple, inds))
 
@@ -671,7 +882,7 @@ def generate_scenario_difference_file(
     for ind in inds:
         inds_d[ind[0]].append(ind[1])
 
-    with Pool(processes=mp.cpu_count()) as pool:
+    with Pool(processes=processes or mp.cpu_count()) as pool:
         new_db = pool.map(
             generate_new_activities,
             [
@@ -817,6 +1028,8 @@ def generate_superstructure_db(
     version,
     scenario_list,
     format="excel",
+    scenario_exchanges: ScenarioExchanges = None,
+    processes: int = None,
 ) -> List[dict]:
     """
     Build a superstructure database from a list of databases
@@ -826,6 +1039,10 @@ def generate_superstructure_db(
     :param filepath: the filepath of the new database
     :param version: the version of the new database
     :param format: the format of the scenario difference file. Can be "excel", "csv" or "feather".
+    :param scenario_exchanges: exchanges of the original database and
+        of the scenarios, if already collected. `scenarios` is then ignored.
+    :param processes: number of threads building the new datasets.
+        Defaults to the number of CPUs.
     :return: a superstructure database
     """
 
@@ -838,6 +1055,8 @@ def generate_superstructure_db(
         db_name=db_name,
         version=version,
         scenario_list=scenario_list,
+        scenario_exchanges=scenario_exchanges,
+        processes=processes,
     )
 
     # remove unneeded columns "to unit"
@@ -910,6 +1129,31 @@ def prepare_db_for_export(
         keep_uncertainty_data=keep_uncertainty_data,
     )
     validator.run_all_checks()
+    add_to_change_log(scenario, validator.change_log)
+
+    return validator.database
+
+
+def prepare_original_db_for_export(
+    original_database, name, model, keep_uncertainty_data=False
+):
+    """
+    Prepare a copy of the original database for export, the way
+    `prepare_db_for_export()` prepares scenario databases, so that
+    the two can be compared. The validation log is discarded.
+    """
+
+    validator = BaseDatasetValidator(
+        model=model,
+        scenario=None,
+        year=None,
+        regions=[],
+        original_database=original_database,
+        database=copy.deepcopy(original_database),
+        db_name=name,
+        keep_uncertainty_data=keep_uncertainty_data,
+    )
+    validator.run_all_checks()
 
     return validator.database
 
@@ -962,13 +1206,22 @@ class Export:
         )
         self.bio_dict = biosphere_flows_dictionary(self.version)
 
-    def create_A_matrix_coordinates(self):
+    def create_A_matrix_coordinates(self, skip_unlinked_exchanges: bool = False):
+        """
+        Return the coordinates of the technosphere matrix,
+        as [index of activity, index of product, value] rows.
+        :param skip_unlinked_exchanges: if True, exchanges that cannot be linked
+            to a dataset are skipped, and their number is logged. Otherwise,
+            the coordinates collected until the first of them are returned.
+        :return: list of rows
+        """
         index_A = create_index_of_A_matrix(self.db)
         list_rows = []
+        unlinked = 0
 
-        try:
-            for ds in self.db:
-                for exc in ds["exchanges"]:
+        for ds in self.db:
+            for exc in ds["exchanges"]:
+                try:
                     if exc["type"] == "production":
                         row = [
                             index_A[
@@ -1011,8 +1264,17 @@ class Export:
                             exc["amount"] * -1,
                         ]
                         list_rows.append(row)
-        except KeyError:
-            print(f"KeyError for {exc} in {ds['name']}")
+                except KeyError:
+                    if not skip_unlinked_exchanges:
+                        print(f"KeyError for {exc} in {ds['name']}")
+                        return list_rows
+                    unlinked += 1
+
+        if unlinked:
+            logger.warning(
+                f"{unlinked} exchange(s) could not be linked to a dataset "
+                "and were left out of the technosphere matrix."
+            )
 
         return list_rows
 
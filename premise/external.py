@@ -1,21 +1,17 @@
 """
 Implements external scenario data.
 """
-import logging
 import uuid
 from collections import defaultdict
-from pathlib import Path
 from typing import List, Union
 
 import numpy as np
 import wurst
 import xarray as xr
-import yaml
 from wurst import searching as ws
 
 from .clean_datasets import get_biosphere_flow_uuid
-from .data_collection import IAMDataCollection
-from .filesystem_constants import DATA_DIR
+from .data_collection import IAMDataCollection, get_datapackage_config
 from .inventory_imports import generate_migration_maps, get_correspondence_bio_flows
 from .transformation import (
     BaseTransformation,
@@ -24,21 +20,6 @@ from .transformation import (
 )
 from .utils import eidb_label
 
-LOG_CONFIG = DATA_DIR / "utils" / "logging" / "logconfig.yaml"
-
-# directory for log files
-DIR_LOGS = Path.cwd() / "export" / "logs"
-# if DIR_LOG_REPORT folder does not exist
-# we create it
-if not Path(DIR_LOGS).exists():
-    Path(DIR_LOGS).mkdir(parents=True, exist_ok=True)
-
-with open(LOG_CONFIG, "r") as f:
-    config = yaml.safe_load(f.read())
-    logging.config.dictConfig(config)
-
-logger = logging.getLogger("external")
-
 
 def get_mapping_between_ei_versions(version_in: str, version_out: str) -> dict:
     mapping = generate_migration_maps(
@@ -387,8 +368,7 @@ class ExternalScenario(BaseTransformation):
                 datapackage_number
             ]["regions"]
             # Open corresponding config file
-            resource = datapackage.get_resource("config")
-            config_file = yaml.safe_load(resource.raw_read())
+            config_file = get_datapackage_config(datapackage)
             ds_names = get_recursively(config_file, "name")
             self.regionalize_inventories(
                 ds_names, external_scenario_regions, datapackage_number
@@ -596,8 +576,7 @@ class ExternalScenario(BaseTransformation):
         # Loop through custom scenarios
         for i, dp in enumerate(self.datapackages):
             # Open corresponding config file
-            resource = dp.get_resource("config")
-            config_file = yaml.safe_load(resource.raw_read())
+            config_file = get_datapackage_config(dp)
 
             # Check if information on market creation is provided
             if "markets" in config_file:
@@ -930,8 +909,7 @@ class ExternalScenario(BaseTransformation):
         # Loop through custom scenarios
         for i, dp in enumerate(self.datapackages):
             # Open corresponding config file
-            resource = dp.get_resource("config")
-            config_file = yaml.safe_load(resource.raw_read())
+            config_file = get_datapackage_config(dp)
 
             # Check if information on market creation is provided
             if "markets" in config_file:
@@ -1349,10 +1327,11 @@ class ExternalScenario(BaseTransformation):
 
     def write_log(self, dataset, status="created"):
         """
-        Write log file.
+        Record a change made to a dataset in the change log.
         """
 
-        logger.info(
-            f"{status}|{self.model}|{self.scenario}|{self.year}|"
-            f"{dataset['name']}|{dataset['location']}"
+        self.log_change(
+            "premise_external_scenarios",
+            dataset,
+            status,
         )
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 import platformdirs
@@ -15,5 +16,19 @@ USER_DATA_BASE_DIR.mkdir(parents=True, exist_ok=True)
 DIR_CACHED_DB = USER_DATA_BASE_DIR / "cache"
 DIR_CACHED_DB.mkdir(parents=True, exist_ok=True)
 
+# cached inventories are keyed on their content,
+# not on the version of premise
+DIR_CACHED_INVENTORIES = DIR_CACHED_DB / "inventories"
+DIR_CACHED_INVENTORIES.mkdir(parents=True, exist_ok=True)
+
+# inventories fetched from remote locations are kept in this folder.
+# If `PREMISE_INVENTORY_MIRROR` points to a folder holding a copy
+# of it, inventories found there are used without network access.
+INVENTORY_MIRROR = os.environ.get("PREMISE_INVENTORY_MIRROR")
+DIR_REMOTE_INVENTORIES = (
+    Path(INVENTORY_MIRROR) if INVENTORY_MIRROR else DIR_CACHED_DB / "remote"
+)
+DIR_REMOTE_INVENTORIES.mkdir(parents=True, exist_ok=True)
+
 USER_LOGS_DIR = platformdirs.user_log_path(appname="premise", appauthor="pylca")
 USER_LOGS_DIR.mkdir(parents=True, exist_ok=True)
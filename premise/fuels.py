@@ -13,7 +13,7 @@ from numpy import ndarray
 
 from .filesystem_constants import DATA_DIR, VARIABLES_DIR
 from .inventory_imports import get_biosphere_code
-from .logger import create_logger
+from .logger import add_to_change_log
 from .transformation import (
     Any,
     BaseTransformation,
@@ -31,8 +31,6 @@ from .transformation import (
 )
 from .utils import get_crops_properties
 
-logger = create_logger("fuel")
-
 REGION_CLIMATE_MAP = VARIABLES_DIR / "iam_region_to_climate.yaml"
 FUEL_LABELS = DATA_DIR / "fuels" / "fuel_labels.csv"
 SUPPLY_CHAIN_SCENARIOS = DATA_DIR / "fuels" / "supply_chain_scenarios.yml"
@@ -230,7 +228,6 @@ def update_co2_emissions(
     return dataset
 
 
-@lru_cache()
 def add_boil_off_losses(vehicle, distance, loss_val):
     if vehicle == "truck":
         # average truck speed
@@ -243,7 +240,6 @@ def add_boil_off_losses(vehicle, distance, loss_val):
     return np.power(1 + loss_val, days)
 
 
-@lru_cache()
 def add_pipeline_losses(distance, loss_val):
     # pipeline losses, function of distance
     return 1 + (loss_val * distance)
@@ -253,6 +249,47 @@ def add_other_losses(loss_val):
     return 1 + loss_val
 
 
+def get_hydrogen_losses(
+    losses: dict, vehicle: str, distances: ndarray
+) -> Tuple[ndarray, List[str]]:
+    """
+    Calculate the hydrogen losses along the supply chain
+    for several transport distances at once.
+
+    :param losses: the loss coefficients for the vehicle and hydrogen state
+    :param vehicle: the type of vehicle used
+    :param distances: the transport distances, in km
+    :return: the total loss factor and its description, for each distance
+
+    """
+    total_loss = np.ones(len(distances))
+    strings = [""] * len(distances)
+
+    for loss, val in losses.items():
+        val = float(val)
+
+        if loss == "boil-off":
+            total_loss = total_loss * add_boil_off_losses(vehicle, distances, val)
+            strings = [
+                f"{string}Boil-off losses: {int((factor - 1) * 100)}%. "
+                for string, factor in zip(strings, total_loss.tolist())
+            ]
+
+        elif loss == "pipeline_leak":
+            total_loss = total_loss * add_pipeline_losses(distances, val)
+            strings = [
+                f"{string}Pipeline losses: {int((factor - 1) * 100)}%. "
+                for string, factor in zip(strings, total_loss.tolist())
+            ]
+        else:
+            total_loss = total_loss * add_other_losses(val)
+            strings = [
+                f"{string}{loss} losses: {int(val * 100)}%. " for string in strings
+            ]
+
+    return total_loss, strings
+
+
 def calculate_fuel_properties(amount, lhv, co2_factor, biogenic_share):
     """
     Calculate the fossil and non-fossil CO2 emissions and LHV for the given fuel
@@ -312,6 +349,7 @@ def _update_fuels(scenario, version, system_model, cache=None):
         print("No fuel markets found in IAM data. Skipping.")
 
     fuels.relink_datasets()
+    add_to_change_log(scenario, fuels.change_log)
 
     return scenario, cache
 
@@ -348,8 +386,11 @@ class Fuels(BaseTransformation):
         self.crops_props = get_crops_properties()
         # list to store markets that will be created
         self.new_fuel_markets = {}
-        # dictionary to store mapping results, to avoid redundant effort
+        # dictionaries to store mapping results, to avoid redundant effort
         self.cached_suppliers = {}
+        self.cached_fuel_shares = {}
+        self.cached_fuel_suppliers = {}
+        self.cached_h2_fuelling_stations = {}
         self.biosphere_flows = get_biosphere_code(self.version)
         self.fuel_groups = fetch_mapping(FUEL_GROUPS)
         self.rev_fuel_groups = {
@@ -696,77 +737,46 @@ class Fuels(BaseTransformation):
                 # add it to list of created datasets
                 self.add_to_index(dataset)
 
+        # distribution losses and compression needs depend neither
+        # on the region nor on the hydrogen source: compute them once
+        # for all supply routes
+        route_factors = self.get_hydrogen_route_factors(supply_chain_scenarios, losses)
+
+        new_datasets = []
         for region in self.regions:
-            for hydrogen_type, hydrogen_vars in hydrogen_sources.items():
-                for vehicle, config in supply_chain_scenarios.items():
-                    for state in config["state"]:
-                        for distance in config["distance"]:
-                            # dataset creation
-                            dataset: dict[
-                                str,
-                                Union[
-                                    Union[
-                                        str, list[dict[str, Union[int, str]]], ndarray
-                                    ],
-                                    Any,
-                                ],
-                            ] = {
-                                "location": region,
-                                "name": f"hydrogen supply, {hydrogen_type}, by {vehicle}, as {state}, over {distance} km",
-                                "reference product": "hydrogen, 700 bar",
-                                "unit": "kilogram",
-                                "database": self.database[1]["database"],
-                                "code": str(uuid.uuid4().hex),
-                                "comment": "Dataset representing hydrogen supply, generated by `premise`.",
-                                "exchanges": [
-                                    {
-                                        "uncertainty type": 0,
-                                        "loc": 1,
-                                        "amount": 1,
-                                        "type": "production",
-                                        "production volume": 1,
-                                        "product": "hydrogen, 700 bar",
-                                        "name": f"hydrogen supply, {hydrogen_type}, "
-                                        f"by {vehicle}, as {state}, over {distance} km",
-                                        "unit": "kilogram",
-                                        "location": region,
-                                    }
-                                ],
-                            }
+            for vehicle, config in supply_chain_scenarios.items():
+                for state in config["state"]:
+                    for distance in config["distance"]:
+                        factors = route_factors[(vehicle, state, distance)]
+
+                        # transport, storage and conditioning exchanges
+                        # are shared by all hydrogen sources
+                        template = self.create_hydrogen_supply_template(
+                            region, vehicle, config, state, distance, factors
+                        )
 
-                            # transport
-                            dataset = self.add_hydrogen_transport(
-                                dataset, config, region, distance, vehicle
+                        for hydrogen_type, hydrogen_vars in hydrogen_sources.items():
+                            name = (
+                                f"hydrogen supply, {hydrogen_type}, "
+                                f"by {vehicle}, as {state}, over {distance} km"
                             )
-
-                            # need for inhibitor and purification if CNG pipeline
-                            # electricity for purification: 2.46 kWh/kg H2
-                            if vehicle == "CNG pipeline":
-                                dataset = self.add_hydrogen_inhibitor(dataset, region)
-
-                            if "regional storage" in config:
-                                dataset = self.add_hydrogen_regional_storage(
-                                    dataset, region, config
-                                )
-
-                            # electricity for compression
-                            if state in ["gaseous", "liquid"]:
-                                dataset = self.add_compression_electricity(
-                                    state, vehicle, distance, region, dataset
+                            dataset = dict(
+                                template,
+                                name=name,
+                                code=str(uuid.uuid4().hex),
+                                exchanges=[dict(exc) for exc in template["exchanges"]],
+                            )
+                            dataset["exchanges"][0]["name"] = name
+                            if "log parameters" in template:
+                                dataset["log parameters"] = dict(
+                                    template["log parameters"]
                                 )
 
-                            # electricity for hydrogenation, dehydrogenation and
-                            # compression at delivery
-                            if state == "liquid organic compound":
-                                dataset = self.add_hydrogenation_energy(region, dataset)
-
                             dataset = self.add_hydrogen_input_and_losses(
                                 hydrogen_vars,
                                 region,
-                                losses,
-                                vehicle,
-                                state,
-                                distance,
+                                factors["losses"],
+                                factors["losses comment"],
                                 dataset,
                             )
 
@@ -782,13 +792,135 @@ class Fuels(BaseTransformation):
                                 dataset,
                             )
 
-                            self.database.append(dataset)
+                            new_datasets.append(dataset)
 
-                            # add to log
-                            self.write_log(dataset)
+        self.database.extend(new_datasets)
 
-                            # add it to list of created datasets
-                            self.add_to_index(dataset)
+        # add to log
+        for dataset in new_datasets:
+            self.write_log(dataset)
+
+        # add it to list of created datasets
+        self.add_to_index(new_datasets)
+
+    def get_hydrogen_route_factors(
+        self, supply_chain_scenarios: dict, losses: dict
+    ) -> Dict[Tuple[str, str, int], Dict[str, Any]]:
+        """
+        Calculate the distribution losses and the electricity needed for
+        compression for all hydrogen supply routes at once.
+
+        :param supply_chain_scenarios: The configuration of the supply routes.
+        :param losses: The loss coefficients, per vehicle and hydrogen state.
+        :return: A dictionary with (vehicle, state, distance) as keys and
+        the loss factor, compression electricity and their descriptions as values.
+        """
+
+        route_factors = {}
+        for vehicle, config in supply_chain_scenarios.items():
+            distances = np.array(config["distance"], dtype=float)
+            for state in config["state"]:
+                total_loss, loss_strings = get_hydrogen_losses(
+                    losses[vehicle][state], vehicle, distances
+                )
+
+                if state in ["gaseous", "liquid"]:
+                    electricity_comp, comp_strings = self.get_compression_electricity(
+                        state, vehicle, distances
+                    )
+                    electricity_comp = electricity_comp.tolist()
+                else:
+                    electricity_comp = comp_strings = [None] * len(distances)
+
+                for i, distance in enumerate(config["distance"]):
+                    route_factors[(vehicle, state, distance)] = {
+                        "losses": float(total_loss[i]),
+                        "losses comment": loss_strings[i],
+                        "compression": electricity_comp[i],
+                        "compression comment": comp_strings[i],
+                    }
+
+        return route_factors
+
+    def create_hydrogen_supply_template(
+        self,
+        region: str,
+        vehicle: str,
+        config: dict,
+        state: str,
+        distance: int,
+        factors: dict,
+    ) -> dict:
+        """
+        Create a hydrogen supply dataset for a given region and supply route,
+        without the hydrogen input, which depends on the hydrogen source.
+
+        :param region: The region of the dataset.
+        :param vehicle: The type of vehicle used.
+        :param config: The configuration for the vehicle transport.
+        :param state: The state of the hydrogen.
+        :param distance: The distance traveled.
+        :param factors: The route factors, from `get_hydrogen_route_factors`.
+        :return: The dataset template.
+        """
+
+        dataset: dict[
+            str,
+            Union[
+                Union[str, list[dict[str, Union[int, str]]], ndarray],
+                Any,
+            ],
+        ] = {
+            "location": region,
+            "name": f"hydrogen supply, by {vehicle}, as {state}, over {distance} km",
+            "reference product": "hydrogen, 700 bar",
+            "unit": "kilogram",
+            "database": self.database[1]["database"],
+            "comment": "Dataset representing hydrogen supply, generated by `premise`.",
+            "exchanges": [
+                {
+                    "uncertainty type": 0,
+                    "loc": 1,
+                    "amount": 1,
+                    "type": "production",
+                    "production volume": 1,
+                    "product": "hydrogen, 700 bar",
+                    "name": f"hydrogen supply, by {vehicle}, "
+                    f"as {state}, over {distance} km",
+                    "unit": "kilogram",
+                    "location": region,
+                }
+            ],
+        }
+
+        # transport
+        dataset = self.add_hydrogen_transport(
+            dataset, config, region, distance, vehicle
+        )
+
+        # need for inhibitor and purification if CNG pipeline
+        # electricity for purification: 2.46 kWh/kg H2
+        if vehicle == "CNG pipeline":
+            dataset = self.add_hydrogen_inhibitor(dataset, region)
+
+        if "regional storage" in config:
+            dataset = self.add_hydrogen_regional_storage(dataset, region, config)
+
+        # electricity for compression
+        if factors["compression"] is not None:
+            dataset = self.add_compression_electricity(
+                factors["compression"],
+                factors["compression comment"],
+                region,
+                dataset,
+            )
+
+        # electricity for hydrogenation, dehydrogenation and
+        # compression at delivery
+        if state == "liquid organic compound":
+            dataset = self.add_hydrogenation_energy(region, dataset)
+
+        return dataset
 
     def add_hydrogen_transport(
         self,
@@ -849,8 +981,23 @@ class Fuels(BaseTransformation):
         return dataset
 
     def add_hydrogen_input_and_losses(
-        self, hydrogen_activity, region, losses, vehicle, state, distance, dataset
-    ):
+        self,
+        hydrogen_activity: dict,
+        region: str,
+        total_loss: float,
+        string: str,
+        dataset: dict,
+    ) -> dict:
+        """
+        Add the hydrogen input, including distribution losses, to the dataset.
+
+        :param hydrogen_activity: The hydrogen production activity.
+        :param region: The region of the dataset.
+        :param total_loss: The distribution loss factor.
+        :param string: The description of the distribution losses.
+        :param dataset: The dataset to modify.
+        :return: The modified dataset.
+        """
         # fetch the H2 production activity
         h2_ds = list(
             self.find_suppliers(
@@ -861,23 +1008,6 @@ class Fuels(BaseTransformation):
             ).keys()
         )[0]
 
-        # include losses along the way
-        string = ""
-        total_loss = 1
-        for loss, val in losses[vehicle][state].items():
-            val = float(val)
-
-            if loss == "boil-off":
-                total_loss *= add_boil_off_losses(vehicle, distance, val)
-                string += f"Boil-off losses: {int((total_loss - 1) * 100)}%. "
-
-            elif loss == "pipeline_leak":
-                total_loss *= add_pipeline_losses(distance, val)
-                string += f"Pipeline losses: {int((total_loss - 1) * 100)}%. "
-            else:
-                total_loss *= add_other_losses(val)
-                string += f"{loss} losses: {int(val * 100)}%. "
-
         dataset["exchanges"].append(
             {
                 "uncertainty type": 0,
@@ -1128,18 +1258,18 @@ class Fuels(BaseTransformation):
 
         return dataset
 
-    def add_compression_electricity(
-        self, state: str, vehicle: str, distance: float, region: str, dataset: dict
-    ) -> dict:
+    def get_compression_electricity(
+        self, state: str, vehicle: str, distances: ndarray
+    ) -> Tuple[ndarray, List[str]]:
         """
-        Add the electricity needed for the compression of hydrogen.
+        Calculate the electricity needed for the compression of hydrogen,
+        for several transport distances at once.
 
         :param state: The state of the hydrogen (gaseous or liquid).
         :param vehicle: The vehicle used for transport (truck or pipeline).
-        :param distance: The distance travelled by the vehicle.
-        :param region: The region for which to add the activity.
-        :param dataset: The dataset to modify.
-        :return: The modified dataset.
+        :param distances: The distances travelled by the vehicle.
+        :return: The electricity needed, in kWh/kg H2, and its description,
+        for each distance.
 
         """
 
@@ -1159,32 +1289,60 @@ class Fuels(BaseTransformation):
 
         if state == "gaseous":
             if vehicle == "truck":
-                electricity_comp = get_compression_effort(25, 500, 1000)
-                electricity_comp += get_compression_effort(500, 900, 1000)
+                electricity_comp = np.full(
+                    len(distances),
+                    get_compression_effort(25, 500, 1000)
+                    + get_compression_effort(500, 900, 1000),
+                )
             else:
                 electricity_comp = get_compression_effort(25, 100, 1000) + (
-                    0.6 * distance / 250
+                    0.6 * distances / 250
                 )
                 electricity_comp += get_compression_effort(100, 900, 1000)
 
-            string = (
-                f" {electricity_comp} kWh is added to compress from 25 bar 100 bar (if pipeline)"
-                f"or 500 bar (if truck), and then to 900 bar to dispense in storage tanks at 700 bar. "
-                " Additionally, if transported by pipeline, there is re-compression (0.6 kWh) every 250 km."
-            )
+            strings = [
+                (
+                    f" {val} kWh is added to compress from 25 bar 100 bar (if pipeline)"
+                    f"or 500 bar (if truck), and then to 900 bar to dispense in storage tanks at 700 bar. "
+                    " Additionally, if transported by pipeline, there is re-compression (0.6 kWh) every 250 km."
+                )
+                for val in electricity_comp.tolist()
+            ]
 
         else:
-            electricity_comp = np.clip(
-                np.interp(
-                    self.year,
-                    [2020, 2035, 2050],
-                    [12, 8, 6],
+            electricity_comp = np.full(
+                len(distances),
+                np.clip(
+                    np.interp(
+                        self.year,
+                        [2020, 2035, 2050],
+                        [12, 8, 6],
+                    ),
+                    12,
+                    6,
                 ),
-                12,
-                6,
             )
 
-            string = f" {electricity_comp} kWh is added to liquefy the hydrogen. "
+            strings = [
+                f" {val} kWh is added to liquefy the hydrogen. "
+                for val in electricity_comp.tolist()
+            ]
+
+        return electricity_comp, strings
+
+    def add_compression_electricity(
+        self, electricity_comp: float, string: str, region: str, dataset: dict
+    ) -> dict:
+        """
+        Add the electricity needed for the compression of hydrogen.
+
+        :param electricity_comp: The electricity needed, in kWh/kg H2.
+        :param string: The description of the compression step.
+        :param region: The region for which to add the activity.
+        :param dataset: The dataset to modify.
+        :return: The modified dataset.
+
+        """
 
         suppliers = self.find_suppliers(
             name="market group for electricity, low voltage",
@@ -1223,35 +1381,39 @@ class Fuels(BaseTransformation):
 
         return dataset
 
-    @lru_cache(maxsize=None)
     def add_h2_fuelling_station(self, region: str) -> dict:
         """
         Add the hydrogen fuelling station.
 
         :param dataset: The dataset to modify.
         :param region: The region for which to add the activity.
-        :return: The modified dataset.
+        :return: A new exchange with the fuelling station.
 
         """
 
-        ds_h2_station = list(
-            self.find_suppliers(
-                name="hydrogen refuelling station",
-                ref_prod="hydrogen",
-                unit="unit",
-                loc=region,
-            ).keys()
-        )[0]
+        if region not in self.cached_h2_fuelling_stations:
+            ds_h2_station = list(
+                self.find_suppliers(
+                    name="hydrogen refuelling station",
+                    ref_prod="hydrogen",
+                    unit="unit",
+                    loc=region,
+                ).keys()
+            )[0]
 
-        return {
-            "uncertainty type": 0,
-            "amount": 1 / (600 * 365 * 40),  # 1 over lifetime: 40 years, 600 kg H2/day
-            "type": "technosphere",
-            "product": ds_h2_station[2],
-            "name": ds_h2_station[0],
-            "unit": ds_h2_station[3],
-            "location": region,
-        }
+            self.cached_h2_fuelling_stations[region] = {
+                "uncertainty type": 0,
+                # 1 over lifetime: 40 years, 600 kg H2/day
+                "amount": 1 / (600 * 365 * 40),
+                "type": "technosphere",
+                "product": ds_h2_station[2],
+                "name": ds_h2_station[0],
+                "unit": ds_h2_station[3],
+                "location": region,
+            }
+
+        # return a copy, as the exchange is added to several datasets
+        return dict(self.cached_h2_fuelling_stations[region])
 
     def add_pre_cooling_electricity(self, dataset: dict, region: str) -> dict:
         """
@@ -1891,7 +2053,6 @@ class Fuels(BaseTransformation):
             for fuel in self.iam_fuel_markets.variables.values
         }
 
-    @lru_cache(maxsize=None)
     def fetch_fuel_share(
         self, fuel: str, relevant_fuel_types: Tuple[str], region: str, period: int
     ) -> float:
@@ -1904,27 +2065,40 @@ class Fuels(BaseTransformation):
         :return: the percentage of the specified fuel type in the fuel mix for the region
         """
 
-        relevant_variables = [
-            v
-            for v in self.iam_fuel_markets.variables.values
-            if any(x.lower() in v.lower() for x in relevant_fuel_types)
-        ]
+        key = (fuel, relevant_fuel_types, region, period)
+        if key not in self.cached_fuel_shares:
+            self.cached_fuel_shares[key] = self.calculate_fuel_share(*key)
 
-        fuel_share = (
-            (
-                self.iam_fuel_markets.sel(region=region, variables=fuel)
-                / self.iam_fuel_markets.sel(
-                    region=region, variables=relevant_variables
-                ).sum(dim="variables")
-            )
-            .fillna(0)
-            .interp(
-                year=np.arange(self.year, self.year + period + 1),
-                kwargs={"fill_value": "extrapolate"},
-            )
-            .mean(dim="year")
-            .values
+        return self.cached_fuel_shares[key]
+
+    def calculate_fuel_share(
+        self, fuel: str, relevant_fuel_types: Tuple[str], region: str, period: int
+    ) -> float:
+        """
+        Uncached version of :meth:`fetch_fuel_share`.
+        """
+
+        def get_fuel_shares() -> xr.DataArray:
+            relevant_variables = [
+                v
+                for v in self.iam_fuel_markets.variables.values
+                if any(x.lower() in v.lower() for x in relevant_fuel_types)
+            ]
+
+            return (
+                self.iam_fuel_markets
+                / self.iam_fuel_markets.sel(variables=relevant_variables).sum(
+                    dim="variables"
+                )
+            ).fillna(0)
+
+        fuel_shares = self.iam_data.get_period_average(
+            ("fuel shares", relevant_fuel_types),
+            self.year,
+            period,
+            array=get_fuel_shares,
         )
+        fuel_share = fuel_shares.sel(region=region, variables=fuel).values
 
         if np.isnan(fuel_share):
             print(
@@ -2106,31 +2280,26 @@ class Fuels(BaseTransformation):
         final_lhv, final_fossil_co2, final_biogenic_co2 = 0, 0, 0
 
         # Calculate share of production volume for each region
+        def get_production_shares() -> xr.DataArray:
+            production_volumes = self.iam_fuel_markets.sel(variables=prod_vars).sum(
+                dim="variables"
+            )
+            return production_volumes / production_volumes.sel(
+                region=[x for x in production_volumes.region.values if x != "World"]
+            ).sum(dim="region")
+
+        shares = self.iam_data.get_period_average(
+            ("fuel production shares", tuple(prod_vars)),
+            self.year,
+            period,
+            array=get_production_shares,
+        )
+
         for r in d_act.keys():
             if r == "World" or (dataset["name"], r) not in self.new_fuel_markets:
                 continue
 
-            share = (
-                (
-                    self.iam_fuel_markets.sel(region=r, variables=prod_vars).sum(
-                        dim="variables"
-                    )
-                    / self.iam_fuel_markets.sel(
-                        variables=prod_vars,
-                        region=[
-                            x
-                            for x in self.iam_fuel_markets.region.values
-                            if x != "World"
-                        ],
-                    ).sum(dim=["variables", "region"])
-                )
-                .interp(
-                    year=np.arange(self.year, self.year + period + 1),
-                    kwargs={"fill_value": "extrapolate"},
-                )
-                .mean(dim="year")
-                .values
-            )
+            share = shares.sel(region=r).values
 
             if np.isnan(share):
                 print("Incorrect market share for", dataset["name"], "in", r)
@@ -2171,6 +2340,85 @@ class Fuels(BaseTransformation):
 
         return dataset
 
+    def get_fuel_suppliers(
+        self,
+        prod_var: str,
+        possible_names: Tuple[str],
+        location: str,
+        look_for: Tuple[str],
+        blacklist: Tuple[str],
+        unit: str,
+        lhv: float,
+    ) -> List[Tuple[tuple, float, float, float, float]]:
+        """
+        Return the suppliers of a fuel type in a fuel market, with, for each,
+        the amount supplied and the resulting fossil CO2, non-fossil CO2
+        and LHV, for a fuel type share of 1. These do not depend on the period
+        of the market, and are cached to be reused across periods.
+
+        :param prod_var: IAM fuel production variable
+        :param possible_names: names of the datasets supplying the fuel
+        :param location: location of the fuel market
+        :param look_for: terms the reference product of suppliers must contain
+        :param blacklist: terms suppliers must not contain
+        :param unit: unit of the fuel market
+        :param lhv: lower heating value of the fuel market, in MJ/kg
+        :return: list of (supplier key, amount, fossil CO2,
+            non-fossil CO2, weighted LHV) tuples
+        """
+
+        key = (prod_var, possible_names, location, look_for, blacklist, unit, lhv)
+
+        if key in self.cached_fuel_suppliers:
+            return self.cached_fuel_suppliers[key]
+
+        possible_suppliers = self.select_multiple_suppliers(
+            possible_names=possible_names,
+            dataset_location=location,
+            look_for=look_for,
+            blacklist=blacklist,
+        )
+
+        fuel_suppliers = []
+        for supplier_key, supplier_val in possible_suppliers.items():
+            # Convert m3 to kg
+            conversion_factor = 1.0
+            if supplier_key[-1] == "kilogram":
+                if unit == "cubic meter":
+                    conversion_factor = 0.735
+
+            # Calculate amount of fuel input
+            # Corrected by the LHV of the initial fuel
+            # so that the overall composition maintains
+            # the same average LHV
+            amount = (
+                supplier_val
+                * (lhv / self.fuels_specs[prod_var]["lhv"])
+                * conversion_factor
+            )
+
+            supplier_lhv = self.fuels_specs[prod_var]["lhv"] * (
+                0.735 if supplier_key[-1] == "cubic meter" else 1
+            )
+            co2_factor = self.fuels_specs[prod_var]["co2"] * (
+                0.735 if supplier_key[-1] == "cubic meter" else 1
+            )
+            biogenic_co2_share = self.fuels_specs[prod_var]["biogenic_share"]
+
+            fuel_suppliers.append(
+                (
+                    supplier_key,
+                    amount,
+                    *calculate_fuel_properties(
+                        amount, supplier_lhv, co2_factor, biogenic_co2_share
+                    ),
+                )
+            )
+
+        self.cached_fuel_suppliers[key] = fuel_suppliers
+
+        return fuel_suppliers
+
     def generate_regional_fuel_market(
         self,
         dataset: dict,
@@ -2273,65 +2521,37 @@ class Fuels(BaseTransformation):
             if "petroleum gas" in dataset["name"]:
                 blacklist.remove("petroleum gas")
 
-            possible_names = tuple(fuel_providers[prod_var]["fuel filters"])
-
-            possible_suppliers = self.select_multiple_suppliers(
-                possible_names=possible_names,
-                dataset_location=dataset["location"],
+            fuel_suppliers = self.get_fuel_suppliers(
+                prod_var=prod_var,
+                possible_names=tuple(fuel_providers[prod_var]["fuel filters"]),
+                location=dataset["location"],
                 look_for=tuple(vars_map[fuel_category]),
                 blacklist=tuple(blacklist),
+                unit=dataset["unit"],
+                lhv=activity["lhv"],
             )
 
-            if not possible_suppliers:
+            if not fuel_suppliers:
                 print(
                     f"No suppliers found for {prod_var} "
                     f"in {region} for dataset "
                     f"in location {dataset['location']}"
                 )
+                continue
 
-            for supplier_key, supplier_val in possible_suppliers.items():
-                # Convert m3 to kg
-                conversion_factor = 1.0
-                if supplier_key[-1] == "kilogram":
-                    if dataset["unit"] == "cubic meter":
-                        conversion_factor = 0.735
-
-                supplier_share = share * supplier_val
-
-                # Calculate amount of fuel input
-                # Corrected by the LHV of the initial fuel
-                # so that the overall composition maintains
-                # the same average LHV
-                amount = (
-                    supplier_share
-                    * (activity["lhv"] / self.fuels_specs[prod_var]["lhv"])
-                    * conversion_factor
-                )
-
-                lhv = self.fuels_specs[prod_var]["lhv"] * (
-                    0.735 if supplier_key[-1] == "cubic meter" else 1
-                )
-                co2_factor = self.fuels_specs[prod_var]["co2"] * (
-                    0.735 if supplier_key[-1] == "cubic meter" else 1
-                )
-                biogenic_co2_share = self.fuels_specs[prod_var]["biogenic_share"]
-
-                f_co2, nf_co2, weighted_lhv = calculate_fuel_properties(
-                    amount, lhv, co2_factor, biogenic_co2_share
-                )
-
-                final_lhv += weighted_lhv
-                fossil_co2 += f_co2
-                non_fossil_co2 += nf_co2
+            for supplier_key, amount, f_co2, nf_co2, weighted_lhv in fuel_suppliers:
+                final_lhv += share * weighted_lhv
+                fossil_co2 += share * f_co2
+                non_fossil_co2 += share * nf_co2
 
-                dataset = update_dataset(dataset, supplier_key, amount)
+                dataset = update_dataset(dataset, supplier_key, share * amount)
 
-                text = (
-                    f"{prod_var.capitalize()}: {(share * 100):.1f} pct @ "
-                    f"{self.fuels_specs[prod_var]['lhv']} MJ/kg. "
-                )
-                if text not in string:
-                    string += text
+            text = (
+                f"{prod_var.capitalize()}: {(share * 100):.1f} pct @ "
+                f"{self.fuels_specs[prod_var]['lhv']} MJ/kg. "
+            )
+            if text not in string:
+                string += text
 
         if "log parameters" not in dataset:
             dataset["log parameters"] = {}
@@ -2531,26 +2751,29 @@ class Fuels(BaseTransformation):
 
     def write_log(self, dataset, status="created"):
         """
-        Write log file.
-        """
-
-        logger.info(
-            f"{status}|{self.model}|{self.scenario}|{self.year}|"
-            f"{dataset['name']}|{dataset['location']}|"
-            f"{dataset.get('log parameters', {}).get('initial amount of fossil CO2', '')}|"
-            f"{dataset.get('log parameters', {}).get('new amount of fossil CO2', '')}|"
-            f"{dataset.get('log parameters', {}).get('new amount of biogenic CO2', '')}|"
-            f"{dataset.get('log parameters', {}).get('initial energy input for hydrogen production', '')}|"
-            f"{dataset.get('log parameters', {}).get('new energy input for hydrogen production', '')}|"
-            f"{dataset.get('log parameters', {}).get('hydrogen distribution losses', '')}|"
-            f"{dataset.get('log parameters', {}).get('electricity for hydrogen compression', '')}|"
-            f"{dataset.get('log parameters', {}).get('electricity for hydrogen compression after dehydrogenation', '')}|"
-            f"{dataset.get('log parameters', {}).get('electricity for hydrogen pre-cooling', '')}|"
-            f"{dataset.get('log parameters', {}).get('initial biomass per kg biofuel', '')}|"
-            f"{dataset.get('log parameters', {}).get('final biomass per kg biofuel', '')}|"
-            f"{dataset.get('log parameters', {}).get('land footprint', '')}|"
-            f"{dataset.get('log parameters', {}).get('land use CO2', '')}|"
-            f"{dataset.get('log parameters', {}).get('fossil CO2 per kg fuel', '')}|"
-            f"{dataset.get('log parameters', {}).get('non-fossil CO2 per kg fuel', '')}|"
-            f"{dataset.get('log parameters', {}).get('lower heating value', '')}"
+        Record a change made to a dataset in the change log.
+        """
+
+        self.log_change(
+            "premise_fuel",
+            dataset,
+            status,
+            (
+                "initial amount of fossil CO2",
+                "new amount of fossil CO2",
+                "new amount of biogenic CO2",
+                "initial energy input for hydrogen production",
+                "new energy input for hydrogen production",
+                "hydrogen distribution losses",
+                "electricity for hydrogen compression",
+                "electricity for hydrogen compression after dehydrogenation",
+                "electricity for hydrogen pre-cooling",
+                "initial biomass per kg biofuel",
+                "final biomass per kg biofuel",
+                "land footprint",
+                "land use CO2",
+                "fossil CO2 per kg fuel",
+                "non-fossil CO2 per kg fuel",
+                "lower heating value",
+            ),
         )
@@ -4,11 +4,9 @@ Integrates projections regarding heat production and supply.
 import pprint
 
 from .filesystem_constants import DATA_DIR, VARIABLES_DIR
-from .logger import create_logger
+from .logger import add_to_change_log
 from .transformation import BaseTransformation, IAMDataCollection, List, ws
 
-logger = create_logger("heat")
-
 
 def _update_heat(scenario, version, system_model, cache=None):
     heat = Heat(
@@ -28,6 +26,7 @@ def _update_heat(scenario, version, system_model, cache=None):
     cache = heat.cache
 
     heat.relink_datasets()
+    add_to_change_log(scenario, heat.change_log)
 
     return scenario, cache
 
@@ -221,14 +220,17 @@ class Heat(BaseTransformation):
 
     def write_log(self, dataset, status="created"):
         """
-        Write log file.
+        Record a change made to a dataset in the change log.
         """
 
-        logger.info(
-            f"{status}|{self.model}|{self.scenario}|{self.year}|"
-            f"{dataset['name']}|{dataset['location']}|"
-            f"{dataset.get('log parameters', {}).get('initial amount of fossil CO2', '')}|"
-            f"{dataset.get('log parameters', {}).get('new amount of fossil CO2', '')}|"
-            f"{dataset.get('log parameters', {}).get('initial amount of biogenic CO2', '')}|"
-            f"{dataset.get('log parameters', {}).get('new amount of biogenic CO2', '')}"
+        self.log_change(
+            "premise_heat",
+            dataset,
+            status,
+            (
+                "initial amount of fossil CO2",
+                "new amount of fossil CO2",
+                "initial amount of biogenic CO2",
+                "new amount of biogenic CO2",
+            ),
         )
@@ -4,23 +4,38 @@ and those provided by the user.
 """
 
 import csv
+import hashlib
 import itertools
+import os
+import pickle
+import tempfile
 import uuid
+from collections import defaultdict
 from functools import lru_cache
 from pathlib import Path
 from typing import Dict, List, Union
+from urllib.parse import urlparse
 
 import bw2io
 import numpy as np
 import requests
 import yaml
+from bw2data import projects
 from bw2io import CSVImporter, ExcelImporter, Migration
+from bw2io.importers.base_lci import LCIImporter
 from prettytable import PrettyTable
 from wurst import searching as ws
 
+from . import __version__
 from .clean_datasets import remove_categories, remove_uncertainty
 from .data_collection import get_delimiter
-from .filesystem_constants import DATA_DIR, DIR_CACHED_DB, INVENTORY_DIR
+from .filesystem_constants import (
+    DATA_DIR,
+    DIR_CACHED_INVENTORIES,
+    DIR_REMOTE_INVENTORIES,
+    INVENTORY_DIR,
+    INVENTORY_MIRROR,
+)
 from .geomap import Geomap
 
 FILEPATH_MIGRATION_MAP = INVENTORY_DIR / "migration_map.csv"
@@ -29,8 +44,6 @@ CORRESPONDENCE_BIO_FLOWS = (
     DATA_DIR / "utils" / "export" / "correspondence_biosphere_flows.yaml"
 )
 
-TEMP_CSV_FILE = DIR_CACHED_DB / "temp.csv"
-
 
 def get_correspondence_bio_flows():
     """
@@ -119,6 +132,237 @@ def generate_migration_maps(origin: str, destination: str) -> Dict[str, list]:
     return response
 
 
+@lru_cache
+def register_migration_maps(project: str) -> None:
+    """
+    Register the migration maps between ecoinvent versions
+    in the Brightway project, as imported inventories link
+    to different ecoinvent versions.
+    This is only done once per process and project.
+    :param project: name of the current Brightway project
+    """
+
+    ei_versions = ["35", "36", "37", "38", "39"]
+
+    for combination in itertools.product(ei_versions, ei_versions):
+        if combination[0] != combination[1]:
+            mapping = generate_migration_maps(combination[0], combination[1])
+            if len(mapping["data"]) > 0:
+                Migration(f"migration_{combination[0]}_{combination[1]}").write(
+                    mapping,
+                    description=f"Change technosphere names due to change from {combination[0]} to {combination[1]}",
+                )
+
+
+def migrate_inventory(
+    importer: LCIImporter, version_in: str, version_out: str
+) -> LCIImporter:
+    """
+    Migrate the datasets of an importer from one ecoinvent version to another.
+    :param importer: bw2io importer
+    :param version_in: ecoinvent version of the inventories
+    :param version_out: ecoinvent version the inventories should comply with
+    :return: the importer, with migrated datasets
+    """
+
+    if version_in != version_out:
+        # if version_out is 3.9, migrate towards 3.8 first, then 3.9
+        if version_out in ["3.9", "3.9.1"]:
+            print("Migrating to 3.8 first")
+            if version_in != "3.8":
+                importer.migrate(f"migration_{version_in.replace('.', '')}_38")
+            importer.migrate(f"migration_38_{version_out.replace('.', '')}")
+        importer.migrate(
+            f"migration_{version_in.replace('.', '')}_{version_out.replace('.', '')}"
+        )
+
+    return importer
+
+
+def get_cached_inventory_filepath(
+    filepath: Path, version_in: str, version_out: str, system_model: str
+) -> Path:
+    """
+    Return the file path of the cached version of an inventory file.
+    The name of the cached file depends on the content of the inventory file,
+    the migration map, the versions of premise and bw2io,
+    the ecoinvent versions and the system model.
+    :param filepath: file path of the inventory file
+    :param version_in: ecoinvent version of the inventories
+    :param version_out: ecoinvent version the inventories should comply with
+    :param system_model: "cutoff" or "consequential"
+    :return: file path of the cached inventory
+    """
+
+    digest = hashlib.sha256(str(__version__).encode())
+    digest.update(str(bw2io.__version__).encode())
+    for fp in [filepath, FILEPATH_MIGRATION_MAP, FILEPATH_CONSEQUENTIAL_BLACKLIST]:
+        with open(fp, "rb") as stream:
+            digest.update(stream.read())
+
+    return DIR_CACHED_INVENTORIES / (
+        f"{Path(filepath).stem}_{digest.hexdigest()[:16]}_"
+        f"{version_in}_{version_out}_{system_model}.pickle"
+    )
+
+
+def load_default_inventory(
+    filepath: Path,
+    version_in: str,
+    version_out: str,
+    system_model: str,
+    project: str = None,
+) -> List[dict]:
+    """
+    Read an inventory file, migrate it to `version_out` and remove
+    the datasets that are not compliant with the system model.
+    The result is cached on disk, so that the file is only
+    processed once for a given ecoinvent version and system model.
+    Migration maps must have been registered beforehand
+    (see :func:`register_migration_maps`).
+    :param filepath: file path of the inventory file
+    :param version_in: ecoinvent version of the inventories
+    :param version_out: ecoinvent version the inventories should comply with
+    :param system_model: "cutoff" or "consequential"
+    :param project: Brightway project holding the migration maps
+    :return: list of datasets
+    """
+
+    cache_fp = get_cached_inventory_filepath(
+        filepath, version_in, version_out, system_model
+    )
+
+    if cache_fp.exists():
+        with open(cache_fp, "rb") as stream:
+            return pickle.load(stream)
+
+    # worker processes may not start in the same project
+    if project is not None and projects.current != project:
+        projects.set_current(project, update=False)
+
+    importer = migrate_inventory(ExcelImporter(filepath), version_in, version_out)
+
+    data = importer.data
+    if system_model == "consequential":
+        data = check_for_datasets_compliance_with_consequential_database(
+            data, get_consequential_blacklist()
+        )
+
+    write_cached_inventory(data, cache_fp)
+
+    return data
+
+
+def write_cached_inventory(data: List[dict], cache_fp: Path) -> None:
+    """
+    Write inventory datasets to the cache.
+    :param data: list of datasets
+    :param cache_fp: file path of the cached inventory
+    """
+
+    # write to a temporary file first, so that concurrent
+    # processes never read a partially written cache
+    temp_fp = cache_fp.with_suffix(f".{os.getpid()}.tmp")
+    with open(temp_fp, "wb") as stream:
+        pickle.dump(data, stream)
+    os.replace(temp_fp, cache_fp)
+
+
+def get_remote_inventory_filepath(url: str) -> Path:
+    """
+    Return the local file path under which an inventory
+    fetched from `url` is kept. The name is derived from the url,
+    so that the same local copy is found by any process.
+    :param url: url of the inventory file
+    :return: local file path
+    """
+
+    suffix = Path(urlparse(url).path).suffix or ".csv"
+    name = hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+
+    return DIR_REMOTE_INVENTORIES / f"{name}{suffix}"
+
+
+def write_remote_inventory(response: requests.Response, filepath: Path) -> None:
+    """
+    Write the content of a response to `filepath`.
+    The content is written to a temporary file first, which is then renamed,
+    so that concurrent imports never read a partially written file.
+    :param response: response to a request for an inventory file
+    :param filepath: local file path
+    """
+
+    if filepath.suffix == ".csv":
+        with tempfile.NamedTemporaryFile(
+            mode="w", encoding="utf-8", dir=filepath.parent, delete=False
+        ) as file:
+            writer = csv.writer(
+                file,
+                quoting=csv.QUOTE_NONE,
+                delimiter=",",
+                quotechar="'",
+                escapechar="\\",
+            )
+            writer.writerows(
+                line.split(",")
+                for line in response.content.decode("utf-8").splitlines()
+            )
+    else:
+        with tempfile.NamedTemporaryFile(
+            mode="wb", dir=filepath.parent, delete=False
+        ) as file:
+            file.write(response.content)
+
+    os.replace(file.name, filepath)
+
+
+def fetch_remote_inventory(url: str) -> Path:
+    """
+    Return the file path of a local copy of the inventory at `url`.
+    The local copy is revalidated against the server using its ETag,
+    and is used as is if the server cannot be reached.
+    If `PREMISE_INVENTORY_MIRROR` is set, a copy found in the mirror
+    folder is used without network access.
+    :param url: url of the inventory file
+    :return: local file path
+    """
+
+    filepath = get_remote_inventory_filepath(url)
+    etag_filepath = filepath.with_name(f"{filepath.name}.etag")
+
+    if INVENTORY_MIRROR and filepath.exists():
+        return filepath
+
+    headers = {}
+    if filepath.exists() and etag_filepath.exists():
+        headers["If-None-Match"] = etag_filepath.read_text(encoding="utf-8")
+
+    print(f"Downloading datapackage from {url}")
+
+    try:
+        response = requests.get(url, headers=headers, timeout=60)
+    except requests.RequestException as e:
+        if filepath.exists():
+            print(f"Could not reach {url}. Using the local copy instead.")
+            return filepath
+        raise ConnectionError(f"Error downloading the file: {e}")
+
+    if response.status_code == 304:
+        return filepath
+
+    if response.status_code != 200:
+        raise ValueError("The file at {} could not be found.".format(url))
+
+    write_remote_inventory(response, filepath)
+
+    if "ETag" in response.headers:
+        etag_filepath.write_text(response.headers["ETag"], encoding="utf-8")
+    elif etag_filepath.exists():
+        etag_filepath.unlink()
+
+    return filepath
+
+
 def check_for_duplicate_datasets(data: List[dict]) -> List[dict]:
     """Check whether there are duplicate datasets in the inventory to import."""
     datasets = [(ds["name"], ds["reference product"], ds["location"]) for ds in data]
@@ -286,6 +530,54 @@ def check_uncertainty_data(data, filename):
         print(table)
 
 
+class DatabaseIndex:
+    """
+    Hashed lookup tables over the datasets of a database, used to link
+    imported inventories without scanning the database for each exchange.
+    A single index can be shared by several imports,
+    provided it is updated with :meth:`add` as datasets are merged.
+
+    :ivar codes: set of dataset codes
+    :ivar names: set of (name, reference product, location) tuples
+    :ivar products: reference products, indexed by (name, location, unit)
+
+    """
+
+    def __init__(self, database: List[dict]) -> None:
+        self.codes = set()
+        self.names = set()
+        self.products = defaultdict(list)
+        self.add(database)
+
+    def add(self, datasets: List[dict]) -> None:
+        """
+        Add datasets to the index.
+        :param datasets: list of datasets
+        """
+        for dataset in datasets:
+            if "code" in dataset:
+                self.codes.add(dataset["code"])
+            self.names.add(
+                (dataset["name"], dataset["reference product"], dataset["location"])
+            )
+            self.products[
+                (dataset["name"], dataset["location"], dataset.get("unit"))
+            ].append(dataset["reference product"])
+
+    def find_product(self, name: str, location: str, unit: str, product=None):
+        """
+        Return the reference product of the first dataset matching
+        the name, location and unit given (and product, if given).
+        :return: reference product, or None if no dataset matches
+        """
+        products = self.products.get((name, location, unit), [])
+
+        if product is not None:
+            return product if product in products else None
+
+        return products[0] if products else None
+
+
 class BaseInventoryImport:
     """
     Base class for inventories that are to be merged with the wurst database.
@@ -296,6 +588,7 @@ class BaseInventoryImport:
     :ivar version_out: the ecoinvent database version the imported inventories
     should comply with
     :ivar path: the filepath of the inventories to import
+    :ivar database_index: lookup tables over `database`, if already built
 
     """
 
@@ -307,13 +600,13 @@ class BaseInventoryImport:
         path: Union[str, Path],
         system_model: str,
         keep_uncertainty_data: bool = False,
+        database_index: DatabaseIndex = None,
     ) -> None:
         """Create a :class:`BaseInventoryImport` instance."""
         self.database = database
-        self.db_code = [x["code"] for x in self.database]
-        self.db_names = [
-            (x["name"], x["reference product"], x["location"]) for x in self.database
-        ]
+        self.database_index = database_index or DatabaseIndex(self.database)
+        self.db_code = self.database_index.codes
+        self.db_names = self.database_index.names
         self.version_in = version_in
         self.version_out = version_out
         self.biosphere_dict = get_biosphere_code(self.version_out)
@@ -324,32 +617,15 @@ class BaseInventoryImport:
         self.keep_uncertainty_data = keep_uncertainty_data
         self.path = path
 
-        if "http" in str(path):
-            r = requests.head(path)
-            if r.status_code != 200:
-                raise ValueError("The file at {} could not be found.".format(path))
-        else:
-            if not Path(path).exists():
-                raise FileNotFoundError(
-                    f"The inventory file {path} could not be found."
-                )
+        # remote files are checked when fetched
+        if "http" not in str(path) and not Path(path).exists():
+            raise FileNotFoundError(f"The inventory file {path} could not be found.")
 
         self.path = Path(path) if isinstance(path, str) else path
-        self.import_db = self.load_inventory()
 
-        # register migration maps
-        # as imported inventories link
-        # to different ecoinvent versions
-        ei_versions = ["35", "36", "37", "38", "39"]
-
-        for combination in itertools.product(ei_versions, ei_versions):
-            if combination[0] != combination[1]:
-                mapping = generate_migration_maps(combination[0], combination[1])
-                if len(mapping["data"]) > 0:
-                    Migration(f"migration_{combination[0]}_{combination[1]}").write(
-                        mapping,
-                        description=f"Change technosphere names due to change from {combination[0]} to {combination[1]}",
-                    )
+        register_migration_maps(projects.current)
+
+        self.import_db = self.load_inventory()
 
     def load_inventory(self) -> None:
         """Load an inventory from a specified path.
@@ -432,15 +708,11 @@ class BaseInventoryImport:
         :return:
         """
 
-        results = []
-        for act in self.import_db.data:
-            if (
-                len([a for a in act["exchanges"] if label in a and a[label] == value])
-                == 0
-            ):
-                results.append(act)
-
-        return results
+        return [
+            act
+            for act in self.import_db.data
+            if not any(label in a and a[label] == value for a in act["exchanges"])
+        ]
 
     def search_missing_field(self, field: str, scope: str = "activity") -> List[dict]:
         """Find exchanges and activities that do not contain a specific field
@@ -483,6 +755,7 @@ class BaseInventoryImport:
                         exchange["name"] = dataset["name"]
 
         # Add a `product` field to technosphere exchanges
+        self.import_db_index = DatabaseIndex(self.import_db.data)
         for dataset in self.import_db.data:
             for exchange in dataset["exchanges"]:
                 if exchange["type"] == "technosphere":
@@ -527,42 +800,16 @@ class BaseInventoryImport:
 
         """
         # Look first in the imported inventories
-        candidate = next(
-            ws.get_many(
-                self.import_db.data,
-                ws.equals("name", exc[0]),
-                ws.equals("location", exc[1]),
-                ws.equals("unit", exc[2]),
-            ),
-            None,
-        )
+        candidate = self.import_db_index.find_product(exc[0], exc[1], exc[2])
 
         # If not, look in the ecoinvent inventories
         if candidate is None:
-            if exc[-1] is not None:
-                candidate = next(
-                    ws.get_many(
-                        self.database,
-                        ws.equals("name", exc[0]),
-                        ws.equals("location", exc[1]),
-                        ws.equals("unit", exc[2]),
-                        ws.equals("reference product", exc[-1]),
-                    ),
-                    None,
-                )
-            else:
-                candidate = next(
-                    ws.get_many(
-                        self.database,
-                        ws.equals("name", exc[0]),
-                        ws.equals("location", exc[1]),
-                        ws.equals("unit", exc[2]),
-                    ),
-                    None,
-                )
+            candidate = self.database_index.find_product(
+                exc[0], exc[1], exc[2], exc[-1]
+            )
 
         if candidate is not None:
-            return candidate["reference product"]
+            return candidate
 
         self.list_unlinked.append(
             (
@@ -738,37 +985,28 @@ class DefaultInventory(BaseInventoryImport):
         path,
         system_model,
         keep_uncertainty_data,
+        database_index=None,
     ):
         super().__init__(
-            database, version_in, version_out, path, system_model, keep_uncertainty_data
+            database,
+            version_in,
+            version_out,
+            path,
+            system_model,
+            keep_uncertainty_data,
+            database_index,
         )
 
-    def load_inventory(self) -> bw2io.ExcelImporter:
-        return ExcelImporter(self.path)
+    def load_inventory(self) -> LCIImporter:
+        # migration and compliance with the system model
+        # are done here, as their result is cached
+        import_db = LCIImporter(self.path.stem)
+        import_db.data = load_default_inventory(
+            self.path, self.version_in, self.version_out, self.system_model
+        )
+        return import_db
 
     def prepare_inventory(self) -> None:
-        if self.version_in != self.version_out:
-            # if version_out is 3.9, migrate towards 3.8 first, then 3.9
-            if self.version_out in ["3.9", "3.9.1"]:
-                print("Migrating to 3.8 first")
-                if self.version_in != "3.8":
-                    self.import_db.migrate(
-                        f"migration_{self.version_in.replace('.', '')}_38"
-                    )
-                self.import_db.migrate(
-                    f"migration_38_{self.version_out.replace('.', '')}"
-                )
-            self.import_db.migrate(
-                f"migration_{self.version_in.replace('.', '')}_{self.version_out.replace('.', '')}"
-            )
-
-        if self.system_model == "consequential":
-            self.import_db.data = (
-                check_for_datasets_compliance_with_consequential_database(
-                    self.import_db.data, self.consequential_blacklist
-                )
-            )
-
         self.import_db.data = remove_categories(self.import_db.data)
 
         self.lower_case_technosphere_exchanges()
@@ -832,24 +1070,34 @@ class VariousVehicles(BaseInventoryImport):
         self.has_fleet = has_fleet
         self.geo = Geomap(model=model)
 
-    def load_inventory(self):
-        return ExcelImporter(self.path)
-
-    def prepare_inventory(self):
-        # if version_out is 3.9, migrate towards 3.8 first, then 3.9
-        if self.version_out in ["3.9", "3.9.1"]:
-            print("Migrating to 3.8 first")
-            if self.version_in != "3.8":
-                self.import_db.migrate(
-                    f"migration_{self.version_in.replace('.', '')}_38"
-                )
-            self.import_db.migrate(f"migration_38_{self.version_out.replace('.', '')}")
-        self.import_db.migrate(
-            f"migration_{self.version_in.replace('.', '')}_{self.version_out.replace('.', '')}"
+    def load_inventory(self) -> LCIImporter:
+        # parsing, migration and linking to the biosphere do not
+        # depend on the scenario, hence their result is cached
+        cache_fp = get_cached_inventory_filepath(
+            self.path, self.version_in, self.version_out, self.system_model
         )
 
+        import_db = LCIImporter(self.path.stem)
+
+        if cache_fp.exists():
+            with open(cache_fp, "rb") as stream:
+                import_db.data = pickle.load(stream)
+            return import_db
+
+        self.import_db = migrate_inventory(
+            ExcelImporter(self.path), self.version_in, self.version_out
+        )
         self.lower_case_technosphere_exchanges()
         self.add_biosphere_links()
+
+        import_db.data = self.import_db.data
+        write_cached_inventory(import_db.data, cache_fp)
+
+        return import_db
+
+    def prepare_inventory(self):
+        # migration and linking to the biosphere
+        # are done in `load_inventory`
         self.add_product_field_to_exchanges()
         # Check for duplicates
         self.check_for_already_existing_datasets()
@@ -870,25 +1118,23 @@ class AdditionalInventory(BaseInventoryImport):
     Import additional inventories, if any.
     """
 
-    def __init__(self, database, version_in, version_out, path, system_model):
-        super().__init__(database, version_in, version_out, path, system_model)
-
-    def download_file(self, url, local_path):
-        try:
-            response = requests.get(url)
-            response.raise_for_status()
-            with open(local_path, "w", encoding="utf-8") as file:
-                writer = csv.writer(
-                    file,
-                    quoting=csv.QUOTE_NONE,
-                    delimiter=",",
-                    quotechar="'",
-                    escapechar="\\",
-                )
-                for line in response.iter_lines():
-                    writer.writerow(line.decode("utf-8").split(","))
-        except requests.RequestException as e:
-            raise ConnectionError(f"Error downloading the file: {e}")
+    def __init__(
+        self,
+        database,
+        version_in,
+        version_out,
+        path,
+        system_model,
+        database_index=None,
+    ):
+        super().__init__(
+            database,
+            version_in,
+            version_out,
+            path,
+            system_model,
+            database_index=database_index,
+        )
 
     def load_inventory(self):
         path_str = str(self.path)
@@ -897,9 +1143,7 @@ class AdditionalInventory(BaseInventoryImport):
             if ":/" in path_str and "://" not in path_str:
                 path_str = path_str.replace(":/", "://")
 
-            print(f"Downloading datapackage from {path_str}")
-            self.download_file(path_str, TEMP_CSV_FILE)
-            file_path = TEMP_CSV_FILE
+            file_path = fetch_remote_inventory(path_str)
         else:
             file_path = self.path
 
@@ -0,0 +1,232 @@
+"""
+lcia.py contains functions to calculate impact scores of datasets
+directly from a scenario database, without writing it to Brightway.
+It is meant for quick sanity checks of transformed databases.
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from scipy import sparse as nsp
+from scipy.sparse.linalg import splu
+
+from .export import (
+    Export,
+    create_codes_index_of_biosphere_flows_matrix,
+    create_index_of_A_matrix,
+    create_index_of_biosphere_flows_matrix,
+)
+
+
+def build_lca_matrices(
+    scenario: dict, version: str
+) -> Tuple[nsp.csc_matrix, nsp.csr_matrix]:
+    """
+    Build the technosphere and biosphere matrices of a scenario database,
+    from the coordinates used for the matrix export.
+    :param scenario: scenario, with a `database`
+    :param version: ecoinvent version
+    :return: technosphere matrix (products, activities)
+        and biosphere matrix (biosphere flows, activities)
+    """
+
+    export = Export(scenario, version=version)
+    size = len(export.db)
+
+    # rows are [index of activity, index of product, value]
+    coordinates = np.array(
+        export.create_A_matrix_coordinates(skip_unlinked_exchanges=True), dtype=float
+    ).reshape(-1, 3)
+    technosphere = nsp.csc_matrix(
+        (
+            coordinates[:, 2],
+            (coordinates[:, 1].astype(int), coordinates[:, 0].astype(int)),
+        ),
+        shape=(size, size),
+    )
+
+    # datasets without production exchange (e.g., duplicates)
+    # are given one, so that the matrix can be factorized
+    missing = np.flatnonzero(technosphere.diagonal() == 0)
+    if len(missing) > 0:
+        technosphere = technosphere + nsp.csc_matrix(
+            (np.ones(len(missing)), (missing, missing)), shape=(size, size)
+        )
+
+    # rows are [index of activity, index of biosphere flow, -value]
+    coordinates = np.array(
+        [row for row in export.create_B_matrix_coordinates() if row], dtype=float
+    ).reshape(-1, 3)
+    biosphere = nsp.csr_matrix(
+        (
+            coordinates[:, 2] * -1,
+            (coordinates[:, 1].astype(int), coordinates[:, 0].astype(int)),
+        ),
+        shape=(len(create_index_of_biosphere_flows_matrix(version)), size),
+    )
+
+    return technosphere, biosphere
+
+
+def get_method_characterization_vector(method: tuple, version: str) -> np.ndarray:
+    """
+    Return the characterization factors of a Brightway LCIA method,
+    ordered as the rows of the biosphere matrix.
+    Only the biosphere flows and methods of the current Brightway project are used.
+    :param method: name of the Brightway method
+    :param version: ecoinvent version
+    :return: characterization vector
+    """
+
+    import bw2data
+
+    return _get_method_characterization_vector(
+        method, version, bw2data.projects.current
+    )
+
+
+@lru_cache
+def _get_method_characterization_vector(
+    method: tuple, version: str, project: str
+) -> np.ndarray:
+    """
+    Cached version of :func:`get_method_characterization_vector`.
+    :param method: name of the Brightway method
+    :param version: ecoinvent version
+    :param project: name of the current Brightway project,
+        so that the vectors of different projects are cached separately
+    :return: characterization vector
+    """
+
+    import bw2data
+
+    if method not in bw2data.methods:
+        raise ValueError(f"The method {method} is not in the current project.")
+
+    index = create_codes_index_of_biosphere_flows_matrix(version)
+    vector = np.zeros(len(index))
+
+    for cf in bw2data.Method(method).load():
+        flow, factor = cf[0], cf[1]
+
+        if isinstance(flow, (tuple, list)):
+            code = flow[1]
+        else:
+            code = bw2data.get_activity(flow)["code"]
+
+        if isinstance(factor, dict):
+            factor = factor["amount"]
+
+        if code in index:
+            vector[index[code]] += factor
+
+    return vector
+
+
+def get_characterization_vector(factors: dict, version: str) -> np.ndarray:
+    """
+    Return characterization factors, ordered as the rows of the biosphere matrix.
+    :param factors: characterization factors, with
+        (name, compartment, subcompartment, unit) of biosphere flows as keys
+    :param version: ecoinvent version
+    :return: characterization vector
+    """
+
+    index = create_index_of_biosphere_flows_matrix(version)
+    vector = np.zeros(len(index))
+
+    for flow, factor in factors.items():
+        if flow not in index:
+            raise ValueError(f"Unknown biosphere flow {flow}.")
+        vector[index[flow]] = factor
+
+    return vector
+
+
+def quick_lcia(
+    scenario: dict,
+    activities: List[tuple],
+    methods: Union[List[tuple], Dict[str, dict]],
+    version: str,
+) -> pd.DataFrame:
+    """
+    Calculate the impact scores of one unit of the given activities,
+    for a scenario database.
+    The technosphere matrix is factorized once, and solved for all activities.
+    :param scenario: scenario, with a `database`
+    :param activities: list of (name, reference product) or
+        (name, reference product, location). Without location,
+        the activity is assessed in all its locations.
+    :param methods: list of Brightway methods, or dictionary with method names
+        as keys and characterization factors as values
+        (see `get_characterization_vector()`)
+    :param version: ecoinvent version
+    :return: dataframe with one row per activity and one column per method
+    """
+
+    if isinstance(methods, dict):
+        vectors = {
+            name: get_characterization_vector(factors, version)
+            for name, factors in methods.items()
+        }
+    else:
+        vectors = {
+            " - ".join(method): get_method_characterization_vector(
+                tuple(method), version
+            )
+            for method in methods
+        }
+
+    selection = [
+        ds
+        for ds in scenario["database"]
+        if any(
+            (ds["name"], ds["reference product"]) == tuple(activity[:2])
+            and (len(activity) < 3 or ds["location"] == activity[2])
+            for activity in activities
+        )
+    ]
+
+    if not selection:
+        raise ValueError("None of the activities are in the database.")
+
+    technosphere, biosphere = build_lca_matrices(scenario, version)
+
+    index_A = create_index_of_A_matrix(scenario["database"])
+    demand = np.zeros((technosphere.shape[0], len(selection)))
+    for col, ds in enumerate(selection):
+        demand[
+            index_A[(ds["name"], ds["reference product"], ds["unit"], ds["location"])],
+            col,
+        ] = 1
+
+    supply = splu(technosphere).solve(demand)
+    inventory = biosphere @ supply
+
+    return pd.DataFrame(
+        [
+            [
+                scenario["model"],
+                scenario["pathway"],
+                scenario["year"],
+                ds["name"],
+                ds["reference product"],
+                ds["location"],
+                ds["unit"],
+            ]
+            + [vector @ inventory[:, col] for vector in vectors.values()]
+            for col, ds in enumerate(selection)
+        ],
+        columns=[
+            "model",
+            "pathway",
+            "year",
+            "name",
+            "reference product",
+            "location",
+            "unit",
+        ]
+        + list(vectors),
+    )
@@ -1,11 +1,19 @@
+import atexit
 import logging.config
+import multiprocessing
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
+from queue import Queue
+from typing import Dict, List
 
+import pandas as pd
 import yaml
 
 from .filesystem_constants import DATA_DIR
 
 LOG_CONFIG = DATA_DIR / "utils" / "logging" / "logconfig.yaml"
+LOG_REPORTING_FILEPATH = DATA_DIR / "utils" / "logging" / "reporting.yaml"
 DIR_LOG_REPORT = Path.cwd() / "export" / "logs"
 
 # if DIR_LOG_REPORT folder does not exist
@@ -14,12 +22,205 @@ if not Path(DIR_LOG_REPORT).exists():
     Path(DIR_LOG_REPORT).mkdir(parents=True, exist_ok=True)
 
 
+# queue through which log records of worker processes are passed
+# to the listener of the main process, and the listener itself
+LOG_MANAGER = None
+LOG_QUEUE = None
+LOG_LISTENER = None
+
+
 def create_logger(handler):
-    """Create a logger with the given handler."""
-    with open(LOG_CONFIG, "r") as f:
-        config = yaml.safe_load(f.read())
-        logging.config.dictConfig(config)
+    """
+    Create a logger with the given name, as a child of the `premise` logger.
+    Its records are written by the handlers of the `premise` logger.
+    """
+
+    return logging.getLogger(f"premise.{handler}")
+
+
+def configure_logging() -> None:
+    """
+    Set the handlers of logconfig.yaml on the `premise` logger,
+    unless it already has handlers.
+    The main process writes its records with these handlers directly.
+    """
+
+    if not logging.getLogger("premise").handlers:
+        with open(LOG_CONFIG, "r") as f:
+            config = yaml.safe_load(f.read())
+            logging.config.dictConfig(config)
+
+
+def get_log_queue() -> Queue:
+    """
+    Return the queue through which the `premise` loggers of worker processes
+    pass their records to a single listener in the main process,
+    which writes them with the handlers of logconfig.yaml.
+    Records from different processes are therefore never interleaved,
+    and logging does not block the workers.
+    The queue is held by a manager process, so that records put by
+    a worker are not lost when the pool of workers is terminated.
+    The manager and the listener are started on the first call,
+    i.e., when the first pool of workers is created.
+    :return: log queue
+    """
+
+    global LOG_MANAGER, LOG_QUEUE, LOG_LISTENER
+
+    if LOG_QUEUE is None:
+        configure_logging()
+
+        LOG_MANAGER = multiprocessing.Manager()
+        LOG_QUEUE = LOG_MANAGER.Queue()
+        LOG_LISTENER = QueueListener(
+            LOG_QUEUE,
+            *logging.getLogger("premise").handlers,
+            respect_handler_level=True,
+        )
+        LOG_LISTENER.start()
+        atexit.register(stop_log_listener)
+
+    return LOG_QUEUE
+
+
+def stop_log_listener() -> None:
+    """
+    Write the pending log records, stop the log listener,
+    and close the handlers of the `premise` logger.
+    """
+
+    global LOG_MANAGER, LOG_QUEUE, LOG_LISTENER
+
+    if LOG_LISTENER is not None:
+        LOG_LISTENER.stop()
+        LOG_MANAGER.shutdown()
+        LOG_MANAGER, LOG_QUEUE, LOG_LISTENER = None, None, None
+
+    logger = logging.getLogger("premise")
+    for handler in logger.handlers:
+        handler.close()
+    logger.handlers = []
+
+
+def configure_worker_logging(queue: Queue) -> None:
+    """
+    Send the records of the `premise` loggers to `queue`.
+    Used as initializer of worker processes.
+    :param queue: log queue, as returned by `get_log_queue()`
+    """
+
+    logger = logging.getLogger("premise")
+    logger.handlers = [QueueHandler(queue)]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+@lru_cache
+def get_reporting_metadata() -> dict:
+    """
+    Read reporting.yaml, which describes the columns
+    and the report tab of each change log.
+    :return: dictionary with log names as keys
+    """
+
+    with open(LOG_REPORTING_FILEPATH, "r", encoding="utf-8") as stream:
+        return yaml.safe_load(stream)
+
+
+class ChangeLog:
+    """
+    In-memory record of the changes made to a scenario database.
+    Changes are stored column-wise, per log (e.g., "premise_electricity"),
+    following the columns listed in reporting.yaml.
+    A change log is returned by worker processes along with the scenario
+    it describes, and change logs of several scenarios can be merged.
+    """
+
+    def __init__(self) -> None:
+        self.logs: Dict[str, Dict[str, list]] = {}
+
+    def __len__(self) -> int:
+        return sum(
+            len(next(iter(columns.values()), [])) for columns in self.logs.values()
+        )
+
+    def add(self, log_name: str, values: list) -> None:
+        """
+        Add a row to a log.
+        :param log_name: name of the log, as in reporting.yaml
+        :param values: values of the row, in the order of the log columns
+        """
+
+        if log_name not in self.logs:
+            self.logs[log_name] = {
+                column: [] for column in get_reporting_metadata()[log_name]["columns"]
+            }
+
+        columns = self.logs[log_name]
+
+        if len(values) != len(columns):
+            raise ValueError(
+                f"Expected {len(columns)} values for {log_name}, got {len(values)}."
+            )
+
+        for column, value in zip(columns.values(), values):
+            column.append(value)
+
+    def extend(self, *change_logs: "ChangeLog") -> None:
+        """
+        Append the rows of other change logs to this one.
+        :param change_logs: change logs to append
+        """
+
+        for change_log in change_logs:
+            for log_name, columns in change_log.logs.items():
+                if log_name not in self.logs:
+                    self.logs[log_name] = {column: [] for column in columns}
+                for column, values in columns.items():
+                    self.logs[log_name][column].extend(values)
+
+    def to_dataframes(self) -> Dict[str, pd.DataFrame]:
+        """
+        Return one dataframe per log.
+        Missing values are NaN, so that numerical columns are typed as such.
+        :return: dictionary with log names as keys and dataframes as values
+        """
+
+        return {
+            log_name: pd.DataFrame(columns) for log_name, columns in self.logs.items()
+        }
+
+    def write(self, directory: Path, fmt: str = "parquet") -> List[Path]:
+        """
+        Write each log to a file in `directory`.
+        :param directory: directory to write the files in
+        :param fmt: "parquet" or "csv"
+        :return: list of the filepaths written
+        """
+
+        if fmt not in ("parquet", "csv"):
+            raise ValueError(f"Unknown format {fmt}")
+
+        Path(directory).mkdir(parents=True, exist_ok=True)
+
+        filepaths = []
+        for log_name, dataframe in self.to_dataframes().items():
+            filepath = Path(directory) / f"{log_name}.{fmt}"
+            if fmt == "parquet":
+                dataframe.to_parquet(filepath, index=False)
+            else:
+                dataframe.to_csv(filepath, index=False)
+            filepaths.append(filepath)
+
+        return filepaths
+
 
-    logger = logging.getLogger(handler)
+def add_to_change_log(scenario: dict, *change_logs: ChangeLog) -> None:
+    """
+    Append change logs to the change log of a scenario,
+    so that they are returned along with the scenario by worker processes.
+    :param scenario: scenario dictionary
+    :param change_logs: change logs to append
+    """
 
-    return logger
+    scenario.setdefault("change log", ChangeLog()).extend(*change_logs)
@@ -2,23 +2,25 @@
 This module export a summary of scenario to an Excel file.
 """
 
-import os
+from collections import defaultdict
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
+from typing import List, Tuple
 
 import openpyxl
 import pandas as pd
 import xarray as xr
 import yaml
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.chart import AreaChart, LineChart, Reference
 from openpyxl.styles import Font
 from openpyxl.utils import get_column_letter
-from openpyxl.utils.dataframe import dataframe_to_rows
-from openpyxl.worksheet.dimensions import ColumnDimension, DimensionHolder
-from pandas.errors import EmptyDataError
 
 from . import __version__
+from .data_collection import IAMDataCollection
 from .filesystem_constants import DATA_DIR, VARIABLES_DIR
+from .logger import ChangeLog, get_reporting_metadata
 
 IAM_ELEC_VARS = VARIABLES_DIR / "electricity_variables.yaml"
 IAM_FUELS_VARS = VARIABLES_DIR / "fuels_variables.yaml"
@@ -31,9 +33,6 @@ IAM_CARBON_CAPTURE_VARS = VARIABLES_DIR / "carbon_capture_variables.yaml"
 REPORT_METADATA_FILEPATH = DATA_DIR / "utils" / "report" / "report.yaml"
 VEHICLES_MAP = DATA_DIR / "transport" / "vehicles_map.yaml"
 
-LOG_REPORTING_FILEPATH = DATA_DIR / "utils" / "logging" / "reporting.yaml"
-# directory for log files
-DIR_LOGS = Path.cwd() / "export" / "logs"
 DIR_LOG_REPORT = Path.cwd() / "export" / "change reports"
 
 # if DIR_LOG_REPORT folder does not exist
@@ -42,6 +41,208 @@ if not Path(DIR_LOG_REPORT).exists():
     Path(DIR_LOG_REPORT).mkdir(parents=True, exist_ok=True)
 
 
+REPORT_SECTORS = {
+    "Population": {
+        "array": "other_vars",
+        "filepath": IAM_OTHER_VARS,
+        "variables": [
+            "population",
+        ],
+    },
+    "GDP": {
+        "array": "other_vars",
+        "filepath": IAM_OTHER_VARS,
+        "variables": [
+            "gdp",
+        ],
+    },
+    "CO2": {
+        "array": "other_vars",
+        "filepath": IAM_OTHER_VARS,
+        "variables": [
+            "CO2",
+        ],
+    },
+    "GMST": {
+        "array": "other_vars",
+        "filepath": IAM_OTHER_VARS,
+        "variables": [
+            "GMST",
+        ],
+    },
+    "Electricity - generation": {
+        "array": "production_volumes",
+        "filepath": IAM_ELEC_VARS,
+    },
+    "Electricity (biom) - generation": {
+        "array": "production_volumes",
+        "filepath": IAM_BIOMASS_VARS,
+    },
+    "Electricity - efficiency": {
+        "array": "electricity_efficiencies",
+        "filepath": IAM_ELEC_VARS,
+    },
+    "Fuel (gasoline) - generation": {
+        "array": "production_volumes",
+        "filepath": IAM_FUELS_VARS,
+        "filter": ["gasoline", "ethanol", "bioethanol", "methanol"],
+    },
+    "Fuel (gasoline) - efficiency": {
+        "array": "petrol_efficiencies",
+        "filepath": IAM_FUELS_VARS,
+        "filter": ["gasoline", "ethanol", "bioethanol", "methanol"],
+    },
+    "Fuel (diesel) - generation": {
+        "array": "production_volumes",
+        "filepath": IAM_FUELS_VARS,
+        "filter": [
+            "diesel",
+            "biodiesel",
+        ],
+    },
+    "Fuel (diesel) - efficiency": {
+        "array": "diesel_efficiencies",
+        "filepath": IAM_FUELS_VARS,
+        "filter": [
+            "diesel",
+            "biodiesel",
+        ],
+    },
+    "Fuel (gas) - generation": {
+        "array": "production_volumes",
+        "filepath": IAM_FUELS_VARS,
+        "filter": ["natural gas", "biogas", "methane", "biomethane"],
+    },
+    "Fuel (gas) - efficiency": {
+        "array": "gas_efficiencies",
+        "filepath": IAM_FUELS_VARS,
+        "filter": ["natural gas", "biogas", "methane", "biomethane"],
+    },
+    "Fuel (hydrogen) - generation": {
+        "array": "production_volumes",
+        "filepath": IAM_FUELS_VARS,
+        "filter": [
+            "hydrogen",
+        ],
+    },
+    "Fuel (hydrogen) - efficiency": {
+        "array": "hydrogen_efficiencies",
+        "filepath": IAM_FUELS_VARS,
+        "filter": [
+            "hydrogen",
+        ],
+    },
+    "Fuel (kerosene) - generation": {
+        "array": "production_volumes",
+        "filepath": IAM_FUELS_VARS,
+        "filter": [
+            "kerosene",
+        ],
+    },
+    "Fuel (kerosene) - efficiency": {
+        "array": "kerosene_efficiencies",
+        "filepath": IAM_FUELS_VARS,
+        "filter": [
+            "kerosene",
+        ],
+    },
+    "Fuel (LPG) - generation": {
+        "array": "production_volumes",
+        "filepath": IAM_FUELS_VARS,
+        "filter": [
+            "liquefied petroleum gas",
+        ],
+    },
+    "Fuel (LPG) - efficiency": {
+        "array": "lpg_efficiencies",
+        "filepath": IAM_FUELS_VARS,
+        "filter": [
+            "liquefied petroleum gas",
+        ],
+    },
+    "Cement - generation": {
+        "array": "production_volumes",
+        "filepath": IAM_CEMENT_VARS,
+    },
+    "Cement - efficiency": {
+        "array": "cement_efficiencies",
+        "filepath": IAM_CEMENT_VARS,
+    },
+    "Cement - CCS": {
+        "array": "carbon_capture_rate",
+        "filepath": IAM_CARBON_CAPTURE_VARS,
+        "variables": ["cement"],
+    },
+    "Steel - generation": {
+        "array": "production_volumes",
+        "filepath": IAM_STEEL_VARS,
+    },
+    "Steel - efficiency": {
+        "array": "steel_efficiencies",
+        "filepath": IAM_STEEL_VARS,
+    },
+    "Steel - CCS": {
+        "array": "carbon_capture_rate",
+        "filepath": IAM_CARBON_CAPTURE_VARS,
+        "variables": ["steel"],
+    },
+    "Direct Air Capture - generation": {
+        "array": "production_volumes",
+        "filepath": IAM_DACCS_VARS,
+        "variables": ["dac_solvent"],
+    },
+    "Direct Air Capture - heat eff.": {
+        "array": "dac_heat_efficiencies",
+        "filepath": IAM_DACCS_VARS,
+        "variables": ["dac_solvent"],
+    },
+    "Direct Air Capture - elec eff.": {
+        "array": "dac_electricity_efficiencies",
+        "filepath": IAM_DACCS_VARS,
+        "variables": ["dac_solvent"],
+    },
+    "Transport (cars)": {
+        "array": "trsp_cars",
+        "filepath": VEHICLES_MAP,
+        "variables": [
+            "BEV",
+            "FCEV",
+            "ICEV-d",
+            "ICEV-g",
+            "ICEV-p",
+            "PHEV-d",
+            "PHEV-p",
+        ],
+    },
+    "Transport (buses)": {
+        "array": "trsp_buses",
+        "filepath": VEHICLES_MAP,
+        "variables": [
+            "BEV",
+            "FCEV",
+            "ICEV-d",
+            "ICEV-g",
+            "ICEV-p",
+            "PHEV-d",
+            "PHEV-p",
+        ],
+    },
+    "Transport (trucks)": {
+        "array": "trsp_trucks",
+        "filepath": VEHICLES_MAP,
+        "variables": [
+            "BEV",
+            "FCEV",
+            "ICEV-d",
+            "ICEV-g",
+            "ICEV-p",
+            "PHEV-d",
+            "PHEV-p",
+        ],
+    },
+}
+
+
 def get_variables(
     filepath,
 ):
@@ -55,447 +256,276 @@ def get_variables(
     return list(out.keys())
 
 
+@lru_cache
+def get_sector_variables(sector: str) -> Tuple[str, ...]:
+    """
+    Return the report variables of a sector.
+    :param sector: sector name, as in `REPORT_SECTORS`
+    :return: tuple of variables
+    """
+
+    sector_specs = REPORT_SECTORS[sector]
+
+    if "variables" in sector_specs:
+        return tuple(sector_specs["variables"])
+
+    variables = get_variables(sector_specs["filepath"])
+    if "filter" in sector_specs:
+        variables = [
+            x for x in variables if any(x.startswith(y) for y in sector_specs["filter"])
+        ]
+
+    return tuple(variables)
+
+
 def fetch_data(
-    iam_data: xr.DataArray, sector: str, variable: str
+    iam_data: IAMDataCollection, sector: str, variable: List[str]
 ) -> [xr.DataArray, None]:
-    data = {
-        "Population": iam_data.other_vars if hasattr(iam_data, "other_vars") else None,
-        "GDP": iam_data.other_vars if hasattr(iam_data, "other_vars") else None,
-        "CO2": iam_data.other_vars if hasattr(iam_data, "other_vars") else None,
-        "GMST": iam_data.other_vars if hasattr(iam_data, "other_vars") else None,
-        "Electricity - generation": iam_data.production_volumes
-        if hasattr(iam_data, "production_volumes")
-        else None,
-        "Electricity (biom) - generation": iam_data.production_volumes
-        if hasattr(iam_data, "production_volumes")
-        else None,
-        "Electricity - efficiency": iam_data.electricity_efficiencies
-        if hasattr(iam_data, "electricity_efficiencies")
-        else None,
-        "Fuel (gasoline) - generation": iam_data.production_volumes
-        if hasattr(iam_data, "production_volumes")
-        else None,
-        "Fuel (gasoline) - efficiency": iam_data.petrol_efficiencies
-        if hasattr(iam_data, "petrol_efficiencies")
-        else None,
-        "Fuel (diesel) - generation": iam_data.production_volumes
-        if hasattr(iam_data, "production_volumes")
-        else None,
-        "Fuel (diesel) - efficiency": iam_data.diesel_efficiencies
-        if hasattr(iam_data, "diesel_efficiencies")
-        else None,
-        "Fuel (gas) - generation": iam_data.production_volumes
-        if hasattr(iam_data, "production_volumes")
-        else None,
-        "Fuel (gas) - efficiency": iam_data.gas_efficiencies
-        if hasattr(iam_data, "gas_efficiencies")
-        else None,
-        "Fuel (hydrogen) - generation": iam_data.production_volumes
-        if hasattr(iam_data, "production_volumes")
-        else None,
-        "Fuel (hydrogen) - efficiency": iam_data.hydrogen_efficiencies
-        if hasattr(iam_data, "hydrogen_efficiencies")
-        else None,
-        "Fuel (kerosene) - generation": iam_data.production_volumes
-        if hasattr(iam_data, "production_volumes")
-        else None,
-        "Fuel (kerosene) - efficiency": iam_data.kerosene_efficiencies
-        if hasattr(iam_data, "hydrogen_efficiencies")
-        else None,
-        "Fuel (LPG) - generation": iam_data.production_volumes
-        if hasattr(iam_data, "production_volumes")
-        else None,
-        "Fuel (LPG) - efficiency": iam_data.lpg_efficiencies
-        if hasattr(iam_data, "hydrogen_efficiencies")
-        else None,
-        "Cement - generation": iam_data.production_volumes
-        if hasattr(iam_data, "production_volumes")
-        else None,
-        "Cement - efficiency": iam_data.cement_efficiencies
-        if hasattr(iam_data, "cement_efficiencies")
-        else None,
-        "Cement - CCS": iam_data.carbon_capture_rate
-        if hasattr(iam_data, "carbon_capture_rate")
-        else None,
-        "Steel - generation": iam_data.production_volumes
-        if hasattr(iam_data, "production_volumes")
-        else None,
-        "Steel - efficiency": iam_data.steel_efficiencies
-        if hasattr(iam_data, "steel_efficiencies")
-        else None,
-        "Steel - CCS": iam_data.carbon_capture_rate
-        if hasattr(iam_data, "carbon_capture_rate")
-        else None,
-        "Direct Air Capture - generation": iam_data.production_volumes
-        if hasattr(iam_data, "production_volumes")
-        else None,
-        "Direct Air Capture - heat eff.": iam_data.dac_heat_efficiencies
-        if hasattr(iam_data, "dac_heat_efficiencies")
-        else None,
-        "Direct Air Capture - elec eff.": iam_data.dac_electricity_efficiencies
-        if hasattr(iam_data, "dac_electricity_efficiencies")
-        else None,
-        "Transport (cars)": iam_data.trsp_cars
-        if hasattr(iam_data, "trsp_cars")
-        else None,
-        "Transport (buses)": iam_data.trsp_buses
-        if hasattr(iam_data, "trsp_buses")
-        else None,
-        "Transport (trucks)": iam_data.trsp_trucks
-        if hasattr(iam_data, "trsp_trucks")
-        else None,
-    }
-
-    if data[sector] is not None:
-        iam_data = data[sector]
-
-        if any(x in sector for x in ["car", "bus", "truck"]):
-            iam_data = iam_data.sum(dim=["size", "construction_year"])
-            iam_data = iam_data.rename({"powertrain": "variables"}).T
-
-        return iam_data.sel(
-            variables=[v for v in variable if v in iam_data.coords["variables"].values]
-        )
-    else:
+    """
+    Return the IAM data of a sector, for the given variables.
+    :param iam_data: IAM data of the scenario
+    :param sector: sector name, as in `REPORT_SECTORS`
+    :param variable: list of variables to select
+    :return: data array, or None if the IAM data does not cover the sector
+    """
+
+    data = getattr(iam_data, REPORT_SECTORS[sector]["array"], None)
+
+    if data is None:
         return None
 
+    if any(x in sector for x in ["car", "bus", "truck"]):
+        data = data.sum(dim=["size", "construction_year"])
+        data = data.rename({"powertrain": "variables"}).T
+
+    return data.sel(
+        variables=[v for v in variable if v in data.coords["variables"].values]
+    )
+
+
+def fetch_report_data(iam_data: IAMDataCollection) -> pd.DataFrame:
+    """
+    Extract all the report variables of a scenario, for all regions
+    and years up to 2100, as one tidy table.
+    :param iam_data: IAM data of the scenario
+    :return: dataframe with the columns `sector`, `region`,
+        `variable`, `year` and `value`
+    """
+
+    tables = []
+
+    for sector in REPORT_SECTORS:
+        data = fetch_data(iam_data, sector, get_sector_variables(sector))
+
+        if data is None or data.sizes["variables"] == 0:
+            continue
+
+        data = data.sel(year=data.year.values[data.year.values <= 2100])
+
+        table = (
+            data.transpose("region", "year", "variables")
+            .to_series()
+            .reset_index(name="value")
+            .rename(columns={"variables": "variable"})
+        )
+        table.insert(0, "sector", sector)
+        tables.append(table)
+
+    if not tables:
+        return pd.DataFrame(columns=["sector", "region", "variable", "year", "value"])
+
+    return pd.concat(tables, ignore_index=True)
 
-def generate_summary_report(scenarios: list, filename: Path) -> None:
+
+def generate_summary_report(scenarios: list, filename: Path, fmt: str = None) -> None:
     """
     Generate a summary report of the scenarios.
+    The report data of each scenario is extracted once, as a tidy table,
+    and each worksheet is laid out in memory before being written
+    row by row with a write-only workbook.
+    :param scenarios: list of scenarios
+    :param filename: filepath of the Excel report
+    :param fmt: if "parquet" or "csv", the report data is also written
+        in this format, next to the Excel report
     """
 
-    SECTORS = {
-        "Population": {
-            "filepath": IAM_OTHER_VARS,
-            "variables": [
-                "population",
-            ],
-        },
-        "GDP": {
-            "filepath": IAM_OTHER_VARS,
-            "variables": [
-                "gdp",
-            ],
-        },
-        "CO2": {
-            "filepath": IAM_OTHER_VARS,
-            "variables": [
-                "CO2",
-            ],
-        },
-        "GMST": {
-            "filepath": IAM_OTHER_VARS,
-            "variables": [
-                "GMST",
-            ],
-        },
-        "Electricity - generation": {
-            "filepath": IAM_ELEC_VARS,
-        },
-        "Electricity (biom) - generation": {
-            "filepath": IAM_BIOMASS_VARS,
-        },
-        "Electricity - efficiency": {
-            "filepath": IAM_ELEC_VARS,
-        },
-        "Fuel (gasoline) - generation": {
-            "filepath": IAM_FUELS_VARS,
-            "filter": ["gasoline", "ethanol", "bioethanol", "methanol"],
-        },
-        "Fuel (gasoline) - efficiency": {
-            "filepath": IAM_FUELS_VARS,
-            "filter": ["gasoline", "ethanol", "bioethanol", "methanol"],
-        },
-        "Fuel (diesel) - generation": {
-            "filepath": IAM_FUELS_VARS,
-            "filter": [
-                "diesel",
-                "biodiesel",
-            ],
-        },
-        "Fuel (diesel) - efficiency": {
-            "filepath": IAM_FUELS_VARS,
-            "filter": [
-                "diesel",
-                "biodiesel",
-            ],
-        },
-        "Fuel (gas) - generation": {
-            "filepath": IAM_FUELS_VARS,
-            "filter": ["natural gas", "biogas", "methane", "biomethane"],
-        },
-        "Fuel (gas) - efficiency": {
-            "filepath": IAM_FUELS_VARS,
-            "filter": ["natural gas", "biogas", "methane", "biomethane"],
-        },
-        "Fuel (hydrogen) - generation": {
-            "filepath": IAM_FUELS_VARS,
-            "filter": [
-                "hydrogen",
-            ],
-        },
-        "Fuel (hydrogen) - efficiency": {
-            "filepath": IAM_FUELS_VARS,
-            "filter": [
-                "hydrogen",
-            ],
-        },
-        "Fuel (kerosene) - generation": {
-            "filepath": IAM_FUELS_VARS,
-            "filter": [
-                "kerosene",
-            ],
-        },
-        "Fuel (kerosene) - efficiency": {
-            "filepath": IAM_FUELS_VARS,
-            "filter": [
-                "kerosene",
-            ],
-        },
-        "Fuel (LPG) - generation": {
-            "filepath": IAM_FUELS_VARS,
-            "filter": [
-                "liquefied petroleum gas",
-            ],
-        },
-        "Fuel (LPG) - efficiency": {
-            "filepath": IAM_FUELS_VARS,
-            "filter": [
-                "liquefied petroleum gas",
-            ],
-        },
-        "Cement - generation": {
-            "filepath": IAM_CEMENT_VARS,
-        },
-        "Cement - efficiency": {
-            "filepath": IAM_CEMENT_VARS,
-        },
-        "Cement - CCS": {
-            "filepath": IAM_CARBON_CAPTURE_VARS,
-            "variables": ["cement"],
-        },
-        "Steel - generation": {
-            "filepath": IAM_STEEL_VARS,
-        },
-        "Steel - efficiency": {
-            "filepath": IAM_STEEL_VARS,
-        },
-        "Steel - CCS": {
-            "filepath": IAM_CARBON_CAPTURE_VARS,
-            "variables": ["steel"],
-        },
-        "Direct Air Capture - generation": {
-            "filepath": IAM_DACCS_VARS,
-            "variables": ["dac_solvent"],
-        },
-        "Direct Air Capture - heat eff.": {
-            "filepath": IAM_DACCS_VARS,
-            "variables": ["dac_solvent"],
-        },
-        "Direct Air Capture - elec eff.": {
-            "filepath": IAM_DACCS_VARS,
-            "variables": ["dac_solvent"],
-        },
-        "Transport (cars)": {
-            "filepath": VEHICLES_MAP,
-            "variables": [
-                "BEV",
-                "FCEV",
-                "ICEV-d",
-                "ICEV-g",
-                "ICEV-p",
-                "PHEV-d",
-                "PHEV-p",
-            ],
-        },
-        "Transport (buses)": {
-            "filepath": VEHICLES_MAP,
-            "variables": [
-                "BEV",
-                "FCEV",
-                "ICEV-d",
-                "ICEV-g",
-                "ICEV-p",
-                "PHEV-d",
-                "PHEV-p",
-            ],
-        },
-        "Transport (trucks)": {
-            "filepath": VEHICLES_MAP,
-            "variables": [
-                "BEV",
-                "FCEV",
-                "ICEV-d",
-                "ICEV-g",
-                "ICEV-p",
-                "PHEV-d",
-                "PHEV-p",
-            ],
-        },
-    }
+    if fmt not in (None, "parquet", "csv"):
+        raise ValueError(f"Unknown format {fmt}")
 
     with open(REPORT_METADATA_FILEPATH, "r", encoding="utf-8") as stream:
         metadata = yaml.safe_load(stream)
 
-    workbook = openpyxl.Workbook()
-    workbook.remove(workbook.active)
+    # extract the report data of each IAM scenario,
+    # and pivot it per sector: rows are (region, year), columns are variables
+    report_data, tables = {}, []
+    for scenario in scenarios:
+        if (scenario["model"], scenario["pathway"]) in report_data:
+            continue
 
-    for sector, filepath in SECTORS.items():
-        if "variables" in filepath:
-            variables = filepath["variables"]
-        else:
-            variables = get_variables(filepath["filepath"])
-            if "filter" in filepath:
-                variables = [
-                    x for x in variables if any(x.startswith(y) for y in filepath["filter"])
-                ]
+        table = fetch_report_data(scenario["iam data"])
+        tables.append(
+            table.assign(model=scenario["model"], pathway=scenario["pathway"])
+        )
+
+        pivots = {
+            sector: sector_table.pivot(
+                index=["region", "year"], columns="variable", values="value"
+            )[pd.unique(sector_table["variable"])]
+            for sector, sector_table in table.groupby("sector", sort=False)
+        }
 
+        # sectors covered by the IAM data, even if none
+        # of their variables are, are laid out in the report
+        report_data[(scenario["model"], scenario["pathway"])] = {
+            sector: pivots.get(sector)
+            for sector, sector_data in REPORT_SECTORS.items()
+            if getattr(scenario["iam data"], sector_data["array"], None) is not None
+        }
+
+    workbook = openpyxl.Workbook(write_only=True)
+
+    for sector in REPORT_SECTORS:
         worksheet = workbook.create_sheet(sector)
 
+        # cells of the worksheet, as {row: {column: value}}
+        cells = defaultdict(dict)
+        charts = []
+
         col, row = (1, 1)
 
-        worksheet.cell(
-            column=col,
-            row=row,
-            value=metadata[sector]["expl_text"],
-        )
+        cells[row][col] = metadata[sector]["expl_text"]
 
         scenario_list = []
 
         last_col_used = 0
 
         for scenario_idx, scenario in enumerate(scenarios):
-            if (scenario["model"], scenario["pathway"]) not in scenario_list:
-                iam_data = fetch_data(
-                    iam_data=scenario["iam data"],
-                    sector=sector,
-                    variable=variables,
-                )
+            if (scenario["model"], scenario["pathway"]) in scenario_list:
+                continue
 
-                if iam_data is None:
+            if sector not in report_data[(scenario["model"], scenario["pathway"])]:
+                continue
+
+            data = report_data[(scenario["model"], scenario["pathway"])][sector]
+
+            if scenario_idx > 0:
+                col = last_col_used + metadata[sector]["offset"]
+
+            row = 3
+
+            title = WriteOnlyCell(
+                worksheet,
+                value=f"{scenario['model'].upper()} - {scenario['pathway'].upper()}",
+            )
+            title.font = Font(bold=True, size=14, underline="single")
+            cells[row][col] = title
+
+            row += 2
+
+            regions = data.index.unique(level="region") if data is not None else []
+
+            for region in scenario["iam data"].regions:
+                if sector == "GMST" and region != "World":
                     continue
 
-                if scenario_idx > 0:
-                    col = last_col_used + metadata[sector]["offset"]
+                cells[row][col] = region
 
-                row = 3
+                row += 3
+
+                if region not in regions:
+                    continue
 
-                worksheet.cell(
-                    column=col,
-                    row=row,
-                    value=f"{scenario['model'].upper()} - {scenario['pathway'].upper()}",
+                dataframe = data.loc[region]
+                dataframe = dataframe.astype(object).where(dataframe.notna(), None)
+
+                # header with the variables, then one row per year
+                for c_idx, variable in enumerate(dataframe.columns, col + 2):
+                    cells[row][c_idx] = variable
+                for r_idx, (year, values) in enumerate(
+                    zip(dataframe.index, dataframe.values), row + 1
+                ):
+                    cells[r_idx][col + 1] = int(year)
+                    for c_idx, value in enumerate(values, col + 2):
+                        cells[r_idx][c_idx] = value
+
+                counter = len(dataframe) + 1
+                last_col_used = col + 1 + len(dataframe.columns)
+
+                values = Reference(
+                    worksheet,
+                    min_col=col + 2,
+                    min_row=row,
+                    max_col=last_col_used,
+                    max_row=row + counter - 1,
                 )
-                worksheet.cell(column=col, row=row).font = Font(
-                    bold=True, size=14, underline="single"
+                cats = Reference(
+                    worksheet,
+                    min_col=col + 1,
+                    min_row=row + 1,
+                    max_row=row + counter - 1,
                 )
 
-                row += 2
-
-                for region in scenario["iam data"].regions:
-                    if sector == "GMST" and region != "World":
-                        continue
-
-                    worksheet.cell(column=col, row=row, value=region)
-
-                    row += 3
-
-                    dataframe = iam_data.sel(
-                        variables=[
-                            v for v in variables if v in iam_data.variables.values
-                        ],
-                        region=region,
-                        year=[y for y in iam_data.coords["year"].values if y <= 2100],
-                    )
-
-                    if len(dataframe) > 0:
-                        dataframe = dataframe.to_dataframe("val")
-                        dataframe = dataframe.unstack()["val"]
-                        dataframe = dataframe.T
-                        dataframe = dataframe.rename_axis(index=None)
-
-                        data = dataframe_to_rows(dataframe)
-
-                        counter = 0
-                        for _, data_row in enumerate(data, 1):
-                            if data_row != [None]:
-                                for c_idx, value in enumerate(data_row, 1):
-                                    worksheet.cell(
-                                        row=row + counter,
-                                        column=col + c_idx,
-                                        value=value,
-                                    )
-                                    last_col_used = col + c_idx
-                                counter += 1
-
-                        values = Reference(
-                            worksheet,
-                            min_col=col + 2,
-                            min_row=row,
-                            max_col=col + c_idx,
-                            max_row=row + counter - 1,
-                        )
-                        cats = Reference(
-                            worksheet,
-                            min_col=col + 1,
-                            min_row=row + 1,
-                            max_row=row + counter - 1,
-                        )
-
-                        if "generation" in sector:
-                            chart = AreaChart(grouping="stacked")
-                        elif "efficiency" in sector:
-                            chart = LineChart()
-                        elif "CCS" in sector:
-                            chart = AreaChart()
-                        elif "Transport" in sector:
-                            chart = AreaChart(grouping="stacked")
-                        else:
-                            chart = LineChart()
-
-                        chart.add_data(values, titles_from_data=True)
-                        chart.set_categories(cats)
-                        chart.title = f"{region} - {sector}"
-                        chart.y_axis.title = metadata[sector]["label"]
-                        chart.height = 8
-                        chart.width = 16
-                        chart.anchor = f"{get_column_letter(col + 2)}{row + 1}"
-                        worksheet.add_chart(chart)
-
-                        row += counter + 2
-
-                scenario_list.append((scenario["model"], scenario["pathway"]))
+                if "generation" in sector:
+                    chart = AreaChart(grouping="stacked")
+                elif "efficiency" in sector:
+                    chart = LineChart()
+                elif "CCS" in sector:
+                    chart = AreaChart()
+                elif "Transport" in sector:
+                    chart = AreaChart(grouping="stacked")
+                else:
+                    chart = LineChart()
+
+                chart.add_data(values, titles_from_data=True)
+                chart.set_categories(cats)
+                chart.title = f"{region} - {sector}"
+                chart.y_axis.title = metadata[sector]["label"]
+                chart.height = 8
+                chart.width = 16
+                charts.append((chart, f"{get_column_letter(col + 2)}{row + 1}"))
+
+                row += counter + 2
+
+            scenario_list.append((scenario["model"], scenario["pathway"]))
+
+        for row in range(1, max(cells) + 1):
+            row_cells = cells.get(row, {})
+            worksheet.append(
+                [row_cells.get(c) for c in range(1, max(row_cells, default=0) + 1)]
+            )
+
+        for chart, anchor in charts:
+            worksheet.add_chart(chart, anchor)
 
     workbook.save(filename)
 
+    if fmt is not None:
+        table = pd.concat(tables, ignore_index=True)
+        table = table[
+            ["model", "pathway", "sector", "region", "variable", "year", "value"]
+        ]
+        if fmt == "parquet":
+            table.to_parquet(Path(filename).with_suffix(".parquet"), index=False)
+        else:
+            table.to_csv(Path(filename).with_suffix(".csv"), index=False)
 
-def generate_change_report(source, version, source_type, system_model):
+
+def generate_change_report(
+    source, version, source_type, system_model, change_log: ChangeLog, fmt="parquet"
+):
     """
-    Generate a change report of the scenarios from the log files.
+    Generate a change report of the scenarios from their change logs.
+    The Excel report is written with a write-only workbook, row by row,
+    and the change logs are also written as tables (Parquet or CSV).
+    :param change_log: change log of all the scenarios
+    :param fmt: format of the tables, "parquet" or "csv"
     """
 
     # create an Excel workbook
-    workbook = openpyxl.Workbook()
-    workbook.remove(workbook.active)
-
-    log_filepaths = [
-        "premise_dac",
-        "premise_biomass",
-        "premise_electricity",
-        "premise_fuel",
-        "premise_heat",
-        "premise_transport",
-        "premise_steel",
-        "premise_metal",
-        "premise_cement",
-        "premise_emissions",
-        "premise_external_scenarios",
-        "premise_validation",
-    ]
+    workbook = openpyxl.Workbook(write_only=True)
 
     # fetch YAML file containing the reporting metadata
-    with open(LOG_REPORTING_FILEPATH, "r") as f:
-        metadata = yaml.load(f, Loader=yaml.FullLoader)
+    metadata = get_reporting_metadata()
 
     # create a first tab
     # where is displayed
@@ -503,60 +533,53 @@ def generate_change_report(source, version, source_type, system_model):
     # the date of the report
     # and the name of the source database
     worksheet = workbook.create_sheet("Change report")
-    worksheet.cell(row=1, column=1, value="Library name")
-    worksheet.cell(row=1, column=2, value="Library version")
-    worksheet.cell(row=1, column=3, value="Report date")
-    worksheet.cell(row=1, column=4, value="Source database")
-    worksheet.cell(row=1, column=5, value="Source database format")
-    worksheet.cell(row=1, column=6, value="Database version")
-    worksheet.cell(row=1, column=7, value="Database system model")
-    worksheet.cell(row=2, column=1, value="premise")
-    worksheet.cell(row=2, column=2, value=".".join(map(str, __version__)))
-    worksheet.cell(row=2, column=3, value=datetime.now())
-    worksheet.cell(row=2, column=4, value=source)
-    worksheet.cell(row=2, column=5, value=source_type)
-    worksheet.cell(row=2, column=6, value=version)
-    worksheet.cell(row=2, column=7, value=system_model)
-
-    dim_holder = DimensionHolder(worksheet=worksheet)
-    for col in range(worksheet.min_column, worksheet.max_column + 1):
-        dim_holder[get_column_letter(col)] = ColumnDimension(
-            worksheet, min=col, max=col, width=20
-        )
+    for col in range(1, 8):
+        worksheet.column_dimensions[get_column_letter(col)].width = 20
+    worksheet.append(
+        [
+            "Library name",
+            "Library version",
+            "Report date",
+            "Source database",
+            "Source database format",
+            "Database version",
+            "Database system model",
+        ]
+    )
+    worksheet.append(
+        [
+            "premise",
+            ".".join(map(str, __version__)),
+            datetime.now(),
+            source,
+            source_type,
+            version,
+            system_model,
+        ]
+    )
 
-    worksheet.column_dimensions = dim_holder
+    tables = change_log.to_dataframes()
 
-    for filepath in log_filepaths:
-        fp = Path(DIR_LOGS / filepath).with_suffix(".log")
-        # check if log file exists
-        if not fp.is_file():
-            continue
-        # if file exists, check that it is not empty
-        if os.stat(fp).st_size == 0:
+    for log_name, log_metadata in metadata.items():
+        if log_name not in tables or len(tables[log_name]) == 0:
             continue
 
-        df = convert_log_to_excel_file(fp)
+        df = tables[log_name]
 
         # create a worksheet for this sector
-        worksheet = workbook.create_sheet(fetch_tab_name(filepath))
-
-        # add a description of each column
-        # in each row
-        for col, column in enumerate(fetch_columns(fp), 1):
-            worksheet.cell(
-                row=1,
-                column=col,
-                value=metadata[filepath]["columns"][column]["description"],
-            )
-            worksheet.cell(
-                row=2,
-                column=col,
-                value=metadata[filepath]["columns"][column].get("unit"),
-            )
+        worksheet = workbook.create_sheet(log_metadata["tab"])
+
+        # add a description and a unit of each column
+        columns = [log_metadata["columns"][column] for column in df.columns]
+        worksheet.append([column["description"] for column in columns])
+        worksheet.append([column.get("unit") for column in columns])
+        worksheet.append(list(df.columns))
 
         # add the df dataframe to the sheet
-        for r in dataframe_to_rows(df, index=False):
-            worksheet.append(r)
+        # missing values are left as empty cells
+        df = df.astype(object).where(df.notna(), None)
+        for row in df.itertuples(index=False, name=None):
+            worksheet.append(row)
 
     # save the workbook in the working directory
     # the file name is change_report with the current date
@@ -565,43 +588,4 @@ def generate_change_report(source, version, source_type, system_model):
     )
     workbook.save(fp)
 
-
-def fetch_columns(variable):
-    """
-    Read reporting.yaml which return
-    the columns for the variable.
-    """
-
-    with open(LOG_REPORTING_FILEPATH, "r", encoding="utf-8") as stream:
-        reporting = yaml.safe_load(stream)
-
-    return list(reporting[variable.stem]["columns"].keys())
-
-
-def fetch_tab_name(variable):
-    """
-    Read reporting.yaml which return
-    the tab name for the variable.
-    """
-
-    with open(LOG_REPORTING_FILEPATH, "r", encoding="utf-8") as stream:
-        reporting = yaml.safe_load(stream)
-
-    return reporting[variable]["tab"]
-
-
-def convert_log_to_excel_file(filepath):
-    """
-    Read the log file premise.log in the working directory.
-    Load into pandas dataframe and group the data by
-    scenario and variable.
-    """
-
-    try:
-        df = pd.read_csv(filepath, sep="|", header=None, on_bad_lines="skip")
-        df.columns = fetch_columns(filepath)
-        return df
-
-    except EmptyDataError:
-        # return an empty dataframe
-        return pd.DataFrame(columns=fetch_columns(filepath))
+    change_log.write(fp.with_suffix(""), fmt=fmt)
@@ -4,12 +4,10 @@ Integrates projections regarding steel production.
 from typing import Dict, List
 
 from .data_collection import IAMDataCollection
-from .logger import create_logger
+from .logger import add_to_change_log
 from .transformation import BaseTransformation, rescale_exchanges, ws
 from .validation import SteelValidation
 
-logger = create_logger("steel")
-
 
 def _update_steel(scenario, version, system_model, cache=None):
     steel = Steel(
@@ -42,6 +40,7 @@ def _update_steel(scenario, version, system_model, cache=None):
     )
 
     validate.run_steel_checks()
+    add_to_change_log(scenario, steel.change_log, validate.change_log)
 
     return scenario, cache
 
@@ -587,14 +586,17 @@ class Steel(BaseTransformation):
 
     def write_log(self, dataset, status="created"):
         """
-        Write log file.
+        Record a change made to a dataset in the change log.
         """
 
-        logger.info(
-            f"{status}|{self.model}|{self.scenario}|{self.year}|"
-            f"{dataset['name']}|{dataset['location']}|"
-            f"{dataset.get('log parameters', {}).get('carbon capture rate', '')}|"
-            f"{dataset.get('log parameters', {}).get('thermal efficiency change', '')}|"
-            f"{dataset.get('log parameters', {}).get('primary steel share', '')}|"
-            f"{dataset.get('log parameters', {}).get('secondary steel share', '')}"
+        self.log_change(
+            "premise_steel",
+            dataset,
+            status,
+            (
+                "carbon capture rate",
+                "thermal efficiency change",
+                "primary steel share",
+                "secondary steel share",
+            ),
         )
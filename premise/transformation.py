@@ -5,19 +5,16 @@ It provides basic methods usually used for electricity, cement, steel sector tra
 on the wurst database.
 """
 import copy
-import logging.config
+import threading
 import uuid
 from collections import defaultdict
 from collections.abc import ValuesView
 from copy import deepcopy
-from functools import lru_cache
 from itertools import groupby, product
-from pathlib import Path
 from typing import Any, Dict, List, Set, Tuple, Union
 
 import numpy as np
 import xarray as xr
-import yaml
 from _operator import itemgetter
 from constructive_geometries import resolved_row
 from wurst import reference_product, rescale_exchange
@@ -26,23 +23,122 @@ from wurst import transformations as wt
 
 from .activity_maps import InventorySet
 from .data_collection import IAMDataCollection
-from .filesystem_constants import DATA_DIR
 from .geomap import Geomap
-from .utils import get_fuel_properties, rescale_exchanges
+from .logger import ChangeLog
+from .utils import DATABASE_GENERATIONS, get_fuel_properties, rescale_exchanges
 
-LOG_CONFIG = DATA_DIR / "utils" / "logging" / "logconfig.yaml"
-# directory for log files
-DIR_LOG_REPORT = Path.cwd() / "export" / "logs"
-# if DIR_LOG_REPORT folder does not exist
-# we create it
-if not Path(DIR_LOG_REPORT).exists():
-    Path(DIR_LOG_REPORT).mkdir(parents=True, exist_ok=True)
 
-with open(LOG_CONFIG, "r") as f:
-    config = yaml.safe_load(f.read())
-    logging.config.dictConfig(config)
+class SupplierCache:
+    """
+    Cache for supplier queries (see :func:`get_suppliers_of_a_region`
+    and :meth:`BaseTransformation.select_multiple_suppliers`),
+    shared by all transformations working on the same database.
+
+    Entries are valid for one generation of a database
+    (see :class:`premise.utils.DatabaseGenerations`), and no reference
+    to the database itself is kept. When datasets are added to, removed
+    from or edited in the database, the database gets a new generation
+    and only the entries whose names match these datasets are dropped
+    (see :meth:`update`). If the database changes in any other way
+    (e.g., datasets appended without being reported), all entries are dropped.
+
+    :ivar key: (database id, generation, number of datasets)
+        the entries are valid for
+    :ivar entries: query to (names, exact match, result) dictionary
+    """
+
+    def __init__(self) -> None:
+        self.key: Tuple[int, int, int] = None
+        self.entries: Dict[tuple, tuple] = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def get_key(database: List[dict]) -> Tuple[int, int, int]:
+        """
+        Return the key of the current state of a database.
+        :param database: list of datasets
+        :return: (database id, generation, number of datasets)
+        """
+        return (*DATABASE_GENERATIONS.get(database), len(database))
+
+    def resolve(
+        self,
+        database: List[dict],
+        query: tuple,
+        names: Tuple[str],
+        exact_match: bool,
+        resolver,
+    ) -> Any:
+        """
+        Return the result of `query`, calling `resolver` if not cached.
+        :param database: database searched
+        :param query: hashable description of the query
+        :param names: dataset names searched for
+        :param exact_match: whether names are matched exactly or contained
+        :param resolver: function returning the result of the query
+        :return: copy of the result of the query
+        """
+        key = self.get_key(database)
+
+        with self.lock:
+            if key != self.key:
+                self.key = key
+                self.entries = {}
+
+            entry = self.entries.get(query)
 
-logger = logging.getLogger("module")
+        if entry is None:
+            # the database is searched without holding the lock
+            entry = (names, exact_match, resolver())
+
+            with self.lock:
+                if key == self.key:
+                    self.entries[query] = entry
+
+        return copy.copy(entry[-1])
+
+    def update(self, database: List[dict], datasets: List[dict]) -> None:
+        """
+        Give the database a new generation, and drop the entries
+        that `datasets` could be a result of.
+        :param database: database the datasets belong to
+        :param datasets: datasets added, removed or edited.
+            Added datasets are expected to be appended to the database
+            before they are reported.
+        """
+        key = self.get_key(database)
+        new_key = (*DATABASE_GENERATIONS.bump(database), len(database))
+
+        with self.lock:
+            if self.key is None or self.key[0] != key[0]:
+                # the entries are for another database
+                return
+
+            if self.key[1] != key[1] or key[2] not in (
+                self.key[2],
+                self.key[2] + len(datasets),
+            ):
+                # the database changed in other ways since the last query
+                self.key = new_key
+                self.entries = {}
+                return
+
+            self.key = new_key
+            dataset_names = {dataset["name"] for dataset in datasets}
+
+            self.entries = {
+                query: entry
+                for query, entry in self.entries.items()
+                if not any(
+                    name == dataset_name if entry[1] else name in dataset_name
+                    for name in entry[0]
+                    for dataset_name in dataset_names
+                )
+            }
+
+
+# shared by all transformations running in the same process
+SUPPLIER_CACHE = SupplierCache()
 
 
 def get_suppliers_of_a_region(
@@ -53,11 +149,11 @@ def get_suppliers_of_a_region(
     unit: str,
     exclude: List[str] = None,
     exact_match: bool = False,
-) -> filter:
+) -> List[dict]:
     """
     Return a list of datasets, for which the location, name,
     reference product and unit correspond to the region and name
-    given, respectively.
+    given, respectively. Results are cached in :data:`SUPPLIER_CACHE`.
 
     :param database: database to search
     :param locations: list of locations
@@ -68,6 +164,51 @@ def get_suppliers_of_a_region(
     :param exclude: list of terms to exclude
     """
 
+    names = tuple(sorted(names))
+    query = (
+        "suppliers of a region",
+        tuple(sorted(locations)),
+        names,
+        reference_prod,
+        unit,
+        tuple(exclude) if exclude else None,
+        exact_match,
+    )
+
+    return list(
+        SUPPLIER_CACHE.resolve(
+            database,
+            query,
+            names,
+            exact_match,
+            lambda: list(
+                search_suppliers_of_a_region(
+                    database,
+                    locations,
+                    names,
+                    reference_prod,
+                    unit,
+                    exclude,
+                    exact_match,
+                )
+            ),
+        )
+    )
+
+
+def search_suppliers_of_a_region(
+    database: List[dict],
+    locations: List[str],
+    names: List[str],
+    reference_prod: str,
+    unit: str,
+    exclude: List[str] = None,
+    exact_match: bool = False,
+) -> filter:
+    """
+    Uncached version of :func:`get_suppliers_of_a_region`.
+    """
+
     if exact_match:
         filters = [
             ws.either(*[ws.equals("name", supplier) for supplier in names]),
@@ -241,6 +382,8 @@ class BaseTransformation:
         index: dict = None,
     ) -> None:
         self.database: List[dict] = database
+        # the database may have been changed since it was last worked on
+        DATABASE_GENERATIONS.bump(self.database)
         self.iam_data: IAMDataCollection = iam_data
         self.model: str = model
         self.regions: List[str] = iam_data.regions
@@ -255,6 +398,7 @@ class BaseTransformation:
         self.heat_techs = mapping.generate_heat_map()
         self.system_model: str = system_model
         self.cache: dict = cache or {}
+        self.change_log: ChangeLog = ChangeLog()
 
         # reverse the fuel map to get a mapping from ecoinvent to premise
         self.fuel_map_reverse: Dict = {}
@@ -288,6 +432,8 @@ class BaseTransformation:
             key = (copy.deepcopy(d["name"]), copy.deepcopy(d["reference product"]))
             self.index[key].append(d)
 
+        SUPPLIER_CACHE.update(self.database, ds)
+
     def remove_from_index(self, ds):
         key = (copy.deepcopy(ds["name"]), copy.deepcopy(ds["reference product"]))
         available_locations = [k["location"] for k in self.index[key]]
@@ -297,6 +443,8 @@ class BaseTransformation:
             ][0]
             self.index[key].remove(ds_to_remove)
 
+        SUPPLIER_CACHE.update(self.database, [ds])
+
     def is_in_index(self, ds, location=None):
         if not any(key in ds for key in ["reference product", "product"]):
             raise KeyError(
@@ -314,7 +462,6 @@ class BaseTransformation:
 
         return location in [k["location"] for k in self.index[key]]
 
-    @lru_cache
     def select_multiple_suppliers(
         self,
         possible_names: Tuple[str],
@@ -325,6 +472,39 @@ class BaseTransformation:
     ):
         """
         Select multiple suppliers for a specific fuel.
+        Results are cached in :data:`SUPPLIER_CACHE`.
+        """
+
+        query = (
+            "multiple suppliers",
+            self.model,
+            possible_names,
+            dataset_location,
+            look_for,
+            blacklist,
+            exclude_region,
+        )
+
+        return SUPPLIER_CACHE.resolve(
+            self.database,
+            query,
+            possible_names,
+            False,
+            lambda: self.search_multiple_suppliers(
+                possible_names, dataset_location, look_for, blacklist, exclude_region
+            ),
+        )
+
+    def search_multiple_suppliers(
+        self,
+        possible_names: Tuple[str],
+        dataset_location: str,
+        look_for: Tuple[str] = None,
+        blacklist: Tuple[str] = None,
+        exclude_region: Tuple[str] = None,
+    ):
+        """
+        Uncached version of :meth:`select_multiple_suppliers`.
         """
 
         # We have several potential fuel suppliers
@@ -334,16 +514,14 @@ class BaseTransformation:
         ecoinvent_regions = self.geo.iam_to_ecoinvent_location(dataset_location)
 
         possible_locations = [
-            dataset_location,
+            [dataset_location],
             [*ecoinvent_regions],
-            "RoW",
-            "GLO",
-            "Europe without Switzerland",
-            "RER",
+            ["RoW"],
+            ["GLO"],
+            ["Europe without Switzerland"],
+            ["RER"],
         ]
 
-        suppliers, counter = [], 0
-
         extra_filters = []
         if look_for:
             extra_filters.append(
@@ -368,37 +546,21 @@ class BaseTransformation:
                 )
             )
 
-        try:
-            while not suppliers:
-                suppliers = list(
-                    ws.get_many(
-                        self.database,
-                        ws.either(
-                            *[ws.contains("name", sup) for sup in possible_names]
-                        ),
-                        ws.either(
-                            *[
-                                ws.equals("location", item)
-                                for item in possible_locations[counter]
-                            ]
-                        )
-                        if isinstance(possible_locations[counter], list)
-                        else ws.equals("location", possible_locations[counter]),
-                        *extra_filters,
-                    )
-                )
-                counter += 1
-        except IndexError:
-
-            suppliers = list(
-                ws.get_many(
-                    self.database,
-                    ws.either(
-                        *[ws.contains("name", sup) for sup in possible_names]
-                    ),
-                    *extra_filters,
-                )
+        # scan the database once, then narrow down by location
+        candidates = list(
+            ws.get_many(
+                self.database,
+                ws.either(*[ws.contains("name", sup) for sup in possible_names]),
+                *extra_filters,
             )
+        )
+
+        for locations in possible_locations:
+            suppliers = [ds for ds in candidates if ds["location"] in locations]
+            if suppliers:
+                break
+        else:
+            suppliers = candidates
 
             if not suppliers:
                 raise IndexError(
@@ -570,7 +732,7 @@ class BaseTransformation:
         else:
             current_efficiency = np.nan
 
-        if current_efficiency in (np.nan, np.inf):
+        if not np.isfinite(current_efficiency):
             current_efficiency = 1
 
         if "parameters" in dataset:
@@ -1337,10 +1499,10 @@ class BaseTransformation:
 
             # then, we need to find local suppliers of electricity, water, steam, etc.
             ccs = self.relink_technosphere_exchanges(ccs)
-            self.add_to_index(ccs)
 
             # finally, we add this new dataset to the database
             self.database.append(ccs)
+            self.add_to_index(ccs)
 
     def find_iam_efficiency_change(
         self,
@@ -1362,19 +1524,78 @@ class BaseTransformation:
             .values.item(0)
         )
 
-        if scaling_factor in (np.nan, np.inf):
+        if not np.isfinite(scaling_factor):
             scaling_factor = 1
 
         return scaling_factor
 
+    def find_iam_efficiency_changes(
+        self,
+        data: xr.DataArray,
+        variables: List[str],
+    ) -> Dict[Tuple[str, str], float]:
+        """
+        Return the relative change in efficiency for all `variables`
+        in all regions, relative to 2020, interpolating once for all of them.
+        See :meth:`find_iam_efficiency_change`.
+        :param data: IAM efficiency data
+        :param variables: IAM variable names
+        :return: dictionary with (variable, region) as keys
+            and relative efficiency changes as values
+        """
+
+        scaling_factors = (
+            data.sel(variables=variables)
+            .interp(year=self.year)
+            .transpose("variables", "region")
+        )
+
+        changes = {}
+        for variable, values in zip(variables, scaling_factors.values):
+            for region, scaling_factor in zip(data.region.values, values):
+                scaling_factor = scaling_factor.item()
+                if not np.isfinite(scaling_factor):
+                    scaling_factor = 1
+                changes[(variable, region)] = scaling_factor
+
+        return changes
+
     def write_log(self, dataset, status="created"):
         """
-        Write log file.
+        Record a change made to a dataset.
+        Transformations without a tab in the change report
+        do not record anything.
         """
 
-        logger.info(
-            f"{status}|{self.model}|{self.scenario}|{self.year}|"
-            f"{dataset['name']}|{dataset['location']}|"
+    def log_change(
+        self,
+        log_name: str,
+        dataset: dict,
+        status: str,
+        parameters: Tuple[str, ...] = (),
+    ) -> None:
+        """
+        Record a change made to a dataset in the change log.
+
+        :param log_name: name of the log, as in reporting.yaml
+        :param dataset: dataset that was changed
+        :param status: type of change (e.g., "created", "updated", "empty")
+        :param parameters: names of the `log parameters` of the dataset to record
+        """
+
+        log_parameters = dataset.get("log parameters", {})
+
+        self.change_log.add(
+            log_name,
+            [
+                status,
+                self.model,
+                self.scenario,
+                self.year,
+                dataset["name"],
+                dataset["location"],
+            ]
+            + [log_parameters.get(parameter) for parameter in parameters],
         )
 
     def add_new_entry_to_cache(
@@ -6,7 +6,7 @@ IAM data, and integrate them into the database.
 
 import re
 import uuid
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Tuple, Union
 
 import numpy as np
 import xarray as xr
@@ -123,6 +123,70 @@ def normalize_exchange_amounts(list_act: List[dict]) -> List[dict]:
     return list_act
 
 
+def get_vehicles_metadata(
+    datasets: List[dict], vehicle_type: str, vehicles_map: dict
+) -> Dict[tuple, Tuple[str, str, str]]:
+    """
+    Parse the names of vehicle datasets into powertrain, size,
+    construction year (and driving cycle, for trucks).
+
+    :param datasets: vehicle datasets of all size, powertrain and construction years.
+    :param vehicle_type: "car", "truck"
+    :param vehicles_map: mapping between `carculator` and `ecoinvent` terminology
+    :return: dictionary with (powertrain, size, construction year) tuples as keys
+    (plus driving cycle, for trucks) and (name, reference product, unit) as values
+    """
+
+    d_names, cycle_type = {}, None
+
+    for dataset in datasets:
+        if not dataset["name"].startswith("transport, "):
+            continue
+
+        parts = dataset["name"].split(", ")
+
+        if vehicle_type == "bus":
+            if len(parts) == 6:
+                if "battery electric" in parts[2]:
+                    _, _, pwt, _, size, year = parts
+                else:
+                    _, _, pwt, size, year, _ = parts
+            else:
+                _, _, pwt, size, year = parts
+
+        elif vehicle_type == "truck":
+            if len(parts) == 8:
+                if "battery electric" in parts[3]:
+                    _, _, _, pwt, _, size, year, cycle_type = parts
+                else:
+                    _, _, _, pwt, size, year, _, cycle_type = parts
+            else:
+                _, _, _, pwt, size, year, cycle_type = parts
+
+            size = size.replace(" gross weight", "")
+
+        else:
+            if len(parts) == 6:
+                if parts[2] == "battery electric":
+                    _, _, pwt, _, size, year = parts
+                else:
+                    _, _, pwt, size, year, _ = parts
+            else:
+                _, _, pwt, size, year = parts
+
+        key = (vehicles_map["powertrain"][pwt], size, int(year))
+        if vehicle_type == "truck":
+            key += (cycle_type,)
+
+        d_names[key] = (
+            dataset["name"],
+            dataset["reference product"],
+            dataset["unit"],
+        )
+
+    return d_names
+
+
 def create_fleet_vehicles(
     datasets: List[dict],
     vehicle_type: str,
@@ -159,17 +223,19 @@ def create_fleet_vehicles(
             year: year for year in arr.coords["construction_year"].values
         }
 
+    fleet_year = year
+
     # fleet data does not go below 2015
-    if year < 2015:
-        year = 2015
+    if fleet_year < 2015:
+        fleet_year = 2015
         print(
             "Vehicle fleet data is not available before 2015. "
             "Hence, 2015 is used as fleet year."
         )
 
     # fleet data does not go beyond 2050
-    if year > 2050:
-        year = 2050
+    if fleet_year > 2050:
+        fleet_year = 2050
         print(
             "Vehicle fleet data is not available beyond 2050. "
             "Hence, 2050 is used as fleet year."
@@ -177,64 +243,10 @@ def create_fleet_vehicles(
 
     # We filter electric vehicles by year of manufacture
     available_years = np.arange(2000, 2055, 5)
-    ref_year = min(available_years, key=lambda x: abs(x - year))
-
-    available_ds, d_names, cycle_type = [], {}, None
-
-    for dataset in datasets:
-        if dataset["name"].startswith("transport, "):
-            if vehicle_type == "bus":
-                if len(dataset["name"].split(", ")) == 6:
-                    if "battery electric" in dataset["name"].split(", ")[2]:
-                        _, _, pwt, _, size, year = dataset["name"].split(", ")
-
-                    else:
-                        _, _, pwt, size, year, _ = dataset["name"].split(", ")
-                else:
-                    _, _, pwt, size, year = dataset["name"].split(", ")
-
-            elif vehicle_type == "truck":
-                if len(dataset["name"].split(", ")) == 8:
-                    if "battery electric" in dataset["name"].split(", ")[3]:
-                        _, _, _, pwt, _, size, year, cycle_type = dataset["name"].split(
-                            ", "
-                        )
-
-                    else:
-                        _, _, _, pwt, size, year, _, cycle_type = dataset["name"].split(
-                            ", "
-                        )
-                else:
-                    _, _, _, pwt, size, year, cycle_type = dataset["name"].split(", ")
-
-                size = size.replace(" gross weight", "")
-
-            else:
-                if len(dataset["name"].split(", ")) == 6:
-                    if dataset["name"].split(", ")[2] == "battery electric":
-                        _, _, pwt, _, size, year = dataset["name"].split(", ")
-                    else:
-                        _, _, pwt, size, year, _ = dataset["name"].split(", ")
-                else:
-                    _, _, pwt, size, year = dataset["name"].split(", ")
+    ref_year = min(available_years, key=lambda x: abs(x - fleet_year))
 
-            if vehicle_type == "truck":
-                d_names[
-                    (vehicles_map["powertrain"][pwt], size, int(year), cycle_type)
-                ] = (
-                    dataset["name"],
-                    dataset["reference product"],
-                    dataset["unit"],
-                )
-                available_ds.append((vehicles_map["powertrain"][pwt], size, int(year)))
-
-            else:
-                d_names[(vehicles_map["powertrain"][pwt], size, int(year))] = (
-                    dataset["name"],
-                    dataset["reference product"],
-                    dataset["unit"],
-                )
-                available_ds.append((vehicles_map["powertrain"][pwt], size, int(year)))
+    d_names = get_vehicles_metadata(datasets, vehicle_type, vehicles_map)
+    available_ds = {key[:3] for key in d_names}
 
     list_act = []
 
@@ -261,184 +273,142 @@ def create_fleet_vehicles(
         "STAN": "TUR",
     }
 
-    for region in regions:
-        if region not in arr.coords["region"].values:
-            fleet_region = d_missing_regions[region]
-        else:
-            fleet_region = region
+    fleet_regions = [
+        region if region in arr.coords["region"].values else d_missing_regions[region]
+        for region in regions
+    ]
 
-        sizes = [
-            s
-            for s in vehicles_map[vehicle_type]["sizes"]
-            if s in arr.coords["size"].values
-        ]
+    sizes = [
+        s for s in vehicles_map[vehicle_type]["sizes"] if s in arr.coords["size"].values
+    ]
 
-        sel = arr.sel(region=fleet_region, size=sizes, year=ref_year)
+    # vehicle-km, per region, size, construction year and powertrain
+    fleet = arr.sel(region=fleet_regions, size=sizes, year=ref_year).transpose(
+        "region", "size", "construction_year", "powertrain"
+    )
+    construction_years = [
+        constr_year_map[y] for y in fleet.coords["construction_year"].values
+    ]
+    powertrains = fleet.coords["powertrain"].values.tolist()
+
+    vkm = np.nan_to_num(fleet.values)
+    total_km = vkm.sum(axis=(1, 2, 3))
+    total_size_km = vkm.sum(axis=(2, 3))
+
+    # only vehicles with a dataset contribute to the fleet
+    has_dataset = np.array(
+        [
+            [
+                [(pwt, size, constr_year) in available_ds for pwt in powertrains]
+                for constr_year in construction_years
+            ]
+            for size in sizes
+        ],
+        dtype=bool,
+    ).reshape(vkm.shape[1:])
+    vkm = np.where(has_dataset & (vkm > 0), vkm, 0)
+
+    if vehicle_type == "truck":
+        driving_cycles = ["regional delivery", "long haul"]
+    else:
+        driving_cycles = [""]
+
+    database = eidb_label(model, scenario, year, version, system_model)
+
+    def fleet_vehicle(
+        name: str,
+        region: str,
+        shares: np.ndarray,
+        shares_sizes: List[str],
+        driving_cycle: str,
+    ) -> dict:
+        act = {
+            "name": name,
+            "reference product": vehicles_map[vehicle_type]["name"],
+            "unit": vehicles_map[vehicle_type]["unit"],
+            "location": region,
+            "exchanges": [
+                {
+                    "name": name,
+                    "product": vehicles_map[vehicle_type]["name"],
+                    "unit": vehicles_map[vehicle_type]["unit"],
+                    "location": region,
+                    "type": "production",
+                    "amount": 1,
+                }
+            ],
+            "code": str(uuid.uuid4().hex),
+            "database": database,
+            "comment": f"Fleet-average vehicle for the year {fleet_year}, "
+            f"for the region {region}.",
+        }
 
-        total_km = sel.sum()
+        # shares are indexed by size, construction year and powertrain
+        for idx in zip(*np.nonzero(shares)):
+            size = shares_sizes[idx[0]]
+            constr_year = construction_years[idx[1]]
+            pwt = powertrains[idx[2]]
 
-        if total_km > 0:
             if vehicle_type == "truck":
-                driving_cycles = ["regional delivery", "long haul"]
+                load = avg_load[vehicle_type][driving_cycle][size]
+                to_look_for = (pwt, size, constr_year, driving_cycle)
             else:
-                driving_cycles = [""]
-
-            for driving_cycle in driving_cycles:
-                name = (
-                    f"{vehicles_map[vehicle_type]['name']}, unspecified, {driving_cycle}"
-                    if vehicle_type == "truck"
-                    else f"{vehicles_map[vehicle_type]['name']}, unspecified"
+                load = 1
+                to_look_for = (pwt, size, constr_year)
+
+            if to_look_for in d_names:
+                exc_name, ref, unit = d_names[to_look_for]
+
+                act["exchanges"].append(
+                    {
+                        "name": exc_name,
+                        "product": ref,
+                        "unit": unit,
+                        "location": region,
+                        "type": "technosphere",
+                        "amount": shares[idx].item() * load,
+                    }
                 )
-                act = {
-                    "name": name,
-                    "reference product": vehicles_map[vehicle_type]["name"],
-                    "unit": vehicles_map[vehicle_type]["unit"],
-                    "location": region,
-                    "exchanges": [
-                        {
-                            "name": name,
-                            "product": vehicles_map[vehicle_type]["name"],
-                            "unit": vehicles_map[vehicle_type]["unit"],
-                            "location": region,
-                            "type": "production",
-                            "amount": 1,
-                        }
-                    ],
-                    "code": str(uuid.uuid4().hex),
-                    "database": eidb_label(
-                        model, scenario, year, version, system_model
-                    ),
-                    "comment": f"Fleet-average vehicle for the year {year}, "
-                    f"for the region {region}.",
-                }
 
-                for size in sizes:
-                    for construction_year in sel.coords["construction_year"].values:
-                        for pwt in sel.coords["powertrain"].values:
-                            indiv_km = sel.sel(
-                                size=size,
-                                construction_year=construction_year,
-                                powertrain=pwt,
-                            )
-                            if (
-                                indiv_km > 0
-                                and (pwt, size, constr_year_map[construction_year])
-                                in available_ds
-                            ):
-                                indiv_share = (indiv_km / total_km).values.item(0)
-
-                                if vehicle_type == "truck":
-                                    load = avg_load[vehicle_type][driving_cycle][size]
-                                    to_look_for = (
-                                        pwt,
-                                        size,
-                                        constr_year_map[construction_year],
-                                        driving_cycle,
-                                    )
-
-                                else:
-                                    load = 1
-                                    to_look_for = (
-                                        pwt,
-                                        size,
-                                        constr_year_map[construction_year],
-                                    )
-
-                                if to_look_for in d_names:
-                                    name, ref, unit = d_names[to_look_for]
-
-                                    act["exchanges"].append(
-                                        {
-                                            "name": name,
-                                            "product": ref,
-                                            "unit": unit,
-                                            "location": region,
-                                            "type": "technosphere",
-                                            "amount": indiv_share * load,
-                                        }
-                                    )
-
-                if len(act["exchanges"]) > 1:
-                    list_act.append(act)
-
-                # also create size-specific fleet vehicles
-                if vehicle_type == "truck":
-                    for size in sizes:
-                        total_size_km = sel.sel(size=size).sum()
-
-                        if total_size_km > 0:
-                            name = (
-                                f"{vehicles_map[vehicle_type]['name']}, {size} gross weight, "
-                                f"unspecified powertrain, {driving_cycle}"
-                            )
-                            act = {
-                                "name": name,
-                                "reference product": vehicles_map[vehicle_type]["name"],
-                                "unit": vehicles_map[vehicle_type]["unit"],
-                                "location": region,
-                                "exchanges": [
-                                    {
-                                        "name": name,
-                                        "product": vehicles_map[vehicle_type]["name"],
-                                        "unit": vehicles_map[vehicle_type]["unit"],
-                                        "location": region,
-                                        "type": "production",
-                                        "amount": 1,
-                                    }
-                                ],
-                                "code": str(uuid.uuid4().hex),
-                                "database": eidb_label(
-                                    model, scenario, year, version, system_model
-                                ),
-                                "comment": f"Fleet-average vehicle for the year {year}, for the region {region}.",
-                            }
-
-                            for construction_year in sel.coords[
-                                "construction_year"
-                            ].values:
-                                for pwt in sel.coords["powertrain"].values:
-                                    indiv_km = sel.sel(
-                                        size=size,
-                                        construction_year=construction_year,
-                                        powertrain=pwt,
-                                    )
-                                    if (
-                                        indiv_km > 0
-                                        and (
-                                            pwt,
-                                            size,
-                                            constr_year_map[construction_year],
-                                        )
-                                        in available_ds
-                                    ):
-                                        indiv_share = (
-                                            indiv_km / total_size_km
-                                        ).values.item(0)
-                                        load = avg_load[vehicle_type][driving_cycle][
-                                            size
-                                        ]
-                                        to_look_for = (
-                                            pwt,
-                                            size,
-                                            constr_year_map[construction_year],
-                                            driving_cycle,
-                                        )
-                                        if to_look_for in d_names:
-                                            name, ref, unit = d_names[to_look_for]
-
-                                            act["exchanges"].append(
-                                                {
-                                                    "name": name,
-                                                    "product": ref,
-                                                    "unit": unit,
-                                                    "location": region,
-                                                    "type": "technosphere",
-                                                    "amount": indiv_share * load,
-                                                }
-                                            )
-
-                            if len(act["exchanges"]) > 1:
-                                list_act.append(act)
+        return act
+
+    for r, region in enumerate(regions):
+        if total_km[r] <= 0:
+            continue
+
+        shares = vkm[r] / total_km[r]
+
+        for driving_cycle in driving_cycles:
+            name = (
+                f"{vehicles_map[vehicle_type]['name']}, unspecified, {driving_cycle}"
+                if vehicle_type == "truck"
+                else f"{vehicles_map[vehicle_type]['name']}, unspecified"
+            )
+            act = fleet_vehicle(name, region, shares, sizes, driving_cycle)
+
+            if len(act["exchanges"]) > 1:
+                list_act.append(act)
+
+            # also create size-specific fleet vehicles
+            if vehicle_type == "truck":
+                for s, size in enumerate(sizes):
+                    if total_size_km[r, s] <= 0:
+                        continue
+
+                    name = (
+                        f"{vehicles_map[vehicle_type]['name']}, {size} gross weight, "
+                        f"unspecified powertrain, {driving_cycle}"
+                    )
+                    act = fleet_vehicle(
+                        name,
+                        region,
+                        vkm[r, s : s + 1] / total_size_km[r, s],
+                        [size],
+                        driving_cycle,
+                    )
+
+                    if len(act["exchanges"]) > 1:
+                        list_act.append(act)
 
     return normalize_exchange_amounts(list_act)
 
@@ -2,13 +2,14 @@
 Various utils functions.
 """
 
+import itertools
 import os
 import sys
 import uuid
 from functools import lru_cache
 from numbers import Number
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import pandas as pd
 import xarray as xr
@@ -20,7 +21,14 @@ from wurst.searching import biosphere, equals, get_many, technosphere
 
 from . import __version__
 from .data_collection import get_delimiter
-from .filesystem_constants import DATA_DIR, DIR_CACHED_DB, VARIABLES_DIR
+from .filesystem_constants import (
+    DATA_DIR,
+    DIR_CACHED_DB,
+    DIR_CACHED_INVENTORIES,
+    DIR_REMOTE_INVENTORIES,
+    INVENTORY_MIRROR,
+    VARIABLES_DIR,
+)
 from .geomap import Geomap
 
 FUELS_PROPERTIES = VARIABLES_DIR / "fuels_variables.yaml"
@@ -64,6 +72,58 @@ class HiddenPrints:
         sys.stdout = self._original_stdout
 
 
+class DatabaseGenerations:
+    """
+    Generation numbers of databases, used to tell whether results
+    cached for a database are still valid. A database is given a new
+    generation number every time datasets are added, removed or edited.
+
+    Databases are lists, which cannot be weakly referenced: they are
+    identified by their id, and no reference to them is kept.
+    Generation numbers are drawn from a single counter, so that a database
+    given the id of a freed database does not get its generation number.
+
+    :ivar generations: database id to generation number dictionary,
+        for the most recently used databases
+    :ivar max_size: number of databases to keep track of
+    """
+
+    def __init__(self, max_size: int = 64) -> None:
+        self.counter = itertools.count(1)
+        self.generations: Dict[int, int] = {}
+        self.max_size = max_size
+
+    def get(self, database: List[dict]) -> Tuple[int, int]:
+        """
+        Return the id and the generation number of a database.
+        :param database: list of datasets
+        :return: (database id, generation number)
+        """
+        if id(database) not in self.generations:
+            return self.bump(database)
+
+        return id(database), self.generations[id(database)]
+
+    def bump(self, database: List[dict]) -> Tuple[int, int]:
+        """
+        Give a database a new generation number.
+        :param database: list of datasets
+        :return: (database id, new generation number)
+        """
+        self.generations.pop(id(database), None)
+        self.generations[id(database)] = next(self.counter)
+
+        # forgotten databases get a new generation number when used again
+        while len(self.generations) > self.max_size:
+            del self.generations[next(iter(self.generations))]
+
+        return id(database), self.generations[id(database)]
+
+
+# shared by all caches of results computed from databases
+DATABASE_GENERATIONS = DatabaseGenerations()
+
+
 def eidb_label(
     model: str, scenario: str, year: int, version: str, system_model: str = "cutoff"
 ) -> str:
@@ -190,6 +250,13 @@ def clear_existing_cache(all_versions: Optional[bool] = False) -> None:
         and (all_versions or "".join(tuple(map(str, __version__))) not in f.name)
     ]
 
+    if all_versions:
+        [f.unlink() for f in DIR_CACHED_INVENTORIES.glob("*") if f.is_file()]
+
+        # a mirror of remote inventories is left untouched
+        if not INVENTORY_MIRROR:
+            [f.unlink() for f in DIR_REMOTE_INVENTORIES.glob("*") if f.is_file()]
+
 
 # clear the cache folder
 def clear_cache() -> None:
@@ -8,9 +8,7 @@ import yaml
 
 from .filesystem_constants import DATA_DIR
 from .geomap import Geomap
-from .logger import create_logger
-
-logger = create_logger("validation")
+from .logger import ChangeLog
 
 
 def load_electricity_keys():
@@ -96,6 +94,7 @@ class BaseDatasetValidator:
         self.db_name = db_name
         self.geo = Geomap(model)
         self.validation_log = []
+        self.change_log = ChangeLog()
         self.keep_uncertainty_data = keep_uncertainty_data
 
     def check_uncertainty(self):
@@ -388,10 +387,18 @@ class BaseDatasetValidator:
         if self.validation_log:
             print("Anomalies found: check the change report.")
             for entry in self.validation_log:
-                logger.info(
-                    f"{self.model}|{self.scenario}|{self.year}|"
-                    f"{entry['name']}|{entry['reference product']}|"
-                    f"{entry['location']}|{entry['reason']}|{entry['message']}"
+                self.change_log.add(
+                    "premise_validation",
+                    [
+                        self.model,
+                        self.scenario,
+                        self.year,
+                        entry["name"],
+                        entry["reference product"],
+                        entry["location"],
+                        entry["reason"],
+                        entry["message"],
+                    ],
                 )
 
     def run_all_checks(self):
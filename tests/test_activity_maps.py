@@ -1,5 +1,8 @@
 # content of test_activity_maps.py
-from premise.activity_maps import InventorySet
+import copy
+
+from premise.activity_maps import FilterIndex, InventorySet, act_fltr
+from premise.utils import DATABASE_GENERATIONS
 
 dummy_minimal_db = [
     {
@@ -56,3 +59,47 @@ def test_length_dict():
     assert len(maps.powerplant_filters) > 0
     assert len(maps.powerplant_fuels_filters) > 0
     assert len(maps.fuels_filters) > 0
+
+
+def test_filters_match_act_fltr():
+    maps = InventorySet(dummy_minimal_db)
+    for filtr in [
+        maps.powerplant_filters,
+        maps.fuels_filters,
+        maps.materials_filters,
+        maps.heat_filters,
+    ]:
+        mapping = maps.generate_sets_from_filters(filtr)
+        for tech, fltr in filtr.items():
+            expected = {
+                act["name"]
+                for act in act_fltr(
+                    dummy_minimal_db, fltr.get("fltr"), fltr.get("mask")
+                )
+            }
+            assert mapping[tech] == expected
+
+
+def test_groups_follow_database_changes():
+    database = copy.deepcopy(dummy_minimal_db)
+    maps = InventorySet(database)
+    assert "electricity production, oil" in maps.generate_powerplant_map()["Oil ST"]
+
+    # same number of datasets, one of them renamed
+    oil = next(ds for ds in database if ds["name"] == "electricity production, oil")
+    oil["name"] = "electricity production, deep geothermal"
+    DATABASE_GENERATIONS.bump(database)
+
+    assert not maps.generate_powerplant_map()["Oil ST"]
+
+
+def test_filter_index_is_bounded():
+    index = FilterIndex(max_hits=2)
+    index.add_filters({"x": {"fltr": ["coal", "gas"]}})
+
+    for value in ["hard coal", "natural gas", "oil", "lignite coal"]:
+        assert index.match("name", value) == {n for n in ["coal", "gas"] if n in value}
+        assert len(index.hits["name"]) <= 2
+
+    index.reset()
+    assert not index.hits
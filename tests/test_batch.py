@@ -0,0 +1,103 @@
+# content of test_batch.py
+import json
+
+import pytest
+import yaml
+
+from premise import batch
+
+SPEC = {
+    "source_db": "ecoinvent 3.9.1 cutoff",
+    "source_version": "3.9.1",
+    "sectors": "electricity",
+    "exports": ["matrices"],
+    "jobs": [
+        {
+            "scenarios": [
+                {"model": "remind", "pathway": "SSP2-Base", "year": 2030},
+                {"model": "remind", "pathway": "SSP2-Base", "year": 2030},
+            ]
+        },
+        {"scenarios": [{"model": "remind", "pathway": "SSP2-Base", "year": 2050}]},
+        {
+            "scenarios": [{"model": "image", "pathway": "SSP2-Base", "year": 2050}],
+            "sectors": ["electricity", "cement"],
+        },
+    ],
+}
+
+
+class FakeDatabase:
+    def __init__(self, scenarios, **kwargs):
+        if kwargs["source_db"] == "missing":
+            raise ValueError("Source database not found.")
+        self.scenarios = [{**s, "database": [{}, {}]} for s in scenarios]
+        self.calls = []
+
+    def update_electricity(self):
+        self.calls.append("electricity")
+
+    def update_cement(self):
+        self.calls.append("cement")
+
+    def write_db_to_matrices(self, filepath=None):
+        self.calls.append("matrices")
+
+
+def test_plan_jobs():
+    jobs = batch.plan_jobs(SPEC)
+
+    assert len(jobs) == 2
+    assert [s["year"] for s in jobs[0]["scenarios"]] == [2030, 2050]
+    assert jobs[0]["sectors"] == ["electricity"]
+    assert jobs[0]["exports"] == [{"format": "matrices"}]
+    assert jobs[1]["sectors"] == ["electricity", "cement"]
+
+
+def test_plan_jobs_with_invalid_options():
+    with pytest.raises(ValueError, match="Unknown sector"):
+        batch.plan_jobs({**SPEC, "sectors": ["nuclear"]})
+
+    with pytest.raises(ValueError, match="Invalid arguments"):
+        batch.plan_jobs({**SPEC, "exports": [{"format": "matrices", "names": "x"}]})
+
+    with pytest.raises(ValueError, match="Unknown job option"):
+        batch.plan_jobs({**SPEC, "source_database": "ecoinvent"})
+
+
+def test_run_batch(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, "NewDatabase", FakeDatabase)
+
+    spec = {
+        **SPEC,
+        "jobs": SPEC["jobs"] + [{"scenarios": SPEC["jobs"][1]["scenarios"]}],
+    }
+    spec["jobs"][-1]["source_db"] = "missing"
+
+    spec_filepath = tmp_path / "job.yaml"
+    with open(spec_filepath, "w", encoding="utf-8") as stream:
+        yaml.safe_dump(spec, stream)
+
+    summary_filepath = tmp_path / "summary.json"
+    exit_code = batch.main(
+        [str(spec_filepath), "--workers", "1", "--summary", str(summary_filepath)]
+    )
+    assert exit_code == 1
+
+    with open(summary_filepath, encoding="utf-8") as stream:
+        summary = json.load(stream)
+
+    assert summary["status"] == "failed"
+    assert summary["workers"] == 1
+    assert [job["status"] for job in summary["jobs"]] == [
+        "success",
+        "success",
+        "failed",
+    ]
+    assert [step["step"] for step in summary["jobs"][0]["steps"]] == [
+        "load",
+        "electricity",
+        "matrices",
+    ]
+    assert summary["jobs"][0]["datasets"] == [2, 2]
+    assert "Source database not found" in summary["jobs"][2]["error"]
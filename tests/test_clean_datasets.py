@@ -60,3 +60,33 @@ def test_validity_db():
 
     dbc = DatabaseCleaner("dummy_db", "brightway", Path("."), version="3.9")
     assert dbc.database[0]["name"] == "fake activity"
+
+
+def test_fix_unset_exchange_locations():
+    dbc = DatabaseCleaner.__new__(DatabaseCleaner)
+    dbc.database = [
+        {
+            "name": "fake activity",
+            "unit": "kilogram",
+            "location": "CH",
+            "exchanges": [
+                {"name": "fake activity", "unit": "kilogram", "type": "production"},
+                {"name": "fake supplier", "unit": "kilogram", "type": "technosphere"},
+                {"name": "fake market", "unit": "kilogram", "type": "technosphere"},
+            ],
+        },
+        {
+            "name": "fake supplier",
+            "unit": "kilogram",
+            "location": "RER",
+            "exchanges": [],
+        },
+        {"name": "fake market", "unit": "kilogram", "location": "FR", "exchanges": []},
+        {"name": "fake market", "unit": "kilogram", "location": "DE", "exchanges": []},
+    ]
+    dbc.fix_unset_technosphere_and_production_exchange_locations()
+
+    production, supplier, market = dbc.database[0]["exchanges"]
+    assert production["location"] == "CH"
+    assert supplier["location"] == "RER"
+    assert "location" not in market
@@ -0,0 +1,239 @@
+# content of test_data_collection.py
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+import yaml
+
+from premise import data_collection
+from premise.data_collection import (
+    IAMDataCollection,
+    TimeAverage,
+    get_coal_power_plant_factors,
+    get_coal_power_plants_data,
+    load_datapackage,
+    pivot_external_scenario_data,
+    select_external_variables,
+)
+
+
+def get_scenario_data():
+    return pd.DataFrame(
+        [
+            ["remind", "SSP2-Base", "A", "EUR", "pv1", "EJ", 1.0, 2.0],
+            ["remind", "SSP2-Base", "A", "CHA", "pv1", "EJ", 3.0, 4.0],
+            ["remind", "SSP2-Base", "A", "EUR", "eff1", "%", 0.5, 0.6],
+            ["remind", "SSP2-Base", "B", "USA", "pv1", "EJ", 1.0, 2.0],
+        ],
+        columns=[
+            "model",
+            "pathway",
+            "scenario",
+            "region",
+            "variables",
+            "unit",
+            "2020",
+            "2030",
+        ],
+    )
+
+
+def test_pivot_external_scenario_data():
+    data = pivot_external_scenario_data(get_scenario_data())
+
+    assert set(data.keys()) == {
+        ("remind", "SSP2-Base", "A"),
+        ("remind", "SSP2-Base", "B"),
+    }
+    array = data[("remind", "SSP2-Base", "A")]
+    assert array.year.values.tolist() == [2020, 2030]
+    assert array.sel(region="CHA", variables="pv1", year=2030) == 4.0
+
+
+def test_select_external_variables():
+    array = pivot_external_scenario_data(get_scenario_data())[
+        ("remind", "SSP2-Base", "A")
+    ]
+    subset = select_external_variables(array, ["eff1"])
+
+    assert subset.region.values.tolist() == ["EUR"]
+    subset.loc[dict(variables="eff1")] = 0
+    assert array.sel(region="EUR", variables="eff1", year=2020) == 0.5
+
+
+class Resource:
+    def __init__(self, content, headers=None):
+        self.content = content
+        self.headers = headers
+
+    def raw_read(self):
+        return self.content
+
+
+class Datapackage:
+    def __init__(self, name, config):
+        data = get_scenario_data()
+        self.descriptor = {"name": name}
+        self.resources = {
+            "config": Resource(yaml.safe_dump(config).encode()),
+            "scenario_data": Resource(
+                data.to_csv(index=False).encode(), list(data.columns)
+            ),
+        }
+
+    def get_resource(self, name):
+        return self.resources.get(name)
+
+
+def test_datapackage_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(data_collection, "DATAPACKAGE_CACHE_SIZE", 2)
+    data_collection.DATAPACKAGE_CACHE.clear()
+
+    datapackages = [Datapackage(f"dp{i}", {"name": i}) for i in range(3)]
+    for datapackage in datapackages:
+        assert load_datapackage(datapackage)["config"]["name"] == int(
+            datapackage.descriptor["name"][-1]
+        )
+
+    assert len(data_collection.DATAPACKAGE_CACHE) == 2
+    assert load_datapackage(datapackages[0]) is load_datapackage(datapackages[0])
+
+
+def test_external_data_of_missing_scenario():
+    iam_data = object.__new__(IAMDataCollection)
+    iam_data.model = "image"
+    iam_data.pathway = "SSP2-Base"
+    iam_data.external_scenarios = ["A"]
+
+    datapackage = Datapackage("external", {"production pathways": {}})
+
+    with pytest.raises(ValueError, match="has no scenario data for the model image"):
+        iam_data.get_external_data([datapackage])
+
+
+def test_time_average():
+    array = xr.DataArray(
+        np.random.rand(2, 3, 4),
+        coords={
+            "region": ["A", "B"],
+            "variables": ["x", "y", "z"],
+            "year": [2005, 2020, 2050, 2100],
+        },
+        dims=["region", "variables", "year"],
+    )
+    time_average = TimeAverage(array, first_year=2005, last_year=2100)
+
+    for start, period in [(2005, 0), (2030, 20), (2050, 60), (2100, 30)]:
+        expected = array.interp(
+            year=np.arange(start, start + period + 1),
+            kwargs={"fill_value": "extrapolate"},
+        ).mean(dim="year")
+        np.testing.assert_allclose(
+            time_average.mean(start, period).transpose(*expected.dims).values,
+            expected.values,
+        )
+
+
+def test_period_average_builds_the_array_once():
+    array = xr.DataArray(
+        np.random.rand(2, 2),
+        coords={"region": ["A", "B"], "year": [2020, 2050]},
+        dims=["region", "year"],
+    )
+    calls = []
+
+    def get_array():
+        calls.append(1)
+        return array
+
+    iam_data = object.__new__(IAMDataCollection)
+    iam_data.time_averages = {}
+
+    first = iam_data.get_period_average("shares", 2030, 10, array=get_array)
+    second = iam_data.get_period_average("shares", 2030, 10, array=get_array)
+
+    assert len(calls) == 1
+    xr.testing.assert_equal(first, second)
+
+
+COAL_POWER_PLANTS_COLUMNS = [
+    "ISO2",
+    "NET_ELECTRICITY_GENERATION_MWH",
+    "FUEL_INPUT_LHV_MJ",
+    "NET_ELECTRICAL_EFFICIENCY",
+    "CHP_PLANT",
+    "PLANT_FUEL",
+    "PLANT_EMISSION_CO2_KG",
+    "PLANT_EMISSION_CH4_KG",
+    "PLANT_EMISSION_SO2_KG",
+    "PLANT_EMISSION_NOX_KG",
+    "PLANT_EMISSION_PM_2.5_KG",
+    "PLANT_EMISSION_PM_10_TO_2.5_KG",
+    "PLANT_EMISSION_PM_GR_10_KG",
+]
+
+
+@pytest.fixture
+def coal_power_plants_data(tmp_path, monkeypatch):
+    filepath = tmp_path / "coal_power_emissions.csv"
+    pd.DataFrame(
+        [
+            ["DE", 1000, 9e6, 0.40, False, "Bituminous coal", 9e5, 10, 20, 30, 4, 5, 6],
+            ["DE", 3000, 3e7, 0.36, False, "Anthracite coal", 3e6, 30, 40, 50, 6, 7, 8],
+            ["DE", 500, 6e6, 0.30, True, "Subbituminous coal", 5e5, 5, 9, 8, 1, 2, 3],
+            ["PL", 2000, 2e7, 0.35, True, "Coal blend", 2e6, 20, 10, 40, 2, 3, 4],
+            ["PL", 800, 8e6, 0.33, False, "Lignite coal", 9e5, 8, 16, 24, 3, 2, 1],
+        ],
+        columns=COAL_POWER_PLANTS_COLUMNS,
+    ).to_csv(filepath, index=False)
+
+    monkeypatch.setattr(data_collection, "COAL_POWER_PLANTS_DATA", filepath)
+    get_coal_power_plants_data.cache_clear()
+    get_coal_power_plant_factors.cache_clear()
+    yield get_coal_power_plants_data()
+    get_coal_power_plants_data.cache_clear()
+    get_coal_power_plant_factors.cache_clear()
+
+
+def test_coal_power_plant_factors(coal_power_plants_data):
+    factors = get_coal_power_plant_factors()
+    array = coal_power_plants_data
+    substances = ["CO2", "SO2", "CH4", "NOx", "PM <2.5", "PM 10 - 2.5", "PM > 10"]
+
+    for country in ["DE", "PL"]:
+        for fuel in ["Anthracite coal", "Lignite coal"]:
+            for chp in [True, False]:
+                # per-dataset selections, as previously done in
+                # Electricity.adjust_coal_power_plant_emissions
+                expected = {
+                    "efficiency": array.sel(
+                        country=country, fuel=fuel, CHP=chp, variable="efficiency"
+                    ),
+                    **{
+                        substance: array.sel(
+                            country=country, fuel=fuel, CHP=chp, variable=substance
+                        )
+                        / (
+                            array.sel(
+                                country=country,
+                                fuel=fuel,
+                                CHP=chp,
+                                variable="generation",
+                            )
+                            * 1e3
+                        )
+                        for substance in substances
+                    },
+                }
+
+                for variable, value in expected.items():
+                    np.testing.assert_allclose(
+                        factors[(country, fuel, chp)][variable],
+                        value.values.item(0),
+                    )
+
+    # the two bituminous/anthracite plants are averaged
+    assert factors[("DE", "Anthracite coal", False)]["efficiency"] == pytest.approx(
+        0.38
+    )
+    assert np.isnan(factors[("PL", "Anthracite coal", True)]["efficiency"])
@@ -0,0 +1,82 @@
+# content of test_delta.py
+import copy
+
+from premise.delta import ScenarioDelta
+from premise.export import ScenarioExchanges
+
+
+def dataset(name, location, exchanges):
+    return {
+        "name": name,
+        "reference product": name,
+        "location": location,
+        "unit": "kilogram",
+        "comment": "original",
+        "exchanges": [
+            {
+                "name": name,
+                "product": name,
+                "location": location,
+                "amount": 1,
+                "type": "production",
+                "unit": "kilogram",
+            }
+        ]
+        + [
+            {
+                "name": supplier,
+                "product": supplier,
+                "location": "GLO",
+                "amount": amount,
+                "type": "technosphere",
+                "unit": "kilogram",
+            }
+            for supplier, amount in exchanges
+        ],
+    }
+
+
+BASE = [
+    dataset("steel", "GLO", [("coal", 0.5), ("electricity", 2)]),
+    dataset("coal", "GLO", [("electricity", 0.1)]),
+    dataset("electricity", "GLO", [("coal", 0.3)]),
+]
+
+
+def get_scenario_database():
+    database = copy.deepcopy(BASE)
+    database[0]["exchanges"][1]["amount"] = 0.4
+    database[0]["exchanges"].append(database[0]["exchanges"][2])
+    database[0]["comment"] = "changed"
+    database.pop(1)
+    database.append(dataset("electricity", "EUR", [("coal", 0.2)]))
+    return database
+
+
+def test_scenario_delta():
+    database = get_scenario_database()
+    delta = ScenarioDelta.from_databases(BASE, database)
+
+    assert len(delta) == 3
+    assert delta.removed == {("coal", "coal", "GLO", "kilogram")}
+    assert [ds["location"] for ds in delta.added] == ["EUR"]
+
+    changes = delta.modified[("steel", "steel", "GLO", "kilogram")]
+    assert changes["fields"] == {"comment": "changed"}
+    assert len(changes["exchanges"]) == 2
+
+    assert delta.materialize(BASE) == [database[0], database[1], database[2]]
+    assert ScenarioDelta.from_databases(BASE, copy.deepcopy(BASE)).modified == {}
+
+
+def test_scenario_exchanges_from_delta(tmp_path):
+    database = get_scenario_database()
+
+    from_database = ScenarioExchanges(BASE)
+    from_database.add(database)
+
+    from_delta = ScenarioExchanges(BASE, directory=tmp_path)
+    from_delta.add_delta(ScenarioDelta.from_databases(BASE, database))
+
+    assert from_delta.acts_ind_rev == from_database.acts_ind_rev
+    assert (from_delta.to_matrices() == from_database.to_matrices()).all()
@@ -4,10 +4,12 @@ from pathlib import Path
 
 import numpy as np
 import pytest
+import xarray as xr
 
 from premise.data_collection import IAMDataCollection
 from premise.electricity import Electricity
 from premise.filesystem_constants import DATA_DIR
+from premise.transformation import get_suppliers_of_a_region
 
 LOSS_PER_COUNTRY = DATA_DIR / "electricity" / "losses_per_country.csv"
 LHV_FUELS = DATA_DIR / "fuels_lower_heating_value.txt"
@@ -88,3 +90,165 @@ def test_losses():
 def test_powerplant_map():
     s = el.powerplant_map["Biomass IGCC CCS"]
     assert isinstance(s, set)
+
+
+def power_plant(name, location, product="electricity, high voltage"):
+    return {
+        "name": name,
+        "reference product": product,
+        "location": location,
+        "unit": "kilowatt hour",
+        "exchanges": [],
+    }
+
+
+def get_power_plants():
+    el = object.__new__(Electricity)
+    el.database = [
+        power_plant("electricity production, hard coal", "DE"),
+        power_plant("heat and power co-generation, hard coal", "FR"),
+        power_plant("electricity production, hard coal", "RER"),
+        power_plant("electricity production, wind", "DE"),
+        power_plant("electricity production, hard coal", "FR"),
+        power_plant("electricity production, wind", "IT"),
+        power_plant("electricity production, hard coal", "PL", "heat"),
+        power_plant("electricity production, photovoltaic", "RER"),
+    ]
+    el.powerplant_map = {
+        "Coal PC": {
+            "electricity production, hard coal",
+            "heat and power co-generation, hard coal",
+        },
+        "Wind Onshore": {"electricity production, wind"},
+        "Solar PV Centralized": {"electricity production, photovoltaic"},
+    }
+    el.production_per_tech = {
+        ("electricity production, hard coal", "DE"): 100,
+        ("heat and power co-generation, hard coal", "FR"): 20,
+        ("electricity production, hard coal", "FR"): 0.01,
+        ("electricity production, wind", "DE"): 50,
+    }
+    el.system_model = "cutoff"
+    el.year = 2030
+    el.iam_data = object.__new__(IAMDataCollection)
+    el.iam_data.time_averages = {}
+    el.iam_data.electricity_markets = xr.DataArray(
+        np.random.rand(2, 3, 4),
+        coords={
+            "region": ["EUR", "USA"],
+            "variables": ["Coal PC", "Wind Onshore", "Solar PV Centralized"],
+            "year": [2020, 2040, 2060, 2100],
+        },
+        dims=["region", "variables", "year"],
+    )
+    return el
+
+
+def find_suppliers_as_before(el, technology, possible_locations):
+    suppliers, counter = [], 0
+
+    while len(suppliers) == 0:
+        suppliers = list(
+            get_suppliers_of_a_region(
+                database=el.database,
+                locations=possible_locations[counter],
+                names=el.powerplant_map[technology],
+                reference_prod="electricity",
+                unit="kilowatt hour",
+                exact_match=True,
+            )
+        )
+        counter += 1
+
+    suppliers = el.check_for_production_volume(suppliers)
+    tech_suppliers = [
+        (supplier, el.get_production_weighted_share(supplier, suppliers))
+        for supplier in suppliers
+    ]
+    tech_suppliers = [supplier for supplier in tech_suppliers if supplier[1] > 0.001]
+    total_share = sum(supplier[1] for supplier in tech_suppliers)
+
+    return [(supplier, share / total_share) for supplier, share in tech_suppliers]
+
+
+def test_power_plant_suppliers_are_unchanged():
+    el = get_power_plants()
+    possible_locations = [["EUR"], ["DE", "FR", "IT", "PL"], ["RER"], ["GLO"]]
+    power_plant_index = el.get_power_plant_index()
+
+    for technology in el.powerplant_map:
+        assert el.find_power_plant_suppliers(
+            technology, possible_locations, power_plant_index
+        ) == find_suppliers_as_before(el, technology, possible_locations)
+
+    with pytest.raises(IndexError):
+        el.find_power_plant_suppliers("Coal PC", [["EUR"], ["US"]], power_plant_index)
+
+
+def test_electricity_mixes_are_unchanged():
+    el = get_power_plants()
+    markets = el.iam_data.electricity_markets
+    periods = [0, 20, 40, 60]
+    mixes = el.get_electricity_mixes(periods)
+
+    for region in markets.region.values:
+        for period in periods:
+            expected = (
+                markets.sel(region=region)
+                .interp(
+                    year=np.arange(el.year, el.year + period + 1),
+                    kwargs={"fill_value": "extrapolate"},
+                )
+                .mean(dim="year")
+                .values
+            )
+            assert np.allclose(mixes[period].sel(region=region).values, expected)
+
+    el.system_model = "consequential"
+    el.year = 2040
+    mixes = el.get_electricity_mixes([0])
+    assert np.allclose(
+        mixes[0].sel(region="USA").values,
+        markets.sel(region="USA", year=el.year).values,
+    )
+
+
+def test_region_specific_power_plants_are_created_where_needed():
+    el = get_power_plants()
+    el.database = [
+        power_plant("electricity production, hard coal, with CCS", "RER"),
+        power_plant("electricity production, wind", "DE"),
+        power_plant("carbon dioxide storage from hard coal power plant", "RER"),
+        power_plant("carbon dioxide, captured from hard coal", "RER"),
+        power_plant("hydrogen storage, for grid-balancing", "RER"),
+    ]
+    el.powerplant_map = {
+        "Coal PC CCS": {"electricity production, hard coal, with CCS"},
+        "Wind Onshore": {"electricity production, wind"},
+    }
+    el.powerplant_map_rev = {
+        name: tech for tech, names in el.powerplant_map.items() for name in names
+    }
+    el.regions = ["EUR", "USA", "CHA"]
+    el.get_regions_with_electricity_supply = lambda: {"Coal PC CCS": ["EUR"]}
+    el.add_to_index = lambda dataset: None
+    el.write_log = lambda dataset: None
+
+    created = {}
+
+    def fetch_proxies(name, ref_prod, production_variable, regions):
+        created[name] = regions
+        return {}
+
+    el.fetch_proxies = fetch_proxies
+    el.create_region_specific_power_plants()
+
+    # CCS power plants only where they supply electricity markets,
+    # but CO2 capture, CO2 storage and hydrogen storage for all regions,
+    # as other sectors use them
+    assert created == {
+        "electricity production, hard coal, with CCS": ["EUR"],
+        "carbon dioxide storage from hard coal power plant": None,
+        "carbon dioxide, captured from hard coal": None,
+        "hydrogen storage, for grid-balancing": None,
+    }
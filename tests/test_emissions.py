@@ -0,0 +1,79 @@
+# content of test_emissions.py
+import numpy as np
+import pytest
+import xarray as xr
+
+from premise.emissions import Emissions
+
+SECTORS = ["Power_Gen_Coal", "Cement"]
+REGIONS = ["EUR", "USA"]
+POLLUTANTS = ["NOx", "SO2", "PM25"]
+
+
+def get_gains_data():
+    values = np.array(
+        [
+            [[1.0, 0.5], [2.0, 1.5], [np.nan, 1.0]],
+            [[0.0, 0.3], [4.0, 0.0], [1.0, 3.0]],
+        ]
+    )
+    values = np.stack([values, values * 1.5])
+    data = xr.DataArray(
+        values,
+        coords={
+            "region": REGIONS,
+            "sector": SECTORS,
+            "pollutant": POLLUTANTS,
+            "year": [2020, 2050],
+        },
+        dims=["region", "sector", "pollutant", "year"],
+    )
+    return data
+
+
+def gains_emissions_change_as_before(data, year, pollutant, location, sector):
+    # prepare_data and find_gains_emissions_change,
+    # before the factors were stored in a dictionary
+    _ = lambda x: xr.where((np.isnan(x)) | (x == 0), 1, x)
+    data = data.interp(year=[year]) / _(data.loc[dict(year=2020)])
+    data = xr.where((np.isnan(data)) | (data == 0), 1, data)
+
+    if not all(
+        k in data.coords[dim].values
+        for k, dim in zip(
+            [location, pollutant, sector, year],
+            ["region", "pollutant", "sector", "year"],
+        )
+    ):
+        return 1.0
+
+    scaling_factor = data.loc[dict(region=location, pollutant=pollutant, sector=sector)]
+    scaling_factor = np.clip(
+        scaling_factor, 1 if year < 2020 else 0, 1 if year > 2020 else 1e6
+    )
+    if np.isnan(scaling_factor) or scaling_factor == 0.0:
+        scaling_factor = 1.0
+
+    return float(scaling_factor)
+
+
+@pytest.mark.parametrize("year", [2020, 2035])
+def test_gains_factors_match_xarray_lookups(year):
+    data = get_gains_data()
+    emissions = object.__new__(Emissions)
+    emissions.year = year
+    emissions.gains_EU = emissions.prepare_data(data)
+
+    for sector in SECTORS + ["Transport"]:
+        for region in REGIONS + ["CHA"]:
+            for pollutant in POLLUTANTS:
+                assert emissions.find_gains_emissions_change(
+                    pollutant=pollutant,
+                    location=region,
+                    sector=sector,
+                    model="GAINS-EU",
+                ) == pytest.approx(
+                    gains_emissions_change_as_before(
+                        data, year, pollutant, region, sector
+                    )
+                )
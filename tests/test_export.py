@@ -98,3 +98,62 @@ def test_remove_uncertainty():
         for exc in ds["exchanges"]:
             if "uncertainty_type" in exc:
                 assert exc["uncertainty_type"] == 0
+
+
+def test_scenario_exchanges(tmp_path):
+    origin_db = [
+        {
+            "name": "fake activity",
+            "reference product": "fake product",
+            "location": "FR",
+            "unit": "kilogram",
+            "exchanges": [
+                {
+                    "name": "fake activity",
+                    "product": "fake product",
+                    "location": "FR",
+                    "amount": 1,
+                    "type": "production",
+                    "unit": "kilogram",
+                },
+            ],
+        }
+    ]
+    scenario_db = [
+        {
+            **origin_db[0],
+            "exchanges": origin_db[0]["exchanges"]
+            + [
+                {
+                    "name": "fake activity",
+                    "product": "fake product",
+                    "location": "FR",
+                    "amount": amount,
+                    "type": "technosphere",
+                    "unit": "kilogram",
+                }
+                for amount in (0.1, 0.2)
+            ],
+        }
+    ]
+
+    in_memory = ScenarioExchanges(origin_db)
+    on_disk = ScenarioExchanges(origin_db, directory=tmp_path)
+    for scenario_exchanges in (in_memory, on_disk):
+        scenario_exchanges.add(scenario_db)
+
+    assert len(list(tmp_path.glob("*.npz"))) == 2
+
+    m = on_disk.to_matrices()
+    assert m.shape == (2, 2, 2)
+    assert (m == in_memory.to_matrices()).all()
+
+    production = on_disk.acts_ind_rev[
+        ("fake activity", "fake product", None, "FR", "kilogram", "production")
+    ]
+    technosphere = on_disk.acts_ind_rev[
+        ("fake activity", "fake product", None, "FR", "kilogram", "technosphere")
+    ]
+    assert m[production, production, 0] == 1
+    assert m[technosphere, production, 0] == 0
+    assert np.isclose(m[technosphere, production, 1], 0.3)
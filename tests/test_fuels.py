@@ -0,0 +1,197 @@
+# content of test_fuels.py
+import numpy as np
+import pytest
+
+from premise.fuels import (
+    HYDROGEN_SUPPLY_LOSSES,
+    Fuels,
+    add_boil_off_losses,
+    add_other_losses,
+    add_pipeline_losses,
+    calculate_fuel_properties,
+    fetch_mapping,
+    get_compression_effort,
+)
+
+SUPPLIERS = {
+    ("biogas upgrading", "CH", "biomethane", "cubic meter"): 0.25,
+    ("biomethane production", "DE", "biomethane", "kilogram"): 0.75,
+}
+
+
+def get_fuels():
+    fuels = object.__new__(Fuels)
+    fuels.fuels_specs = {
+        "biomethane": {"lhv": 47.5, "co2": 0.055, "biogenic_share": 1.0},
+    }
+    fuels.cached_fuel_suppliers = {}
+    fuels.cached_h2_fuelling_stations = {}
+    fuels.calls = 0
+
+    def select_multiple_suppliers(**kwargs):
+        fuels.calls += 1
+        return SUPPLIERS
+
+    fuels.select_multiple_suppliers = select_multiple_suppliers
+
+    return fuels
+
+
+def fuel_market_as_before(fuels, share, prod_var, unit, lhv):
+    # the per-supplier loop of generate_regional_fuel_market,
+    # before the period-independent values were cached
+    exchanges, final_lhv, fossil_co2, non_fossil_co2 = [], 0, 0, 0
+    for supplier_key, supplier_val in SUPPLIERS.items():
+        conversion_factor = 1.0
+        if supplier_key[-1] == "kilogram":
+            if unit == "cubic meter":
+                conversion_factor = 0.735
+
+        supplier_share = share * supplier_val
+        amount = (
+            supplier_share
+            * (lhv / fuels.fuels_specs[prod_var]["lhv"])
+            * conversion_factor
+        )
+        supplier_lhv = fuels.fuels_specs[prod_var]["lhv"] * (
+            0.735 if supplier_key[-1] == "cubic meter" else 1
+        )
+        co2_factor = fuels.fuels_specs[prod_var]["co2"] * (
+            0.735 if supplier_key[-1] == "cubic meter" else 1
+        )
+        f_co2, nf_co2, weighted_lhv = calculate_fuel_properties(
+            amount,
+            supplier_lhv,
+            co2_factor,
+            fuels.fuels_specs[prod_var]["biogenic_share"],
+        )
+        final_lhv += weighted_lhv
+        fossil_co2 += f_co2
+        non_fossil_co2 += nf_co2
+        exchanges.append((supplier_key, amount))
+
+    return exchanges, final_lhv, fossil_co2, non_fossil_co2
+
+
+@pytest.mark.parametrize("unit", ["cubic meter", "kilogram"])
+def test_cached_fuel_suppliers_match_uncached_market(unit):
+    fuels = get_fuels()
+
+    # two periods of the same market, with different fuel shares
+    for share in (0.4, 0.65):
+        fuel_suppliers = fuels.get_fuel_suppliers(
+            prod_var="biomethane",
+            possible_names=("biogas upgrading", "biomethane production"),
+            location="RER",
+            look_for=("biomethane",),
+            blacklist=("market",),
+            unit=unit,
+            lhv=36.0,
+        )
+        exchanges, final_lhv, fossil_co2, non_fossil_co2 = fuel_market_as_before(
+            fuels, share, "biomethane", unit, 36.0
+        )
+
+        assert [s[0] for s in fuel_suppliers] == [e[0] for e in exchanges]
+        assert [share * s[1] for s in fuel_suppliers] == pytest.approx(
+            [e[1] for e in exchanges]
+        )
+        assert sum(share * s[4] for s in fuel_suppliers) == pytest.approx(final_lhv)
+        assert sum(share * s[2] for s in fuel_suppliers) == pytest.approx(fossil_co2)
+        assert sum(share * s[3] for s in fuel_suppliers) == pytest.approx(
+            non_fossil_co2
+        )
+
+    assert fuels.calls == 1
+
+
+def test_h2_fuelling_station_exchanges_are_copies():
+    fuels = get_fuels()
+    fuels.find_suppliers = lambda **kwargs: {
+        ("hydrogen refuelling station", "GLO", "hydrogen refuelling station", "unit"): 1
+    }
+
+    first = fuels.add_h2_fuelling_station("EUR")
+    first["amount"] *= 2
+    second = fuels.add_h2_fuelling_station("EUR")
+
+    assert second is not first
+    assert second["amount"] == 1 / (600 * 365 * 40)
+    assert second["name"] == "hydrogen refuelling station"
+
+
+def hydrogen_losses_as_before(losses, vehicle, state, distance):
+    # the loss loop of add_hydrogen_input_and_losses, for a single distance
+    string = ""
+    total_loss = 1
+    for loss, val in losses[vehicle][state].items():
+        val = float(val)
+
+        if loss == "boil-off":
+            total_loss *= add_boil_off_losses(vehicle, distance, val)
+            string += f"Boil-off losses: {int((total_loss - 1) * 100)}%. "
+
+        elif loss == "pipeline_leak":
+            total_loss *= add_pipeline_losses(distance, val)
+            string += f"Pipeline losses: {int((total_loss - 1) * 100)}%. "
+        else:
+            total_loss *= add_other_losses(val)
+            string += f"{loss} losses: {int(val * 100)}%. "
+
+    return total_loss, string
+
+
+def compression_electricity_as_before(year, state, vehicle, distance):
+    # the compression needs of add_compression_electricity, for a single distance
+    if state == "gaseous":
+        if vehicle == "truck":
+            electricity_comp = get_compression_effort(25, 500, 1000)
+            electricity_comp += get_compression_effort(500, 900, 1000)
+        else:
+            electricity_comp = get_compression_effort(25, 100, 1000) + (
+                0.6 * distance / 250
+            )
+            electricity_comp += get_compression_effort(100, 900, 1000)
+    else:
+        electricity_comp = np.clip(
+            np.interp(year, [2020, 2035, 2050], [12, 8, 6]), 12, 6
+        )
+
+    return electricity_comp
+
+
+def test_hydrogen_route_factors_match_per_dataset_calculation():
+    fuels = get_fuels()
+    fuels.year = 2040
+    losses = fetch_mapping(HYDROGEN_SUPPLY_LOSSES)
+    supply_chain_scenarios = {
+        "truck": {
+            "state": ["gaseous", "liquid", "liquid organic compound"],
+            "distance": [500, 1200],
+        },
+        "ship": {"state": ["liquid"], "distance": [2000, 8000]},
+        "CNG pipeline": {"state": ["gaseous"], "distance": [500, 1500]},
+    }
+
+    route_factors = fuels.get_hydrogen_route_factors(supply_chain_scenarios, losses)
+
+    assert len(route_factors) == 10
+    for vehicle, config in supply_chain_scenarios.items():
+        for state in config["state"]:
+            for distance in config["distance"]:
+                factors = route_factors[(vehicle, state, distance)]
+                total_loss, string = hydrogen_losses_as_before(
+                    losses, vehicle, state, distance
+                )
+
+                assert factors["losses"] == pytest.approx(total_loss)
+                assert factors["losses comment"] == string
+
+                if state == "liquid organic compound":
+                    assert factors["compression"] is None
+                else:
+                    assert factors["compression"] == pytest.approx(
+                        compression_electricity_as_before(
+                            fuels.year, state, vehicle, distance
+                        )
+                    )
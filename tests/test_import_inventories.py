@@ -1,10 +1,23 @@
 # content of test_activity_maps.py
 from pathlib import Path
+from unittest.mock import Mock, patch
 
 import pytest
+import requests
+from bw2data import projects
 
 from premise.filesystem_constants import INVENTORY_DIR
-from premise.inventory_imports import BaseInventoryImport, DefaultInventory
+from premise.inventory_imports import (
+    BaseInventoryImport,
+    DatabaseIndex,
+    DefaultInventory,
+    VariousVehicles,
+    fetch_remote_inventory,
+    get_cached_inventory_filepath,
+    get_remote_inventory_filepath,
+    load_default_inventory,
+    register_migration_maps,
+)
 
 FILEPATH_CARMA_INVENTORIES = INVENTORY_DIR / "lci-Carma-CCS.xlsx"
 FILEPATH_BIOFUEL_INVENTORIES = INVENTORY_DIR / "lci-biofuels.xlsx"
@@ -15,6 +28,7 @@ FILEPATH_SYNGAS_INVENTORIES = INVENTORY_DIR / "lci-syngas.xlsx"
 FILEPATH_HYDROGEN_COAL_GASIFICATION_INVENTORIES = (
     INVENTORY_DIR / "lci-hydrogen-coal-gasification.xlsx"
 )
+FILEPATH_TWO_WHEELERS_INVENTORIES = INVENTORY_DIR / "lci-two_wheelers.xlsx"
 
 
 def get_db():
@@ -129,3 +143,119 @@ def test_load_biofuel():
         keep_uncertainty_data=False,
     )
     assert len(bio.import_db.data) >= 150
+
+
+def test_load_default_inventory_is_cached():
+    register_migration_maps(projects.current)
+    cache_fp = get_cached_inventory_filepath(
+        FILEPATH_BIOGAS_INVENTORIES, "3.6", "3.8", "cutoff"
+    )
+    if cache_fp.exists():
+        cache_fp.unlink()
+
+    data = load_default_inventory(FILEPATH_BIOGAS_INVENTORIES, "3.6", "3.8", "cutoff")
+    assert cache_fp.exists()
+    assert (
+        load_default_inventory(FILEPATH_BIOGAS_INVENTORIES, "3.6", "3.8", "cutoff")
+        == data
+    )
+
+
+def test_cached_inventory_depends_on_premise_version():
+    cache_fp = get_cached_inventory_filepath(
+        FILEPATH_BIOGAS_INVENTORIES, "3.6", "3.8", "cutoff"
+    )
+
+    # the cached content depends on premise code (migration, biosphere linking)
+    with patch("premise.inventory_imports.__version__", (0, 0, 0)):
+        assert cache_fp != get_cached_inventory_filepath(
+            FILEPATH_BIOGAS_INVENTORIES, "3.6", "3.8", "cutoff"
+        )
+
+
+def test_vehicle_inventory_is_cached():
+    db, version = get_db()
+    cache_fp = get_cached_inventory_filepath(
+        FILEPATH_TWO_WHEELERS_INVENTORIES, "3.7", "3.8", "cutoff"
+    )
+    if cache_fp.exists():
+        cache_fp.unlink()
+
+    kwargs = {
+        "version_in": "3.7",
+        "version_out": "3.8",
+        "path": FILEPATH_TWO_WHEELERS_INVENTORIES,
+        "year": 2030,
+        "regions": ["World"],
+        "model": "remind",
+        "scenario": "SSP2-Base",
+        "vehicle_type": "two wheeler",
+    }
+
+    vehicles = VariousVehicles(db, **kwargs)
+    assert cache_fp.exists()
+
+    # the inventories do not depend on the scenario:
+    # other scenarios reuse the same cached file
+    kwargs.update(year=2050, model="image", scenario="SSP2-RCP26")
+    mtime = cache_fp.stat().st_mtime_ns
+    cached_vehicles = VariousVehicles(db, **kwargs)
+    assert cached_vehicles.import_db.data == vehicles.import_db.data
+    assert cache_fp.stat().st_mtime_ns == mtime
+
+    # datasets are linked to the biosphere before being cached
+    assert all(
+        "input" in exc
+        for ds in cached_vehicles.import_db.data
+        for exc in ds["exchanges"]
+        if exc["type"] == "biosphere"
+    )
+
+
+def test_database_index():
+    db, version = get_db()
+    index = DatabaseIndex(db)
+
+    assert "argsthyfujgyftdgr" in index.codes
+    assert ("fake activity", "fake product", "IAI Area, Africa") in index.names
+    assert (
+        index.find_product("fake activity", "IAI Area, Africa", "kilogram")
+        == "fake product"
+    )
+    assert (
+        index.find_product(
+            "fake activity", "IAI Area, Africa", "kilogram", "other product"
+        )
+        is None
+    )
+
+    index.add([dict(db[0], code="new code", location="GLO")])
+    assert "new code" in index.codes
+    assert index.find_product("fake activity", "GLO", "kilogram") == "fake product"
+
+
+@patch("premise.inventory_imports.requests.get")
+def test_fetch_remote_inventory(mocked_get):
+    url = "https://example.com/inventories/lci-test.csv"
+    filepath = get_remote_inventory_filepath(url)
+    filepath.unlink(missing_ok=True)
+
+    mocked_get.return_value = Mock(
+        status_code=200, content=b"Activity,test\n", headers={"ETag": '"abc"'}
+    )
+    assert fetch_remote_inventory(url) == filepath
+    assert filepath.read_text(encoding="utf-8").strip() == "Activity,test"
+
+    # unchanged on the server
+    mocked_get.return_value = Mock(status_code=304, headers={})
+    assert fetch_remote_inventory(url) == filepath
+    assert mocked_get.call_args.kwargs["headers"] == {"If-None-Match": '"abc"'}
+
+    # no network
+    mocked_get.side_effect = requests.ConnectionError
+    assert fetch_remote_inventory(url) == filepath
+
+    filepath.unlink()
+    filepath.with_name(f"{filepath.name}.etag").unlink()
+    with pytest.raises(ConnectionError):
+        fetch_remote_inventory(url)
@@ -0,0 +1,121 @@
+# content of test_lcia.py
+import logging
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from premise.export import (
+    biosphere_flows_dictionary,
+    create_codes_index_of_biosphere_flows_matrix,
+)
+from premise.lcia import get_method_characterization_vector, quick_lcia
+
+CO2 = ("Carbon dioxide, fossil", "air", "unspecified", "kilogram")
+
+
+def dataset(name, unit, supplier, supplier_unit, amount, emissions):
+    return {
+        "name": name,
+        "reference product": name,
+        "location": "GLO",
+        "unit": unit,
+        "exchanges": [
+            {
+                "name": name,
+                "product": name,
+                "location": "GLO",
+                "unit": unit,
+                "type": "production",
+                "amount": 1,
+            },
+            {
+                "name": supplier,
+                "product": supplier,
+                "location": "GLO",
+                "unit": supplier_unit,
+                "type": "technosphere",
+                "amount": amount,
+            },
+            {
+                "name": CO2[0],
+                "categories": CO2[1:3],
+                "unit": CO2[3],
+                "type": "biosphere",
+                "amount": emissions,
+                "input": ("biosphere3", biosphere_flows_dictionary("3.9")[CO2]),
+            },
+        ],
+    }
+
+
+def test_quick_lcia():
+    scenario = {
+        "model": "remind",
+        "pathway": "SSP2-Base",
+        "year": 2030,
+        "database": [
+            dataset("electricity", "kilowatt hour", "coal", "kilogram", 0.5, 1.0),
+            dataset("coal", "kilogram", "electricity", "kilowatt hour", 0.1, 0.2),
+        ],
+    }
+
+    scores = quick_lcia(
+        scenario, [("electricity", "electricity")], {"GWP": {CO2: 1.0}}, "3.9"
+    )
+
+    assert len(scores) == 1
+    assert scores.loc[0, "location"] == "GLO"
+    assert scores.loc[0, "GWP"] == pytest.approx(1.1 / 0.95)
+
+    with pytest.raises(ValueError):
+        quick_lcia(scenario, [("steel", "steel")], {"GWP": {CO2: 1.0}}, "3.9")
+
+
+def test_quick_lcia_skips_unlinked_exchanges(caplog):
+    scenario = {
+        "model": "remind",
+        "pathway": "SSP2-Base",
+        "year": 2030,
+        "database": [
+            dataset("electricity", "kilowatt hour", "coal", "kilogram", 0.5, 1.0),
+            dataset("coal", "kilogram", "steel", "kilogram", 0.1, 0.2),
+        ],
+    }
+
+    logger = logging.getLogger("premise.export")
+    logger.addHandler(caplog.handler)
+    try:
+        scores = quick_lcia(
+            scenario, [("electricity", "electricity")], {"GWP": {CO2: 1.0}}, "3.9"
+        )
+    finally:
+        logger.removeHandler(caplog.handler)
+
+    assert scores.loc[0, "GWP"] == pytest.approx(1.1)
+    assert "1 exchange(s) could not be linked to a dataset" in caplog.text
+
+
+def test_method_vectors_are_cached_per_project(monkeypatch):
+    code = biosphere_flows_dictionary("3.9")[CO2]
+    factors = {"default": 1.0, "other": 2.0}
+
+    class Method:
+        def __init__(self, method):
+            pass
+
+        def load(self):
+            return [(("biosphere3", code), factors[fake_bw2data.projects.current])]
+
+    fake_bw2data = SimpleNamespace(
+        projects=SimpleNamespace(current="default"),
+        methods={("GWP",)},
+        Method=Method,
+    )
+    monkeypatch.setitem(sys.modules, "bw2data", fake_bw2data)
+
+    index = create_codes_index_of_biosphere_flows_matrix("3.9")[code]
+    assert get_method_characterization_vector(("GWP",), "3.9")[index] == 1.0
+
+    fake_bw2data.projects.current = "other"
+    assert get_method_characterization_vector(("GWP",), "3.9")[index] == 2.0
@@ -0,0 +1,61 @@
+# content of test_logger.py
+import logging
+import multiprocessing
+from logging.handlers import QueueHandler
+
+from premise import logger
+from premise.logger import (
+    configure_logging,
+    configure_worker_logging,
+    create_logger,
+    get_log_queue,
+)
+
+
+def log_lines(worker):
+    for line in range(100):
+        create_logger("test").info(f"worker {worker} line {line}")
+
+
+def read_log(tmp_path):
+    with open(tmp_path / "export" / "logs" / "premise.log", encoding="utf8") as f:
+        return f.read().splitlines()
+
+
+def test_worker_logs_are_written_by_listener(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "export" / "logs").mkdir(parents=True)
+    logger.stop_log_listener()
+
+    queue = get_log_queue()
+    with multiprocessing.Pool(
+        processes=2, initializer=configure_worker_logging, initargs=(queue,)
+    ) as pool:
+        pool.map(log_lines, range(4))
+    log_lines("main")
+    logger.stop_log_listener()
+
+    lines = read_log(tmp_path)
+
+    assert len(lines) == 500
+    assert all(line.split("|")[1] == "premise.test" for line in lines)
+    assert logging.getLogger("premise").handlers == []
+
+
+def test_main_process_logs_without_listener(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "export" / "logs").mkdir(parents=True)
+    logger.stop_log_listener()
+
+    configure_logging()
+    log_lines("main")
+
+    assert logger.LOG_MANAGER is None
+    assert not any(
+        isinstance(handler, QueueHandler)
+        for handler in logging.getLogger("premise").handlers
+    )
+
+    logger.stop_log_listener()
+
+    assert len(read_log(tmp_path)) == 100
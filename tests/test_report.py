@@ -0,0 +1,93 @@
+# content of test_report.py
+from types import SimpleNamespace
+
+import numpy as np
+import openpyxl
+import pandas as pd
+import xarray as xr
+
+from premise import report
+from premise.logger import ChangeLog, add_to_change_log
+
+
+def test_change_log_to_change_report(tmp_path, monkeypatch):
+    monkeypatch.setattr(report, "DIR_LOG_REPORT", tmp_path)
+
+    change_log = ChangeLog()
+    change_log.add(
+        "premise_biomass",
+        ["created", "remind", "SSP2-Base", 2030, "market for biomass", "EUR", 0.5],
+    )
+
+    other_change_log = ChangeLog()
+    other_change_log.add(
+        "premise_biomass",
+        [
+            "created",
+            "remind",
+            "SSP2-PkBudg1150",
+            2030,
+            "market for biomass",
+            "EUR",
+            None,
+        ],
+    )
+
+    scenario = {}
+    add_to_change_log(scenario, change_log, other_change_log)
+    assert len(scenario["change log"]) == 2
+
+    table = scenario["change log"].to_dataframes()["premise_biomass"]
+    assert table["year"].dtype.kind == "i"
+    assert table["biomass share"].dtype.kind == "f"
+
+    report.generate_change_report(
+        "ecoinvent", "3.9", "brightway", "cutoff", scenario["change log"], fmt="csv"
+    )
+
+    filepath = next(tmp_path.glob("*.xlsx"))
+    workbook = openpyxl.load_workbook(filepath)
+    assert workbook.sheetnames == ["Change report", "Biomass"]
+
+    rows = list(workbook["Biomass"].values)
+    assert rows[2][0] == "status"
+    assert rows[3][-1] == 0.5
+    assert rows[4][-1] is None
+
+    assert (filepath.with_suffix("") / "premise_biomass.csv").is_file()
+
+
+def test_summary_report(tmp_path):
+    regions = ["EUR", "World"]
+    years = [2020, 2050, 2150]
+    variables = ["population", "gdp"]
+
+    iam_data = SimpleNamespace(
+        regions=regions,
+        other_vars=xr.DataArray(
+            np.arange(12, dtype=float).reshape(2, 2, 3),
+            coords={"region": regions, "variables": variables, "year": years},
+            dims=["region", "variables", "year"],
+        ),
+    )
+    scenarios = [
+        {"model": "remind", "pathway": "SSP2-Base", "year": year, "iam data": iam_data}
+        for year in (2030, 2050)
+    ]
+
+    filepath = tmp_path / "scenario_report.xlsx"
+    report.generate_summary_report(scenarios, filepath, fmt="csv")
+
+    workbook = openpyxl.load_workbook(filepath)
+    rows = list(workbook["Population"].values)
+    assert rows[2][0] == "REMIND - SSP2-BASE"
+    assert rows[4][0] == "EUR"
+    assert rows[7][2] == "population"
+    assert rows[8][1:3] == (2020, 0.0)
+    assert rows[9][1:3] == (2050, 1.0)
+    assert len(workbook["Population"]._charts) == 2
+
+    table = pd.read_csv(filepath.with_suffix(".csv"))
+    assert len(table) == 8
+    assert set(table["sector"]) == {"Population", "GDP"}
+    assert table["year"].max() == 2050
@@ -0,0 +1,186 @@
+# content of test_sweep.py
+import copy
+from types import SimpleNamespace
+
+import pytest
+
+from premise import ecoinvent_modification
+from premise.ecoinvent_modification import NewDatabase
+from premise.export import ScenarioExchanges, _prepare_database
+
+
+def dataset(name, exchanges):
+    return {
+        "name": name,
+        "reference product": name,
+        "location": "GLO",
+        "unit": "kilogram",
+        "code": name,
+        "database": "ecoinvent",
+        "exchanges": [
+            {
+                "name": name,
+                "product": name,
+                "location": "GLO",
+                "amount": 1,
+                "type": "production",
+                "unit": "kilogram",
+                "input": ("ecoinvent", name),
+            }
+        ]
+        + [
+            {
+                "name": supplier,
+                "product": supplier,
+                "location": "GLO",
+                "amount": amount,
+                "type": "technosphere",
+                "unit": "kilogram",
+                "input": ("ecoinvent", supplier),
+            }
+            for supplier, amount in exchanges
+        ],
+    }
+
+
+BASE = [
+    dataset("steel", [("coal", 0.5), ("electricity", 2)]),
+    dataset("coal", [("electricity", 0.1)]),
+    dataset("electricity", [("coal", 0.3)]),
+]
+
+
+def get_database(scenarios, chunk_size=None):
+    ndb = object.__new__(NewDatabase)
+    ndb.database = copy.deepcopy(BASE)
+    ndb.scenarios = scenarios
+    ndb.chunk_size = chunk_size
+    ndb.version = "3.9"
+    ndb.system_model = "cutoff"
+    ndb.keep_uncertainty_data = False
+    ndb.processes = 2
+    ndb.datapackages = None
+    ndb.generate_scenario_report = lambda: None
+    ndb.generate_change_report = lambda: None
+
+    def update_steel():
+        # a transformation that changes an amount and duplicates a dataset
+        for scenario in ndb.scenarios:
+            scenario["database"][0]["exchanges"][1]["amount"] = scenario["year"] / 4000
+            scenario["database"].append(copy.deepcopy(scenario["database"][0]))
+
+    ndb.update_steel = update_steel
+
+    return ndb
+
+
+def get_scenarios():
+    return [
+        {
+            "model": "remind",
+            "pathway": "SSP2-Base",
+            "year": year,
+            "iam data": SimpleNamespace(regions=["World"]),
+            "database": copy.deepcopy(BASE),
+        }
+        for year in (2030, 2050)
+    ]
+
+
+def to_dict(scenario_exchanges):
+    acts = {v: k for k, v in scenario_exchanges.acts_ind_rev.items()}
+    m = scenario_exchanges.to_matrices()
+
+    return {
+        (acts[row], acts[col], s): value
+        for (row, col, s), value in zip(m.coords.T, m.data)
+    }
+
+
+def test_sweep_superstructure(monkeypatch):
+    collected = {}
+
+    def generate_superstructure_db(**kwargs):
+        collected["exchanges"] = to_dict(kwargs["scenario_exchanges"])
+        collected["processes"] = kwargs["processes"]
+        return []
+
+    monkeypatch.setattr(
+        ecoinvent_modification, "generate_superstructure_db", generate_superstructure_db
+    )
+    monkeypatch.setattr(
+        ecoinvent_modification, "write_brightway_database", lambda data, name: None
+    )
+
+    ndb = get_database(get_scenarios())
+    ndb.sweep(transformations=["update_steel"], exports=["superstructure"])
+
+    # same exchanges as when the scenario databases are validated and
+    # added in full: duplicated datasets are not counted twice
+    expected = ScenarioExchanges(BASE)
+    for scenario in get_database(get_scenarios()).scenarios:
+        scenario["database"][0]["exchanges"][1]["amount"] = scenario["year"] / 4000
+        scenario["database"].append(copy.deepcopy(scenario["database"][0]))
+        _prepare_database(scenario, "super", BASE, False)
+        expected.add(scenario["database"])
+
+    assert collected["exchanges"] == to_dict(expected)
+    assert collected["processes"] == 2
+
+    steel = ("steel", "steel", None, "GLO", "kilogram", "production")
+    coal = ("coal", "coal", None, "GLO", "kilogram", "technosphere")
+    assert collected["exchanges"][(steel, steel, 1)] == 1
+    assert collected["exchanges"][(coal, steel, 2)] == 2050 / 4000
+
+    assert all("database" not in scenario for scenario in ndb.scenarios)
+
+    with pytest.raises(ValueError, match="None of the scenarios has a database"):
+        ndb.quick_lcia([("steel", "steel")], {})
+
+
+def test_sweep_in_chunks(monkeypatch):
+    monkeypatch.setattr(
+        ecoinvent_modification, "write_brightway_database", lambda data, name: None
+    )
+
+    scenarios = get_scenarios() + get_scenarios()
+    for scenario in scenarios:
+        del scenario["database"]
+
+    ndb = get_database(scenarios, chunk_size=3)
+    loaded = []
+
+    def load_scenarios(chunk):
+        loaded.append(len(chunk))
+        for scenario in chunk:
+            scenario["database"] = copy.deepcopy(ndb.database)
+
+    ndb._NewDatabase__load_scenarios = load_scenarios
+
+    with pytest.raises(ValueError, match="use `sweep\\(\\)`"):
+        ndb.update_biomass()
+
+    ndb.sweep(transformations=["update_steel"], exports=["brightway"])
+
+    assert loaded == [3, 1]
+    assert ndb.scenarios is scenarios
+    assert all("database" not in scenario for scenario in ndb.scenarios)
+    assert all("change log" in scenario for scenario in ndb.scenarios)
+
+
+def test_sweep_restores_scenarios(monkeypatch):
+    def write_brightway_database(data, name):
+        raise RuntimeError("Export failed.")
+
+    monkeypatch.setattr(
+        ecoinvent_modification, "write_brightway_database", write_brightway_database
+    )
+
+    scenarios = get_scenarios()
+    ndb = get_database(scenarios, chunk_size=1)
+    ndb._NewDatabase__load_scenarios = lambda chunk: None
+
+    with pytest.raises(RuntimeError):
+        ndb.sweep(transformations=["update_steel"], exports=["brightway"])
+
+    assert ndb.scenarios is scenarios
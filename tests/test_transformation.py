@@ -0,0 +1,151 @@
+# content of test_transformation.py
+import numpy as np
+import xarray as xr
+
+from premise.transformation import (
+    SUPPLIER_CACHE,
+    BaseTransformation,
+    get_suppliers_of_a_region,
+)
+from premise.utils import DATABASE_GENERATIONS
+
+
+def get_db():
+    return [
+        {
+            "name": "electricity production, hard coal",
+            "reference product": "electricity, high voltage",
+            "location": loc,
+            "unit": "kilowatt hour",
+        }
+        for loc in ["DE", "FR"]
+    ]
+
+
+def test_get_suppliers_of_a_region():
+    db = get_db()
+    suppliers = get_suppliers_of_a_region(
+        database=db,
+        locations=["DE"],
+        names=["electricity production, hard coal"],
+        reference_prod="electricity",
+        unit="kilowatt hour",
+        exact_match=True,
+    )
+    assert [s["location"] for s in suppliers] == ["DE"]
+
+
+def test_supplier_cache_invalidation():
+    db = get_db()
+    kwargs = {
+        "database": db,
+        "locations": ["IT"],
+        "names": ["hard coal"],
+        "reference_prod": "electricity",
+        "unit": "kilowatt hour",
+    }
+    assert get_suppliers_of_a_region(**kwargs) == []
+
+    new_dataset = dict(db[0], location="IT")
+    db.append(new_dataset)
+    SUPPLIER_CACHE.update(db, [new_dataset])
+    assert get_suppliers_of_a_region(**kwargs) == [new_dataset]
+
+    # unrelated entries are kept
+    query = next(iter(SUPPLIER_CACHE.entries))
+    other_dataset = dict(db[0], name="heat production, natural gas", location="IT")
+    db.append(other_dataset)
+    SUPPLIER_CACHE.update(db, [other_dataset])
+    assert query in SUPPLIER_CACHE.entries
+
+
+def test_supplier_cache_unindexed_datasets():
+    db = get_db()
+    kwargs = {
+        "database": db,
+        "locations": ["IT", "ES"],
+        "names": ["hard coal"],
+        "reference_prod": "electricity",
+        "unit": "kilowatt hour",
+    }
+    suppliers = get_suppliers_of_a_region(**kwargs)
+    suppliers.append(db[0])
+    assert get_suppliers_of_a_region(**kwargs) == []
+
+    # a dataset appended without being indexed,
+    # followed by an indexed one, drops all entries
+    unindexed_dataset = dict(db[0], location="IT")
+    db.append(unindexed_dataset)
+    new_dataset = dict(db[0], name="heat production, natural gas", location="ES")
+    db.append(new_dataset)
+    SUPPLIER_CACHE.update(db, [new_dataset])
+    assert SUPPLIER_CACHE.entries == {}
+    assert get_suppliers_of_a_region(**kwargs) == [unindexed_dataset]
+
+
+def test_supplier_cache_edited_datasets():
+    db = get_db()
+    kwargs = {
+        "database": db,
+        "locations": ["DE"],
+        "names": ["electricity production, hard coal"],
+        "reference_prod": "electricity",
+        "unit": "kilowatt hour",
+        "exact_match": True,
+    }
+    assert get_suppliers_of_a_region(**kwargs) == [db[0]]
+
+    # the cache does not keep the database alive
+    assert not any(value is db for value in vars(SUPPLIER_CACHE).values())
+
+    # a dataset edited in place, without changing the size of the database
+    db[0]["location"] = "PL"
+    SUPPLIER_CACHE.update(db, [db[0]])
+    assert get_suppliers_of_a_region(**kwargs) == []
+
+    # any change of generation drops all entries
+    db[1]["location"] = "DE"
+    DATABASE_GENERATIONS.bump(db)
+    assert get_suppliers_of_a_region(**kwargs) == [db[1]]
+
+    # queries can be nested: the lock is not held while resolving
+    assert SUPPLIER_CACHE.resolve(
+        db,
+        ("nested",),
+        (),
+        True,
+        lambda: get_suppliers_of_a_region(**dict(kwargs, locations=["PL"])),
+    ) == [db[0]]
+
+
+def test_iam_efficiency_changes_match_per_dataset_lookups():
+    data = xr.DataArray(
+        np.array(
+            [
+                [[1.0, 1.2], [1.0, 0.8]],
+                [[1.0, 1.5], [1.0, np.inf]],
+                [[1.0, 1.1], [1.0, np.nan]],
+            ]
+        ),
+        coords={
+            "variables": ["Biomass IGCC", "Coal PC", "Gas CC"],
+            "region": ["EUR", "USA"],
+            "year": [2020, 2050],
+        },
+        dims=["variables", "region", "year"],
+    )
+    transformation = object.__new__(BaseTransformation)
+    transformation.year = 2035
+
+    variables = ["Coal PC", "Gas CC"]
+    changes = transformation.find_iam_efficiency_changes(data, variables)
+
+    assert changes == {
+        (variable, region): transformation.find_iam_efficiency_change(
+            data, variable, region
+        )
+        for variable in variables
+        for region in ["EUR", "USA"]
+    }
+    assert changes[("Coal PC", "USA")] == 1
+    assert changes[("Gas CC", "USA")] == 1
@@ -0,0 +1,163 @@
+# content of test_transport.py
+import itertools
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from premise.transport import (
+    create_fleet_vehicles,
+    get_average_truck_load_factors,
+    get_vehicles_mapping,
+)
+
+SIZES = ["18t", "40t"]
+POWERTRAINS = ["ICEV-d", "BEV", "FCEV"]
+CONSTRUCTION_YEARS = ["2015-2020", "2020-2025"]
+
+
+def truck_name(pwt, size, year, cycle):
+    if pwt == "BEV":
+        return (
+            f"transport, freight, lorry, battery electric, NMC-622 battery, "
+            f"{size} gross weight, {year}, {cycle}"
+        )
+    if pwt == "ICEV-d":
+        return (
+            f"transport, freight, lorry, diesel, {size} gross weight, "
+            f"{year}, EURO-VI, {cycle}"
+        )
+    return (
+        f"transport, freight, lorry, fuel cell electric, {size} gross weight, "
+        f"{year}, {cycle}"
+    )
+
+
+# no dataset for fuel cell trucks of 18t
+VEHICLES = [
+    (pwt, size, year, cycle)
+    for pwt, size, year, cycle in itertools.product(
+        POWERTRAINS, SIZES, [2020, 2025], ["regional delivery", "long haul"]
+    )
+    if (pwt, size) != ("FCEV", "18t")
+]
+
+
+def get_datasets():
+    return [
+        {
+            "name": truck_name(*vehicle),
+            "reference product": "transport, freight, lorry",
+            "unit": "ton kilometer",
+        }
+        for vehicle in VEHICLES
+    ]
+
+
+def get_fleet():
+    rng = np.random.default_rng(42)
+    values = rng.uniform(0, 10, size=(3, 2, 1, 2, 3))
+    values[0, 0, 0, 0, 0] = np.nan
+    values[0, 1, 0, 1, 2] = 0
+    # no traffic in the last region
+    values[2] = 0
+    return xr.DataArray(
+        values,
+        coords={
+            "region": ["EUR", "USA", "CHA"],
+            "size": SIZES,
+            "year": [2030],
+            "construction_year": CONSTRUCTION_YEARS,
+            "powertrain": POWERTRAINS,
+        },
+        dims=["region", "size", "year", "construction_year", "powertrain"],
+    )
+
+
+def fleet_shares_as_before(arr, regions):
+    # the nested loops of create_fleet_vehicles,
+    # before the shares were computed with arrays
+    avg_load = get_average_truck_load_factors()["truck"]
+    d_names = {vehicle: truck_name(*vehicle) for vehicle in VEHICLES}
+    available_ds = [vehicle[:3] for vehicle in VEHICLES]
+    name = "transport, freight, lorry"
+
+    acts = {}
+    for region in regions:
+        sel = arr.sel(region=region, size=SIZES, year=2030)
+        total_km = sel.sum()
+        if total_km <= 0:
+            continue
+
+        for driving_cycle in ["regional delivery", "long haul"]:
+            groups = [(f"{name}, unspecified, {driving_cycle}", SIZES, total_km)]
+            groups += [
+                (
+                    f"{name}, {size} gross weight, unspecified powertrain, "
+                    f"{driving_cycle}",
+                    [size],
+                    sel.sel(size=size).sum(),
+                )
+                for size in SIZES
+            ]
+            for act_name, sizes, total in groups:
+                if total <= 0:
+                    continue
+                exchanges = {}
+                for size in sizes:
+                    for construction_year in CONSTRUCTION_YEARS:
+                        for pwt in POWERTRAINS:
+                            indiv_km = sel.sel(
+                                size=size,
+                                construction_year=construction_year,
+                                powertrain=pwt,
+                            )
+                            constr_year = int(construction_year.split("-")[-1])
+                            to_look_for = (pwt, size, constr_year, driving_cycle)
+                            if (
+                                indiv_km > 0
+                                and to_look_for[:3] in available_ds
+                                and to_look_for in d_names
+                            ):
+                                exchanges[d_names[to_look_for]] = (
+                                    indiv_km / total
+                                ).values.item(0) * avg_load[driving_cycle][size]
+                if exchanges:
+                    total_amount = sum(exchanges.values())
+                    acts[(act_name, region)] = {
+                        k: v / total_amount for k, v in exchanges.items()
+                    }
+
+    return acts
+
+
+def test_fleet_shares_match_nested_loops():
+    arr = get_fleet()
+    regions = ["EUR", "USA", "CHA"]
+
+    fleet_vehicles = create_fleet_vehicles(
+        datasets=get_datasets(),
+        vehicle_type="truck",
+        year=2030,
+        model="remind",
+        scenario="SSP2-Base",
+        version="3.9",
+        system_model="cutoff",
+        regions=regions,
+        arr=arr,
+    )
+    expected = fleet_shares_as_before(arr, regions)
+    assert len(expected) == 12
+
+    assert [(act["name"], act["location"]) for act in fleet_vehicles] == list(expected)
+    for act in fleet_vehicles:
+        exchanges = expected[(act["name"], act["location"])]
+        assert [
+            exc["name"] for exc in act["exchanges"] if exc["type"] == "technosphere"
+        ] == list(exchanges)
+        assert [
+            exc["amount"] for exc in act["exchanges"] if exc["type"] == "technosphere"
+        ] == pytest.approx(list(exchanges.values()))
+        assert act["comment"] == (
+            f"Fleet-average vehicle for the year 2030, for the region {act['location']}."
+        )